@@ -0,0 +1,498 @@
+"""
+Runs structured commands against the manage app without console I/O.
+
+Each line of a commands file is a JSON object with an `op` and its
+arguments, for example::
+
+    {"op": "login", "username": "Lionel.M", "password": "2977"}
+    {"op": "create_project", "name": "Robot", "desc": "A robot", "as": "robot"}
+    {"op": "invite", "project": "$robot", "user": "Manuel.N"}
+
+A command with `as` keeps its result under that name and a later argument
+of `$name` is replaced by it, an `id` is left alone so callers can use it
+to match up replies.
+"""
+import argparse
+import inspect
+import json
+import sys
+import time
+from project_manage import ManageApp, ActionError, Role, MemberView, \
+    describe
+
+
+def percentile(samples, fraction):
+    """Gets a percentile of some samples.
+
+    Args:
+        samples (list): The samples, sorted.
+        fraction (float): The percentile as a fraction, 0.5 is the median.
+
+    Returns:
+        float: The sample at the percentile, 0 if there are no samples.
+    """
+    if not samples:
+        return 0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Session:
+    """The state of one user going through commands, the user logs in
+    with the `login` command and every later command is done as them.
+
+    Args:
+        app (ManageApp): The manage app.
+    """
+    def __init__(self, app):
+        self.app, self.login_data, self.names = app, None, {}
+        self.__ops = {
+            "login": (self.op_login, None),
+            "logout": (self.op_logout, None),
+            "become": (self.op_become, {Role.Member, Role.Lead}),
+            "create_project": (self.op_create_project, {Role.Lead}),
+            "edit_project": (self.op_edit_project, {Role.Lead}),
+            "delete_project": (self.op_delete_project, {Role.Lead}),
+            "invite": (self.op_invite, {Role.Lead}),
+            "request_advisor": (self.op_request_advisor, {Role.Lead}),
+            "submit_approval": (self.op_submit_approval, {Role.Lead}),
+            "submit_evaluation": (self.op_submit_evaluation, {Role.Lead}),
+            "respond_invitation": (self.op_respond_invitation, {Role.Member}),
+            "respond_advisor_request":
+            (self.op_respond_advisor_request, {Role.Faculty, Role.Advisor}),
+            "respond_approval_request":
+            (self.op_respond_approval_request, {Role.Advisor}),
+            "evaluate": (self.op_evaluate, {Role.Faculty, Role.Advisor}),
+            "respond_invitations":
+            (self.op_respond_invitations, {Role.Member}),
+            "respond_advisor_requests":
+            (self.op_respond_advisor_requests, {Role.Faculty, Role.Advisor}),
+            "respond_approval_requests":
+            (self.op_respond_approval_requests, {Role.Advisor}),
+            "evaluate_projects":
+            (self.op_evaluate_projects, {Role.Faculty, Role.Advisor}),
+            "assign_evaluator": (self.op_assign_evaluator, {Role.Admin}),
+            "assign_evaluation_list":
+            (self.op_assign_evaluation_list, {Role.Admin}),
+            "compact": (self.op_compact, {Role.Admin}),
+            "checkpoints": (self.op_checkpoints, {Role.Admin}),
+            "get": (self.op_get, {Role.Admin}),
+            "set": (self.op_set, {Role.Admin}),
+            "delete": (self.op_delete, {Role.Admin}),
+            "project": (self.op_project, None),
+            "inbox": (self.op_inbox, None),
+        }
+
+    @property
+    def user_id(self):
+        """The id of the logged in user.
+
+        Returns:
+            str: The user id, None if nobody is logged in.
+        """
+        return None if self.login_data is None else self.login_data["id"]
+
+    def execute(self, command):
+        """Runs one command.
+
+        Args:
+            command (dict): The command, `op` is the name of the operation
+                and the rest are its arguments.
+
+        Raises:
+            ActionError: If the command can't be done or its arguments
+                don't match the operation.
+
+        Returns:
+            any: The result of the command, something that can be made JSON.
+        """
+        args = {
+            key: self.names.get(val[1:], val) if isinstance(val, str)
+            and val.startswith('$') else val
+            for key, val in command.items() if key not in {"op", "as", "id"}
+        }
+        op_info = self.__ops.get(command.get("op"))
+        if op_info is None:
+            raise ActionError(f"Unknown operation {command.get('op')}.")
+        if op_info[1] is not None:
+            if self.login_data is None:
+                raise ActionError("Please login first.")
+            if self.login_data["role"] not in op_info[1]:
+                raise ActionError("You are not allowed to do that.")
+        try:
+            inspect.signature(op_info[0]).bind(**args)
+        except TypeError as err:
+            raise ActionError(f"Bad arguments: {err}") from err
+        result = op_info[0](**args)
+        if "as" in command:
+            self.names[command["as"]] = result
+        return result
+
+    def __own_project(self, project):
+        project_view = self.app.get_project_view(project)
+        if project_view.lead_id != self.user_id:
+            raise ActionError("You are not the lead of that project.")
+        return project_view
+
+    def op_login(self, username, password):
+        """Logs in.
+
+        Returns:
+            dict: The id and the role of the user.
+        """
+        login_data = self.app.authenticate(username, password)
+        if login_data is None:
+            raise ActionError("Invalid credentials, please try again.")
+        self.login_data = login_data
+        return {"id": login_data["id"], "role": login_data["role"]}
+
+    def op_logout(self):
+        """Logs out.
+        """
+        self.login_data = None
+
+    def op_become(self, role):
+        """Makes a member become a lead or the other way around.
+
+        Args:
+            role (str): `lead` or `member`.
+        """
+        role = {"lead": Role.Lead, "member": Role.Member}.get(role)
+        if role is None:
+            raise ActionError("The role must be lead or member.")
+        self.app.change_role(
+            MemberView(self.app.people_table.get(self.user_id),
+                       self.login_data), role)
+
+    def op_create_project(self, name, desc):
+        """Creates a project.
+
+        Returns:
+            str: The project id.
+        """
+        return self.app.create_project(self.user_id, name, desc).id
+
+    def op_edit_project(self, project, name=None, desc=None, report=None):
+        """Changes the name, description or report of a project.
+        """
+        self.app.update_project(self.__own_project(project).id, name, desc,
+                                report)
+
+    def op_delete_project(self, project):
+        """Deletes a project along with every reference to it.
+
+        Returns:
+            list: The ids of the people whose rows changed.
+        """
+        return self.app.delete_project(self.__own_project(project).id)
+
+    def op_invite(self, project, user):
+        """Invites a member to a project.
+
+        Returns:
+            str: The id of the member.
+        """
+        return self.app.invite_member(self.__own_project(project).id, user).id
+
+    def op_request_advisor(self, project, faculty):
+        """Asks a faculty to be the advisor of a project.
+
+        Returns:
+            str: The id of the faculty.
+        """
+        return self.app.request_advisor(
+            self.__own_project(project).id, faculty).id
+
+    def op_submit_approval(self, project):
+        """Sends a project to its advisor for approval.
+        """
+        self.app.submit_approval(self.__own_project(project).id)
+
+    def op_submit_evaluation(self, project):
+        """Puts a project up for evaluation.
+        """
+        self.app.submit_evaluation(self.__own_project(project).id)
+
+    def op_respond_invitation(self, project, accept):
+        """Accepts or rejects an invitation.
+        """
+        self.app.respond_invitation(self.user_id, project, accept)
+
+    def op_respond_advisor_request(self, project, accept):
+        """Accepts or rejects a request to be an advisor.
+
+        Returns:
+            bool: True if the user has just become an advisor.
+        """
+        return self.app.respond_advisor_request(self.user_id, project, accept)
+
+    def op_respond_approval_request(self, project, approve):
+        """Approves or rejects a project.
+        """
+        self.app.respond_approval_request(self.user_id, project, approve)
+
+    def op_evaluate(self, project, positive):
+        """Evaluates a project.
+        """
+        self.app.evaluate(self.user_id, project, positive)
+
+    def op_respond_invitations(self, projects, accept):
+        """Accepts or rejects many invitations at once.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        return self.app.respond_invitations(self.user_id, projects, accept)
+
+    def op_respond_advisor_requests(self, projects, accept):
+        """Accepts or rejects many requests to be an advisor at once.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        return self.app.respond_advisor_requests(self.user_id, projects,
+                                                 accept)
+
+    def op_respond_approval_requests(self, projects, approve):
+        """Approves or rejects many projects at once.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        return self.app.respond_approval_requests(self.user_id, projects,
+                                                  approve)
+
+    def op_evaluate_projects(self, projects, positive):
+        """Evaluates many projects at once.
+
+        Returns:
+            list: The ids of the projects that were evaluated.
+        """
+        return self.app.evaluate_projects(self.user_id, projects, positive)
+
+    def op_assign_evaluator(self, project, faculty):
+        """Assigns a faculty to evaluate a project.
+
+        Returns:
+            str: The id of the evaluator.
+        """
+        return self.app.assign_evaluator(project, faculty).id
+
+    def op_assign_evaluation_list(self, evaluators=1):
+        """Assigns the least busy faculty to every project on the evaluation list.
+
+        Returns:
+            dict: The ids of the evaluators of each project that got them.
+        """
+        return self.app.assign_evaluation_list(evaluators)
+
+    def op_compact(self):
+        """Removes the ids of deleted projects and repeated ids from every list.
+
+        Returns:
+            dict: The number of rows changed and of ids removed.
+        """
+        return self.app.compact()
+
+    def op_checkpoints(self):
+        """Gets the metrics of the background checkpoints.
+
+        Returns:
+            dict: The metrics, None if there are none, see `Checkpointer.stats`.
+        """
+        return self.app.checkpoint_stats()
+
+    def __table(self, table):
+        found = self.app.main_database.get(table)
+        if found is None:
+            raise ActionError("Table doesn't exist.")
+        return found
+
+    def op_get(self, table, key):
+        """Gets an entry of a table.
+
+        Returns:
+            any: The value, None if there's no such entry.
+        """
+        return self.__table(table).get(key)
+
+    def op_set(self, table, key, value):
+        """Sets an entry of a table.
+        """
+        try:
+            self.__table(table).put(key, value)
+        except ValueError as err:
+            raise ActionError(str(err)) from err
+
+    def op_delete(self, table, key):
+        """Deletes an entry of a table.
+        """
+        table = self.__table(table)
+        if table.get(key) is None:
+            raise ActionError("Invalid key.")
+        table.delete(key)
+
+    def op_project(self, project):
+        """Gets the overview of a project.
+
+        Returns:
+            str: The overview of the project.
+        """
+        return self.app.get_project_view(project).get_info_string(self.app)
+
+    def op_inbox(self):
+        """Gets the project ids waiting on the logged in user.
+
+        Returns:
+            dict: The invitations, advisor requests, approval requests
+                and projects to evaluate.
+        """
+        if self.login_data is None:
+            raise ActionError("Please login first.")
+        user_data = self.app.people_table.get(self.user_id)
+        return {
+            field: list(user_data.get(field) or ())
+            for field in ("invs", "adv_reqs", "apr_reqs", "eval_projs")
+        }
+
+
+class Runner:
+    """Runs commands and keeps the latency of every operation.
+
+    Args:
+        app (ManageApp): The manage app.
+    """
+    def __init__(self, app):
+        self.app, self.session = app, Session(app)
+        self.latencies, self.errors = {}, {}
+        self.seconds = 0
+
+    def run(self, command):
+        """Runs one command and times it, any error it raises is
+        given back in its outcome so the commands after it still run.
+
+        Args:
+            command (dict): The command, anything else is a bad command.
+
+        Returns:
+            dict: The outcome, `ok` and either `result` or `error`.
+        """
+        start = time.perf_counter()
+        try:
+            if not isinstance(command, dict):
+                raise ActionError("Bad command.")
+            outcome = {"ok": True, "result": self.session.execute(command)}
+        except ActionError as err:
+            outcome = {"ok": False, "error": str(err)}
+        except Exception as err:  # a bug in one command mustn't stop the rest
+            outcome = {"ok": False, "error": f"{type(err).__name__}: {err}"}
+        elapsed = time.perf_counter() - start
+        self.seconds += elapsed
+        op_name = str(command.get("op") if isinstance(command, dict) else None)
+        self.latencies.setdefault(op_name, []).append(elapsed)
+        if not outcome["ok"]:
+            self.errors[op_name] = self.errors.get(op_name, 0) + 1
+        return outcome
+
+    def report(self):
+        """Summarizes the latency of the commands that have been run.
+
+        Returns:
+            dict: The number of commands and errors, the ops/sec and
+                the latency of each operation in milliseconds.
+        """
+        operations = {}
+        for op_name, samples in self.latencies.items():
+            samples = sorted(samples)
+            operations[op_name] = {
+                "count": len(samples),
+                "errors": self.errors.get(op_name, 0),
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "p50_ms": percentile(samples, 0.5) * 1000,
+                "p99_ms": percentile(samples, 0.99) * 1000,
+                "max_ms": samples[-1] * 1000
+            }
+        count = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "commands": count,
+            "errors": sum(self.errors.values()),
+            "seconds": self.seconds,
+            "ops_per_second": count / self.seconds if self.seconds else 0,
+            "operations": operations
+        }
+
+
+def read_commands(path):
+    """Reads a commands file, blank lines and lines starting with # are skipped.
+
+    Args:
+        path (str): The path to the file.
+
+    Yields:
+        tuple: The line number and the command, None if the line isn't JSON.
+    """
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def main():
+    """Runs a commands file and prints the report.
+    """
+    parser = argparse.ArgumentParser(
+        description="Runs a file of JSON commands against the manage app.")
+    parser.add_argument("commands", help="The commands file, one per line.")
+    parser.add_argument("--output",
+                        help="Writes the outcome of every command here.")
+    parser.add_argument("--no-save",
+                        action="store_true",
+                        help="Leave the database as it is, the changes are "
+                        "only kept in memory.")
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=1,
+        help="The number of processes used to hash passwords on the first run."
+    )
+    parser.add_argument(
+        "--single-file",
+        action="store_true",
+        help="Keep the database in one snapshot file, see `Snapshot`.")
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help="Keep the database in a SQLite file, see `SqliteDatabase`.")
+    args = parser.parse_args()
+    if args.no_save and args.sqlite:
+        parser.error("--no-save can't be used with --sqlite, "
+                     "every write is committed.")
+    app = ManageApp(args.hash_workers, args.single_file, args.sqlite,
+                    args.no_save)
+    runner = Runner(app)
+    output = None if args.output is None else open(
+        args.output, "w", encoding="utf-8")
+    try:
+        for number, command in read_commands(args.commands):
+            outcome = runner.run(command)
+            if not outcome["ok"]:
+                print(f"Line {number}: {outcome['error']}", file=sys.stderr)
+            if output is not None:
+                op_name = command.get("op") if isinstance(command, dict) else None
+                record = {"line": number, "op": op_name, **outcome}
+                output.write(json.dumps(record, default=describe))
+                output.write('\n')
+    finally:
+        if output is not None:
+            output.close()
+    if not args.no_save:
+        app.save()
+    print(json.dumps(runner.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
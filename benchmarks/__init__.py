@@ -0,0 +1,4 @@
+"""
+Benchmarks for the project management app, run them from the repository root
+e.g. `python -m benchmarks.save`.
+"""
@@ -0,0 +1,103 @@
+"""
+Has a writer update random people of a journaled database as fast as it can
+while the database is checkpointed every interval, and compares checkpointing
+in the writer's thread, in a `Checkpointer` thread and in a `Checkpointer` that
+writes from a spawned process. It prints the
+p50, p99 and longest latency of the updates, how many were done and how long
+the checkpoints held the tables still and took.
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+from database import Database, Checkpointer
+from benchmarks.save import fill
+
+
+def run(path, rows, seconds, interval, mode, seed):
+    """Updates people for a number of seconds while checkpointing.
+
+    Args:
+        path (str): The database directory.
+        rows (int): The number of people.
+        seconds (float): How long the writer runs.
+        interval (float): Seconds between checkpoints.
+        mode (str): "sync", "thread" or "process".
+        seed (int): The seed of the people picked.
+
+    Returns:
+        dict: The latencies of the updates in milliseconds and the metrics
+            of the checkpoints.
+    """
+    database = Database(path, journal=True, checkpoint_size=1 << 40)
+    fill(database, rows)
+    database.checkpoint()
+    people, rng = database.get("people"), random.Random(seed)
+    checkpointer = None
+    if mode != "sync":
+        checkpointer = Checkpointer(database, interval, process=mode == "process")
+        checkpointer.start()
+    latencies, metrics = [], []
+    gc.collect()
+    start = last = time.perf_counter()
+    while last - start < seconds:
+        if checkpointer is None and last - start >= interval * (len(metrics) + 1):
+            checkpoint_start = time.perf_counter()
+            database.checkpoint()
+            took = (time.perf_counter() - checkpoint_start) * 1000
+            metrics.append({"pause_ms": took, "duration_ms": took})
+        key = str(rng.randrange(rows))
+        people.get(key)["projs"].append("x")
+        people.touch(key)
+        now = time.perf_counter()
+        latencies.append((now - last) * 1000)
+        last = now
+    if checkpointer is not None:
+        checkpointer.stop()
+        metrics = list(checkpointer.metrics)
+    database.journal.close()
+    latencies.sort()
+    return {
+        "updates": len(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[len(latencies) * 99 // 100],
+        "max": latencies[-1],
+        "checkpoints": len(metrics),
+        "pause": statistics.median(metric["pause_ms"] for metric in metrics)
+        if metrics else 0.0,
+        "duration": statistics.median(metric["duration_ms"] for metric in metrics)
+        if metrics else 0.0
+    }
+
+
+def main():
+    """Runs the benchmark and prints one line per size and mode.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="100000,1000000",
+                        help="The numbers of people, comma separated.")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=2,
+                        help="Seconds between checkpoints.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    modes = ["sync", "thread", "process"]
+    print(f"{'rows':>8} {'mode':>7} {'updates':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'max ms':>8} {'checkpoints':>11} {'pause ms':>9} {'took ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(rows) for rows in args.rows.split(',')]:
+            for mode in modes:
+                result = run(os.path.join(tmp, f"{mode}{rows}"), rows,
+                             args.seconds, args.interval, mode, args.seed)
+                print(f"{rows:>8} {mode:>7} {result['updates']:>8} "
+                      f"{result['p50']:>7.3f} {result['p99']:>7.3f} "
+                      f"{result['max']:>8.1f} {result['checkpoints']:>11} "
+                      f"{result['pause']:>9.2f} {result['duration']:>8.1f}",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Stress tests tables used by many threads at once.
+
+Every writer does read-modify-write updates of random entries, holding the
+entry for a moment in the middle like a request that waits on I/O would,
+or not at all with a hold of 0 so only the locks are measured.
+Every table has an index and a listener that appends each change to a
+file like a journal. A reader keeps going through snapshots of the table
+and looking up the index at the same time. The throughput is printed for every number of threads
+and hold along with the number of updates that got lost, which should be
+0 for every locked table.
+"""
+import argparse
+import pickle
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from database import Table, ConcurrentTable
+
+
+@contextmanager
+def unlocked(table, key):
+    """Gives an entry of a plain table without locking anything.
+
+    Args:
+        table (Table): The table.
+        key (str): The key.
+
+    Yields:
+        dict: The value.
+    """
+    yield table.get(key)
+
+
+def writer(table, lock, keys, updates, hold, seed):
+    """Increments the counter of random entries and logs every update.
+
+    Args:
+        table (Table): The table.
+        lock (function): Locks an entry, e.g. `ConcurrentTable.locked`.
+        keys (list): The keys.
+        updates (int): The number of updates.
+        hold (float): Seconds an entry is held in the middle of an update.
+        seed (int): The seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    for _ in range(updates):
+        key = rng.choice(keys)
+        with lock(table, key) as row:
+            count = row["count"]
+            if hold:
+                time.sleep(hold)
+            row["count"] = count + 1
+            row["log"].append(seed)
+            table.touch(key)
+
+
+def reader(table, stop, reads):
+    """Goes through a snapshot of the table and looks up the index every
+    millisecond until told to stop.
+
+    Args:
+        table (Table): The table.
+        stop (threading.Event): Set when the writers are done.
+        reads (list): Where the number of snapshots read and the
+            milliseconds each lookup took are put.
+    """
+    count, lookups = 0, []
+    while not stop.wait(0.001):
+        sum(row["count"] for row in table.snapshot().values())
+        start = time.perf_counter()
+        table.find_one("count", 1)
+        lookups.append((time.perf_counter() - start) * 1000)
+        count += 1
+    reads.append((count, sorted(lookups)))
+
+
+def run(name, table, lock, threads, updates, hold):
+    """Runs writers and a reader on a table.
+
+    Returns:
+        dict: The throughput, the reads, the p99 of the index lookups in
+            milliseconds and the number of lost updates.
+    """
+    keys = [str(i) for i in range(256)]
+    for key in keys:
+        table.put(key, {"count": 0, "log": []})
+    table.create_index("count", lambda row: row["count"])
+    log, log_lock = tempfile.TemporaryFile(), threading.Lock()
+
+    def journal(action, key, val):
+        record = pickle.dumps((action, key, val))
+        with log_lock:
+            log.write(record)
+            log.flush()
+
+    table.listen(journal)
+    stop, reads = threading.Event(), []
+    read_thread = threading.Thread(target=reader, args=(table, stop, reads))
+    workers = [
+        threading.Thread(target=writer,
+                         args=(table, lock, keys, updates, hold, seed))
+        for seed in range(threads)
+    ]
+    start = time.perf_counter()
+    read_thread.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    stop.set()
+    read_thread.join()
+    log.close()
+    count, lookups = reads[0]
+    counted = sum(table.get(key)["count"] for key in keys)
+    logged = sum(len(table.get(key)["log"]) for key in keys)
+    return {
+        "table": name,
+        "threads": threads,
+        "updates_per_second": threads * updates / seconds,
+        "snapshots_read": count,
+        "lookup_p99": lookups[len(lookups) * 99 // 100] if lookups else 0.0,
+        "lost_updates": threads * updates - min(counted, logged)
+    }
+
+
+def main():
+    """Runs the stress test for every table and number of threads.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", default="1,2,4,8",
+                        help="The numbers of writer threads, comma separated.")
+    parser.add_argument("--updates", type=int, default=200,
+                        help="The updates each thread does.")
+    parser.add_argument("--hold", default="0,0.001",
+                        help="Seconds an entry is held during an update, "
+                        "comma separated.")
+    args = parser.parse_args()
+    tables = [
+        ("Table, no locks", Table, unlocked),
+        ("ConcurrentTable, 1 lock", lambda: ConcurrentTable(stripes=1),
+         ConcurrentTable.locked),
+        ("ConcurrentTable, 64 locks", ConcurrentTable, ConcurrentTable.locked),
+    ]
+    print(f"{'table':>26} {'hold':>6} {'threads':>7} {'updates/s':>10} "
+          f"{'snapshots':>9} {'lookup p99 ms':>13} {'lost':>6}")
+    for hold in [float(hold) for hold in args.hold.split(',')]:
+        for name, make_table, lock in tables:
+            for threads in [int(threads) for threads in args.threads.split(',')]:
+                result = run(name, make_table(), lock, threads, args.updates,
+                             hold)
+                print(f"{name:>26} {hold:>6} {threads:>7} "
+                      f"{result['updates_per_second']:>10.0f} "
+                      f"{result['snapshots_read']:>9} "
+                      f"{result['lookup_p99']:>13.3f} "
+                      f"{result['lost_updates']:>6}")
+
+
+if __name__ == "__main__":
+    main()
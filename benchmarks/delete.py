@@ -0,0 +1,67 @@
+"""
+Times `ManageApp.delete_project` on databases with more and more people but
+the same number of projects, next to one pass of `Compactor` over the people,
+which is what cleaning up after a deletion costs without the relations.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from project_manage import ManageApp, Compactor
+from benchmarks.generate import build_tables, write_database
+
+
+def run(users, projects, deletes, seed):
+    """Deletes random projects from a generated database.
+
+    Returns:
+        dict: The milliseconds per deletion, the rows touched per deletion
+            and the milliseconds of a compaction pass.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_database("./database", build_tables(users, projects, seed))
+            app = ManageApp()
+            app.relations  # built up front, it's only built once
+            project_ids = random.Random(seed).sample(
+                list(app.projects_table.getData()), deletes)
+            touched = 0
+            start = time.perf_counter()
+            for project_id in project_ids:
+                touched += len(app.delete_project(project_id))
+            seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            Compactor(app).run()
+            scan = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return {
+        "users": users,
+        "delete_ms": seconds / deletes * 1000,
+        "rows_per_delete": touched / deletes,
+        "scan_ms": scan * 1000
+    }
+
+
+def main():
+    """Runs the benchmark and prints one line per number of people.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", default="10000,40000,160000",
+                        help="The numbers of people, comma separated.")
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--deletes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'users':>8} {'ms/delete':>10} {'rows/delete':>12} {'scan ms':>9}")
+    for users in [int(users) for users in args.users.split(',')]:
+        result = run(users, args.projects, args.deletes, args.seed)
+        print(f"{users:>8} {result['delete_ms']:>10.3f} "
+              f"{result['rows_per_delete']:>12.2f} {result['scan_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Generates synthetic data for the benchmarks.
+"""
+import csv
+import random
+from database import Database, Table
+from project_manage import Role, hash_password
+
+FIRST_NAMES = [
+    "Lionel", "Cristiano", "Manuel", "Robert", "Gareth", "Thibaut", "Eden",
+    "Thiago", "Sergio", "Paul", "Antoine", "Marco", "Toni", "Mats", "Hugo"
+]
+LAST_NAMES = [
+    "Messi", "Ronaldo", "Neuer", "Lewandowski", "Bale", "Courtois", "Hazard",
+    "Silva", "Ramos", "Pogba", "Griezmann", "Reus", "Kroos", "Hummels"
+]
+
+
+def person(idx, faculty_ratio=0.05):
+    """Makes up a person, every one of them gets a unique first name
+    so the usernames don't clash.
+
+    Args:
+        idx (int): The index of the person.
+        faculty_ratio (float, optional): The chance of being a faculty. Defaults to 0.05.
+
+    Returns:
+        dict: The person with the columns of both persons.csv and login.csv.
+    """
+    rng = random.Random(idx)
+    first = f"{rng.choice(FIRST_NAMES)}{idx}"
+    last = rng.choice(LAST_NAMES)
+    return {
+        "ID": str(1000000 + idx),
+        "first": first,
+        "last": last,
+        "type": "faculty" if rng.random() < faculty_ratio else "student",
+        "username": f"{first}.{last[0]}",
+        "password": str(rng.randrange(10000))
+    }
+
+
+def write_csvs(persons_path, login_path, rows, faculty_ratio=0.05):
+    """Writes a persons.csv and a login.csv in the same format as the real ones.
+
+    Args:
+        persons_path (str): Where to write persons.csv.
+        login_path (str): Where to write login.csv.
+        rows (int): The number of people.
+        faculty_ratio (float, optional): The chance of being a faculty. Defaults to 0.05.
+    """
+    with open(persons_path, "w", encoding="UTF-8", newline="") as persons, \
+            open(login_path, "w", encoding="UTF-8", newline="") as login:
+        persons_writer, login_writer = csv.writer(persons), csv.writer(login)
+        persons_writer.writerow(["ID", "first", "last", "type"])
+        login_writer.writerow(["ID", "username", "password", "role"])
+        for idx in range(rows):
+            row = person(idx, faculty_ratio)
+            persons_writer.writerow(
+                [row["ID"], row["first"], row["last"], row["type"]])
+            login_writer.writerow(
+                [row["ID"], row["username"], row["password"], row["type"]])
+
+
+def make_salt(rng):
+    """Makes a 4 character password salt.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The salt.
+    """
+    return ''.join(chr(0x20 + rng.randrange(95)) for _ in range(4))
+
+
+def build_tables(users, projects, seed=0, faculty_ratio=0.05):
+    """Makes up the raw tables of a database that has been used for a while.
+    Projects are spread over every stage, from waiting for an advisor to
+    evaluated, so every panel has something to list.
+
+    Args:
+        users (int): The number of people.
+        projects (int): The number of projects.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+        faculty_ratio (float, optional): The chance of being a faculty. Defaults to 0.05.
+
+    Returns:
+        dict: The raw dictionaries of the people, login, projects and documents tables.
+    """
+    rng = random.Random(seed)
+    people, login, usernames, students, faculty = {}, {}, {}, [], []
+    for idx in range(users):
+        row = person(idx, faculty_ratio)
+        people[row["ID"]] = {
+            "ID": row["ID"],
+            "first": row["first"],
+            "last": row["last"],
+            "type": row["type"]
+        }
+        login[row["username"]] = {
+            "id": row["ID"],
+            "username": row["username"],
+            "password": hash_password(row["password"], make_salt(rng)),
+            "role": Role.Faculty if row["type"] == "faculty" else Role.Member
+        }
+        usernames[row["ID"]] = row["username"]
+        (faculty if row["type"] == "faculty" else students).append(row["ID"])
+
+    def add(user_id, field, val):
+        people[user_id].setdefault(field, []).append(val)
+
+    project_table, evaluation_list = {}, []
+    for idx in range(projects):
+        project_id = f"{idx:032x}"
+        members = rng.sample(students, min(len(students), rng.randint(1, 4)))
+        lead, advisor = members[0], rng.choice(faculty)
+        project = {
+            "id": project_id,
+            "name": f"Project {idx}",
+            "desc": f"The description of project {idx}.",
+            "members": members,
+            "approved": False
+        }
+        project_table[project_id] = project
+        login[usernames[lead]]["role"] = Role.Lead
+        for member in members:
+            add(member, "projs", project_id)
+        for invited in rng.sample(students, min(len(students), 2)):
+            add(invited, "invs", project_id)
+        stage = rng.random()
+        if stage < 0.25:
+            add(advisor, "adv_reqs", project_id)
+            continue
+        project["advisor"] = advisor
+        login[usernames[advisor]]["role"] = Role.Advisor
+        add(advisor, "projs", project_id)
+        add(lead, "msgs", {"type": "adva", "author": advisor,
+                           "project": project_id})
+        if stage < 0.5:
+            add(advisor, "apr_reqs", project_id)
+            continue
+        project["approved"] = True
+        add(lead, "msgs", {"type": "apra", "author": advisor,
+                           "project": project_id})
+        if stage < 0.75:
+            evaluation_list.append(project_id)
+            add(rng.choice(faculty), "eval_projs", project_id)
+            continue
+        project["evaluated"] = True
+        project["report"] = f"The report of project {idx}. " * 20
+    return {
+        "people": people,
+        "login": login,
+        "projects": project_table,
+        "documents": {"evaluation list": evaluation_list}
+    }
+
+
+def write_database(path, tables):
+    """Writes raw tables to a database directory.
+
+    Args:
+        path (str): The database directory.
+        tables (dict): The raw tables, see `build_tables`.
+    """
+    database = Database(path)
+    for name, data in tables.items():
+        database.put(name, Table(data))
+    database.save()
@@ -0,0 +1,41 @@
+"""
+Times hashing the passwords of a synthetic login.csv with different numbers
+of worker processes.
+"""
+import argparse
+import tempfile
+import os
+import time
+from database import Table, CsvFile
+from project_manage import hash_logins
+from benchmarks.generate import write_csvs
+
+
+def main():
+    """Runs the benchmark and prints one line per number of workers.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        login = os.path.join(tmp, "login.csv")
+        write_csvs(os.path.join(tmp, "persons.csv"), login, args.rows)
+        print(f"{args.rows} users, {os.cpu_count()} cpus")
+        print(f"{'workers':>8} {'seconds':>10} {'users/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            table = Table()
+            table.fromCsvChunks("username", CsvFile(login))
+            start = time.perf_counter()
+            hash_logins(table, workers, args.batch)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{workers:>8} {seconds:>10.3f} {args.rows / seconds:>10.0f} "
+                  f"{baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
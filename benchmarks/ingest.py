@@ -0,0 +1,63 @@
+"""
+Compares `Table.fromCsv` with the chunked `Table.fromCsvChunks`.
+"""
+import argparse
+import tempfile
+import os
+import time
+import tracemalloc
+from database import Table, CsvFile
+from benchmarks.generate import write_csvs
+
+
+def measure(load):
+    """Measures the time and memory a csv import takes.
+
+    Args:
+        load (function): Imports the csv into the given table.
+
+    Returns:
+        tuple: The seconds it took, the memory held by the table afterwards
+            and the extra memory that was only needed during the import.
+    """
+    start = time.perf_counter()
+    load(Table())
+    seconds = time.perf_counter() - start
+    # tracing slows everything down, so memory is measured in a second run
+    table = Table()
+    tracemalloc.start()
+    load(table)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, kept, peak - kept
+
+
+def main():
+    """Runs the benchmark and prints one line per method and size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[10000, 100000, 500000])
+    parser.add_argument("--chunk", type=int, default=10000)
+    args = parser.parse_args()
+    print(f"{'rows':>8} {'method':>14} {'rows/s':>10} {'table MiB':>10} "
+          f"{'extra MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            persons = os.path.join(tmp, f"persons{rows}.csv")
+            write_csvs(persons, os.path.join(tmp, f"login{rows}.csv"), rows)
+            methods = {
+                "fromCsv":
+                lambda table: table.fromCsv("ID", CsvFile(persons)),
+                "fromCsvChunks":
+                lambda table: table.fromCsvChunks(
+                    "ID", CsvFile(persons), args.chunk, intern=("type", ))
+            }
+            for name, load in methods.items():
+                seconds, kept, extra = measure(load)
+                print(f"{rows:>8} {name:>14} {rows / seconds:>10.0f} "
+                      f"{kept / 2**20:>10.1f} {extra / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
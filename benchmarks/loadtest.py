@@ -0,0 +1,194 @@
+"""
+Load tests `server.py` with 1, 100 and 1000 sessions at once and prints
+the p50 and p99 latency of the requests as JSON.
+
+Without --port a server is started on a generated database and stopped
+afterwards, with --port the sessions log in as the generated users so
+that server must be serving a database made by `generate.build_tables`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from batch import percentile
+from benchmarks.generate import build_tables, write_database, person
+
+SERVER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+
+class Client:
+    """One session talking to the server.
+
+    Args:
+        reader (asyncio.StreamReader): The reader of the connection.
+        writer (asyncio.StreamWriter): The writer of the connection.
+        latencies (list): Where the latency of every request is put.
+    """
+    def __init__(self, reader, writer, latencies):
+        self.reader, self.writer, self.latencies = reader, writer, latencies
+        self.errors = 0
+
+    async def request(self, command):
+        """Sends a command and waits for the reply.
+
+        Args:
+            command (dict): The command.
+
+        Returns:
+            dict: The reply.
+        """
+        start = time.perf_counter()
+        self.writer.write(json.dumps(command).encode() + b'\n')
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - start)
+        if not reply["ok"]:
+            self.errors += 1
+        return reply
+
+
+async def session(host, port, user_idx, projects, requests, latencies, rng):
+    """Logs in as a generated user and looks around.
+
+    Args:
+        host (str): The server address.
+        port (int): The server port.
+        user_idx (int): The index of the generated user.
+        projects (int): The number of generated projects.
+        requests (int): The number of requests after logging in.
+        latencies (list): Where the latency of every request is put.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        int: The number of requests that failed.
+    """
+    client = Client(*await asyncio.open_connection(host, port), latencies)
+    user = person(user_idx)
+    await client.request({
+        "op": "login",
+        "username": user["username"],
+        "password": user["password"]
+    })
+    for _ in range(requests):
+        if rng.random() < 0.5:
+            await client.request({"op": "inbox"})
+        else:
+            await client.request({
+                "op": "project",
+                "project": f"{rng.randrange(projects):032x}"
+            })
+    client.writer.close()
+    await client.writer.wait_closed()
+    return client.errors
+
+
+async def run_level(host, port, sessions, users, projects, requests, seed):
+    """Runs a number of sessions at once.
+
+    Returns:
+        dict: The number of requests, errors, requests/sec, p50 and p99.
+    """
+    rng, latencies = random.Random(seed), []
+    start = time.perf_counter()
+    clients = [
+        session(host, port, rng.randrange(users), projects, requests,
+                latencies, random.Random(rng.random()))
+        for _ in range(sessions)
+    ]
+    errors = await asyncio.gather(*clients)
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000
+    }
+
+
+@contextmanager
+def spawned_server(users, projects, max_sessions):
+    """Starts a server on a generated database in a temporary directory.
+
+    Yields:
+        tuple: The host and the port of the server.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        write_database(os.path.join(tmp, "database"),
+                       build_tables(users, projects))
+        command = [
+            sys.executable, SERVER, "--port", "0", "--max-sessions",
+            str(max_sessions)
+        ]
+        with subprocess.Popen(command,
+                              cwd=tmp,
+                              stdout=subprocess.PIPE,
+                              text=True) as proc:
+            try:
+                host, port = proc.stdout.readline().split()[-1].rsplit(':', 1)
+                yield host, int(port)
+            finally:
+                proc.terminate()
+
+
+def main():
+    """Runs the load test and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="The port of a running server, one is started if not given.")
+    parser.add_argument(
+        "--sessions",
+        default="1,100,1000",
+        help="The numbers of sessions at once, comma separated.")
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=20,
+        help="The requests each session makes after logging in.")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results here.")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.sessions.split(',')]
+
+    def run_all(host, port):
+        results = []
+        for level in levels:
+            results.append(
+                asyncio.run(
+                    run_level(host, port, level, args.users, args.projects,
+                              args.requests, args.seed)))
+            print(f"{level:>6} sessions p50 {results[-1]['p50_ms']:>8.3f} ms"
+                  f" p99 {results[-1]['p99_ms']:>8.3f} ms",
+                  file=sys.stderr)
+        return results
+
+    if args.port is None:
+        with spawned_server(args.users, args.projects, max(levels)) as address:
+            results = run_all(*address)
+    else:
+        results = run_all(args.host, args.port)
+    output = json.dumps({"levels": results}, indent=2)
+    print(output)
+    if args.output is not None:
+        with open(args.output, "w", encoding="UTF-8") as file:
+            file.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures the memory taken by the people, login and projects tables when
+their rows are dictionaries and when they are records.
+
+Every table is loaded from a pickle like `Database.load` does, once as it was
+saved before records and once after migrating it, and the memory held by the
+loaded rows is measured with tracemalloc.
+"""
+import argparse
+import gc
+import pickle
+import tracemalloc
+from records import Person, Login, Project
+from benchmarks.generate import build_tables
+
+
+def loaded_size(data):
+    """Measures the memory held by a table loaded from a pickle.
+
+    Args:
+        data (dict): The entries of the table.
+
+    Returns:
+        int: The number of bytes.
+    """
+    dumped = pickle.dumps(data)
+    gc.collect()
+    tracemalloc.start()
+    loaded = pickle.loads(dumped)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    return size
+
+
+def main():
+    """Runs the benchmark and prints one line per table.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=8000)
+    args = parser.parse_args()
+    tables = build_tables(args.users, args.projects)
+    print(f"{args.users} users, {args.projects} projects")
+    print(f"{'table':>9} {'rows':>7} {'dict B/row':>11} {'record B/row':>13} "
+          f"{'saved MB/1M rows':>17} {'saved':>6}")
+    for name, record in (("people", Person), ("login", Login),
+                         ("projects", Project)):
+        rows = tables[name]
+        as_dicts = loaded_size(rows)
+        as_records = loaded_size(
+            {key: record.migrate(val)
+             for key, val in rows.items()})
+        per_dict, per_record = as_dicts / len(rows), as_records / len(rows)
+        print(f"{name:>9} {len(rows):>7} {per_dict:>11.0f} {per_record:>13.0f} "
+              f"{(per_dict - per_record):>17.0f} "
+              f"{1 - as_records / as_dicts:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Times listing a large evaluation list with `AdminPanel.assign_eval`, which
+renders the info of every project in it.
+
+The listing is timed with the info cache turned off, with a cold cache,
+with a warm cache and with a warm cache after a share of the projects and
+the people in them changed, so the cost of invalidating is included.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from project_manage import ManageApp, AdminPanel
+from benchmarks.generate import build_tables, write_database
+from benchmarks.suite import scripted
+
+
+def list_evaluations(app, repeat):
+    """Lists the evaluation list `repeat` times, then leaves without assigning.
+
+    Args:
+        app (ManageApp): The manage app.
+        repeat (int): How many times to list it.
+
+    Returns:
+        float: The seconds per listing.
+    """
+    admin = AdminPanel(app, None, None)
+    with scripted(["leave"] * repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            admin.assign_eval()
+        return (time.perf_counter() - start) / repeat
+
+
+def churn(app, project_ids, rng, share):
+    """Renames a share of the projects and of their leads.
+
+    Args:
+        app (ManageApp): The manage app.
+        project_ids (list): The project ids.
+        rng (random.Random): The random number generator.
+        share (float): The share of the projects to change.
+    """
+    for project_id in rng.sample(project_ids, int(len(project_ids) * share)):
+        project_view = app.get_project_view(project_id)
+        project_view.name = f"{project_view.name}!"
+        lead = app.people_table.get(project_view.lead_id)
+        lead.last = f"{lead.last}!"
+        app.people_table.touch(project_view.lead_id)
+
+
+def main():
+    """Runs the benchmark and prints one line per case.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--churn", type=float, default=0.01,
+                        help="The share of the projects changed between listings.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng, cwd = random.Random(args.seed), os.getcwd()
+    tables = build_tables(args.users, args.projects, args.seed)
+    tables["documents"]["evaluation list"] = list(tables["projects"])
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_database("./database", tables)
+            app = ManageApp()
+            project_ids = app.documents_table.get("evaluation list")
+            print(f"{len(project_ids)} projects in the evaluation list",
+                  file=sys.stderr)
+            app.info_cache.size = 0
+            uncached = list_evaluations(app, args.repeat)
+            app.info_cache.size = len(project_ids)
+            cold = list_evaluations(app, 1)
+            warm = list_evaluations(app, args.repeat)
+            churned = 0
+            for _ in range(args.repeat):
+                churn(app, project_ids, rng, args.churn)
+                churned += list_evaluations(app, 1) / args.repeat
+        finally:
+            os.chdir(cwd)
+    print(f"{'case':>24} {'ms/listing':>11} {'speedup':>8}")
+    for name, seconds in (("no cache", uncached), ("cold cache", cold),
+                          ("warm cache", warm),
+                          (f"warm, {args.churn:.0%} changed", churned)):
+        print(f"{name:>24} {seconds * 1000:>11.1f} {uncached / seconds:>8.2f}")
+    print(f"info cache: {app.info_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
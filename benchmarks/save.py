@@ -0,0 +1,75 @@
+"""
+Measures how long `Database.save` takes depending on how much changed.
+"""
+import argparse
+import tempfile
+import os
+import time
+from database import Database
+
+
+def fill(database, rows):
+    """Fills a database with a big people table and a small documents table.
+
+    Args:
+        database (Database): The database to fill.
+        rows (int): The number of people.
+    """
+    people = database.add_table("people")
+    for i in range(rows):
+        people.put(str(i), {
+            "ID": str(i),
+            "first": f"First{i}",
+            "last": f"Last{i}",
+            "type": "student",
+            "projs": []
+        })
+    database.add_table("documents").put("evaluation list", [])
+
+
+def time_save(database):
+    """Times a single save.
+
+    Args:
+        database (Database): The database to save.
+
+    Returns:
+        float: The time it took in seconds.
+    """
+    start = time.perf_counter()
+    database.save()
+    return time.perf_counter() - start
+
+
+def main():
+    """Runs the benchmark and prints one line per measurement.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[10000, 100000, 500000])
+    parser.add_argument("--changes", type=int, nargs="+",
+                        default=[1, 100, 10000])
+    args = parser.parse_args()
+    print(f"{'rows':>8} {'changed':>22} {'seconds':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            database = Database(os.path.join(tmp, f"db{rows}"))
+            fill(database, rows)
+            print(f"{rows:>8} {'everything (first save)':>22} "
+                  f"{time_save(database):>10.4f}")
+            print(f"{rows:>8} {'nothing':>22} {time_save(database):>10.4f}")
+            documents = database.get("documents")
+            documents.get("evaluation list").append("project")
+            documents.touch("evaluation list")
+            print(f"{rows:>8} {'1 document':>22} {time_save(database):>10.4f}")
+            people = database.get("people")
+            for changes in args.changes:
+                for i in range(min(changes, rows)):
+                    people.get(str(i))["projs"].append("project")
+                    people.touch(str(i))
+                print(f"{rows:>8} {f'{changes} people':>22} "
+                      f"{time_save(database):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
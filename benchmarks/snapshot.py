@@ -0,0 +1,123 @@
+"""
+Compares the per-table pickles of a database directory with the single file
+`Snapshot`: how long saving takes, how big the files are, how long an eager
+load takes and how long a lazy load and reading one person take.
+
+The rows are records like the manage app keeps them, so the reports of the
+evaluated projects are written out of band. Before every load the files are
+dropped from the page cache where the OS allows it, to get close to a cold start.
+"""
+import argparse
+import gc
+import os
+import statistics
+import tempfile
+import time
+from database import Database, Table
+from records import Person, Login, Project
+from benchmarks.generate import build_tables
+
+RECORDS = {"people": Person, "login": Login, "projects": Project}
+
+
+def drop_cache(paths):
+    """Asks the OS to drop files from the page cache.
+
+    Args:
+        paths (list): The paths to the files.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        with open(path, "rb") as file:
+            os.fsync(file.fileno())
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def files(path, single_file):
+    """The files of a database.
+
+    Args:
+        path (str): The database directory.
+        single_file (bool): Whether it's a snapshot.
+
+    Returns:
+        list: The paths to the files.
+    """
+    if single_file:
+        return [f"{path}.snap"]
+    return [os.path.join(path, name) for name in os.listdir(path)]
+
+
+def run(path, tables, single_file, repeat):
+    """Saves a database and loads it back.
+
+    Args:
+        path (str): The database directory.
+        tables (dict): The entries of each table.
+        single_file (bool): Whether to use a snapshot.
+        repeat (int): How many times to load it.
+
+    Returns:
+        dict: The seconds to save, the bytes written, the median seconds to
+            load eagerly and to load lazily and read one person.
+    """
+    database = Database(path, single_file=single_file)
+    for name, data in tables.items():
+        database.put(name, Table(data))
+    gc.collect()
+    start = time.perf_counter()
+    database.checkpoint()
+    result = {"save": time.perf_counter() - start}
+    paths = files(path, single_file)
+    result["bytes"] = sum(os.path.getsize(file_path) for file_path in paths)
+    person_id = next(iter(tables["people"]))
+    eager, lazy = [], []
+    for _ in range(repeat):
+        drop_cache(paths)
+        gc.collect()
+        start = time.perf_counter()
+        Database(path, single_file=single_file).load()
+        eager.append(time.perf_counter() - start)
+        drop_cache(paths)
+        gc.collect()
+        start = time.perf_counter()
+        database = Database(path, lazy=True, single_file=single_file)
+        database.load()
+        database.get("people").get(person_id)
+        lazy.append(time.perf_counter() - start)
+        del database
+    result["eager"], result["lazy"] = statistics.median(eager), statistics.median(lazy)
+    return result
+
+
+def main():
+    """Runs the benchmark and prints one line per format and size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", default="20000,100000",
+                        help="The numbers of people, comma separated.")
+    parser.add_argument("--projects-per-user", type=float, default=0.4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'users':>7} {'format':>10} {'save s':>8} {'MB':>7} "
+          f"{'eager load s':>13} {'lazy load+get s':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for users in [int(users) for users in args.users.split(',')]:
+            tables = build_tables(users, int(users * args.projects_per_user))
+            for name, record in RECORDS.items():
+                tables[name] = {
+                    key: record.migrate(val)
+                    for key, val in tables[name].items()
+                }
+            for single_file in (False, True):
+                result = run(os.path.join(tmp, f"db{users}{single_file}"),
+                             tables, single_file, args.repeat)
+                print(f"{users:>7} "
+                      f"{'snapshot' if single_file else 'per-table':>10} "
+                      f"{result['save']:>8.3f} {result['bytes'] / 1e6:>7.1f} "
+                      f"{result['eager']:>13.3f} {result['lazy']:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compares the pickled `Database` with `SqliteDatabase` on a people table of
+10k, 100k and 1M rows: filling and saving it, opening it and reading one
+person, random reads, random updates that are touched and saved, the size
+on disk and the memory held by Python after opening it and reading.
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from database import Database, SqliteDatabase
+from benchmarks.save import fill
+
+
+def open_database(backend, path):
+    """Opens a database.
+
+    Args:
+        backend (str): "pickle" or "sqlite".
+        path (str): The database directory.
+
+    Returns:
+        Database: The database.
+    """
+    if backend == "sqlite":
+        database = SqliteDatabase(path)
+    else:
+        database = Database(path, lazy=True, journal=True)
+    database.load()
+    return database
+
+
+def disk_size(backend, path):
+    """The bytes a database takes on the disk.
+
+    Args:
+        backend (str): "pickle" or "sqlite".
+        path (str): The database directory.
+
+    Returns:
+        int: The number of bytes.
+    """
+    if backend == "sqlite":
+        return sum(
+            os.path.getsize(f"{path}.sqlite{suffix}")
+            for suffix in ("", "-wal") if os.path.isfile(f"{path}.sqlite{suffix}"))
+    return sum(
+        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def run(backend, path, rows, ops, seed):
+    """Fills a database, then opens it again and reads and updates it.
+
+    Returns:
+        dict: The seconds of each step and the bytes on the disk and in memory.
+    """
+    rng = random.Random(seed)
+    keys = [str(rng.randrange(rows)) for _ in range(ops)]
+    result = {}
+    database = SqliteDatabase(path) if backend == "sqlite" else Database(path)
+    gc.collect()
+    start = time.perf_counter()
+    fill(database, rows)
+    database.save()
+    result["fill"] = time.perf_counter() - start
+    if backend == "sqlite":
+        database.close()
+    del database
+    gc.collect()
+    start = time.perf_counter()
+    database = open_database(backend, path)
+    people = database.get("people")
+    people.get("0")
+    result["open"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys:
+        people.get(key)
+    result["reads"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys:
+        people.get(key)["projs"].append("x")
+        people.touch(key)
+    database.save()
+    result["updates"] = time.perf_counter() - start
+    if backend == "sqlite":
+        database.close()
+    else:
+        database.checkpoint()
+        database.journal.close()
+    result["disk"] = disk_size(backend, path)
+    del database, people
+    gc.collect()
+    tracemalloc.start()
+    database = open_database(backend, path)
+    for key in keys:
+        database.get("people").get(key)
+    result["memory"] = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    if backend == "sqlite":
+        database.close()
+    return result
+
+
+def main():
+    """Runs the benchmark and prints one line per backend and size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="10000,100000,1000000",
+                        help="The numbers of rows, comma separated.")
+    parser.add_argument("--ops", type=int, default=10000,
+                        help="The number of random reads and of updates.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'rows':>8} {'backend':>7} {'fill s':>7} {'open s':>7} "
+          f"{'reads/s':>9} {'updates/s':>10} {'disk MB':>8} {'memory MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(rows) for rows in args.rows.split(',')]:
+            for backend in ("pickle", "sqlite"):
+                result = run(backend, os.path.join(tmp, f"{backend}{rows}"),
+                             rows, args.ops, args.seed)
+                print(f"{rows:>8} {backend:>7} {result['fill']:>7.2f} "
+                      f"{result['open']:>7.3f} "
+                      f"{args.ops / result['reads']:>9.0f} "
+                      f"{args.ops / result['updates']:>10.0f} "
+                      f"{result['disk'] / 1e6:>8.1f} "
+                      f"{result['memory'] / 1e6:>10.1f}",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures how long `Database.load` takes with and without lazy loading
+as the tables get bigger.
+"""
+import argparse
+import tempfile
+import os
+import time
+from database import Database
+from benchmarks.save import fill
+
+
+def time_load(path, lazy):
+    """Times loading a database and reading one person from it.
+
+    Args:
+        path (str): The database directory.
+        lazy (bool): Whether to load lazily.
+
+    Returns:
+        tuple: The seconds it took to load and to read the first person.
+    """
+    start = time.perf_counter()
+    database = Database(path, lazy=lazy)
+    database.load()
+    loaded = time.perf_counter()
+    database.get("people").get("0")
+    return loaded - start, time.perf_counter() - loaded
+
+
+def main():
+    """Runs the benchmark and prints one line per database size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[1000, 100000, 500000])
+    parser.add_argument("--tables", type=int, default=4)
+    args = parser.parse_args()
+    print(f"{'rows':>8} {'eager load':>11} {'lazy load':>10} "
+          f"{'first get':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"db{rows}")
+            database = Database(path)
+            fill(database, rows)
+            for i in range(args.tables - 2):
+                database.put(f"copy{i}", database.get("people"))
+            database.save()
+            eager, _ = time_load(path, False)
+            lazy, first_get = time_load(path, True)
+            print(f"{rows:>8} {eager:>11.4f} {lazy:>10.4f} {first_get:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
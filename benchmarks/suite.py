@@ -0,0 +1,228 @@
+"""
+Times the core operations of the app on generated data and prints the
+results as JSON, so runs of different versions can be compared.
+"""
+import argparse
+import builtins
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from database import Database
+from project_manage import (ManageApp, FacultyPanel, MemberPanel, LeadPanel,
+                            AdminPanel, ProjectView, Role)
+from benchmarks.generate import build_tables, write_database, write_csvs, person
+
+
+@contextmanager
+def scripted(answers):
+    """Feeds `input` from a list of answers and throws away what gets printed.
+
+    Args:
+        answers (list): The answers, in order.
+    """
+    answers, real_input = iter(answers), builtins.input
+    builtins.input = lambda prompt="": next(answers)
+    try:
+        with open(os.devnull, "w", encoding="UTF-8") as devnull, \
+                redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input = real_input
+
+
+class Suite:
+    """Collects the timings of the benchmarks.
+    """
+    def __init__(self):
+        self.results = []
+
+    def time(self, name, func, ops=1):
+        """Times a function and records the result.
+
+        Args:
+            name (str): The name of the benchmark.
+            func (function): Does `ops` operations.
+            ops (int, optional): The number of operations func does. Defaults to 1.
+
+        Returns:
+            anytype: What func returned.
+        """
+        start = time.perf_counter()
+        ret = func()
+        seconds = time.perf_counter() - start
+        self.results.append({
+            "name": name,
+            "ops": ops,
+            "seconds": seconds,
+            "ops_per_second": ops / seconds if seconds else None
+        })
+        print(f"{name:>28} {ops:>8} ops {seconds:>10.4f} s", file=sys.stderr)
+        return ret
+
+
+def busiest(people, field):
+    """Finds the person with the longest list in a field.
+
+    Args:
+        people (dict): The raw people table.
+        field (str): The field, e.g. "adv_reqs".
+
+    Returns:
+        str: The person id.
+    """
+    return max(people, key=lambda key: len(people[key].get(field) or ()))
+
+
+def run_panel(app, panel, user_id, method, answers, repeat):
+    """Shows one listing of a panel `repeat` times.
+
+    Args:
+        app (ManageApp): The manage app.
+        panel (class): The panel class.
+        user_id (str): The id of the user that is logged in.
+        method (str): The name of the listing method.
+        answers (list): The answers to the prompts of one listing.
+        repeat (int): How many times to run it.
+    """
+    user_data = app.people_table.get(user_id)
+    panel = panel(app, user_data, app.get_login_from_data(user_data))
+    with scripted(answers * repeat):
+        for _ in range(repeat):
+            getattr(panel, method)()
+
+
+def bench_bootstrap(suite, tmp, users):
+    """Times the first run, importing the CSVs and hashing the passwords.
+    """
+    os.chdir(os.path.join(tmp, "bootstrap"))
+    write_csvs("./persons.csv", "./login.csv", users)
+    suite.time("bootstrap", ManageApp, users)
+
+
+def bench_storage(suite, tmp, tables):
+    """Times loading and saving the generated database.
+    """
+    os.chdir(os.path.join(tmp, "app"))
+    write_database("./database", tables)
+    suite.time("Database.load", lambda: Database().load())
+    database = Database(lazy=True)
+    suite.time("Database.load lazy", database.load)
+    suite.time("LazyTable.materialize",
+               lambda: [table.getData() for table in
+                        database.getData().values()],
+               len(tables))
+    loaded, copy = Database(), Database("./copy")
+    loaded.load()
+    for name, table in loaded.getData().items():
+        copy.put(name, table)
+    suite.time("Database.save everything", copy.save)
+    database.get("documents").touch("evaluation list")
+    suite.time("Database.save one table", database.save)
+
+
+def bench_app(suite, app, users, projects, repeat, rng):
+    """Times the operations of the app.
+    """
+    people = app.people_table.getData()
+    logins = [person(rng.randrange(users)) for _ in range(repeat)]
+    answers = [val for row in logins for val in (row["username"], row["password"])]
+
+    def login_all():
+        with scripted(answers):
+            return [app.login() for _ in logins]
+
+    assert all(suite.time("ManageApp.login", login_all, repeat))
+    suite.time("find_user username",
+               lambda: [app.find_user(row["username"]) for row in logins],
+               repeat)
+    suite.time("find_user id",
+               lambda: [app.find_user(row["ID"]) for row in logins], repeat)
+    project_views = [ProjectView(project)
+                     for project in app.projects_table.getData().values()]
+    suite.time("get_info_string",
+               lambda: [view.get_info_string(app) for view in project_views],
+               projects)
+    panels = [
+        (FacultyPanel, "adv_reqs", "view_requests", ["exit"]),
+        (FacultyPanel, "apr_reqs", "view_projs_aprv", ["exit"]),
+        (FacultyPanel, "eval_projs", "view_eval", ["exit"]),
+        (MemberPanel, "invs", "view_invitations", ["exit"]),
+        (LeadPanel, "msgs", "view_responses", ["1"]),
+    ]
+    for panel, field, method, listing_answers in panels:
+        user_id = busiest(people, field)
+        suite.time(f"{panel.__name__}.{method}",
+                   lambda: run_panel(app, panel, user_id, method,
+                                     listing_answers, repeat),
+                   repeat)
+    faculty = [
+        entry["username"] for role in (Role.Faculty, Role.Advisor)
+        for entry in app.get_logins_with_role(role)
+    ]
+    admin = AdminPanel(app, None, None)
+
+    def assign_all():
+        with scripted([val for _ in range(repeat)
+                       for val in ("0", rng.choice(faculty))]):
+            for _ in range(repeat):
+                admin.assign_eval()
+
+    suite.time("AdminPanel.assign_eval", assign_all, repeat)
+    queued = len(app.documents_table.get("evaluation list") or ())
+    suite.time("assign_evaluation_list", lambda: app.assign_evaluation_list(2),
+               queued)
+
+
+def main():
+    """Runs every benchmark and prints the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=100,
+                        help="The number of times each operation is repeated.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON here instead of stdout.")
+    args = parser.parse_args()
+    suite, rng, cwd = Suite(), random.Random(args.seed), os.getcwd()
+    tables = build_tables(args.users, args.projects, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "bootstrap"))
+        os.makedirs(os.path.join(tmp, "app"))
+        try:
+            bench_bootstrap(suite, tmp, args.users)
+            bench_storage(suite, tmp, tables)
+            os.chdir(os.path.join(tmp, "app"))
+            app = suite.time("ManageApp open", ManageApp)
+            bench_app(suite, app, args.users, args.projects, args.repeat, rng)
+        finally:
+            os.chdir(cwd)
+    report = {
+        "meta": {
+            "users": args.users,
+            "projects": args.projects,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "name_cache": app.name_cache.stats(),
+            "summary_cache": app.summary_cache.stats(),
+            "info_cache": app.info_cache.stats()
+        },
+        "results": suite.results
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+        return
+    with open(args.output, "w", encoding="UTF-8") as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
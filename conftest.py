@@ -0,0 +1,69 @@
+"""
+Fixtures shared by the tests.
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """\
+import json
+import os
+import sys
+sys.path.insert(0, {root!r})
+
+
+def crash(result=None):
+    print(json.dumps(result), flush=True)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+{body}
+"""
+
+
+@pytest.fixture
+def crash_child(tmp_path):
+    """Runs a script in a new Python process in the temporary directory,
+    the script ends with `crash(result)`, which prints the result and
+    exits without running any cleanup, like a crash would.
+
+    Returns:
+        function: Runs the body of a script and returns its result.
+    """
+
+    def run(body, timeout=120):
+        path = tmp_path / "child.py"
+        path.write_text(
+            CHILD.format(root=ROOT,
+                         body=textwrap.indent(textwrap.dedent(body), "    ")))
+        done = subprocess.run([sys.executable, str(path)],
+                              cwd=tmp_path,
+                              capture_output=True,
+                              text=True,
+                              timeout=timeout,
+                              check=False)
+        assert done.returncode == 0, done.stderr
+        return json.loads(done.stdout.splitlines()[-1])
+
+    return run
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """A temporary directory with persons.csv and login.csv to run the
+    manage app in, it becomes the working directory.
+
+    Returns:
+        pathlib.Path: The directory.
+    """
+    for name in ("persons.csv", "login.csv"):
+        with open(os.path.join(ROOT, name), encoding="utf-8") as file:
+            (tmp_path / name).write_text(file.read(), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -1,7 +1,78 @@
 import io
 import os
+import gc
+import sys
+import time
 import pickle
+import shutil
 import csv
+import json
+import mmap
+import sqlite3
+import struct
+import threading
+import multiprocessing
+import bisect
+import heapq
+import zlib
+from itertools import islice
+from contextlib import contextmanager, nullcontext
+from collections import OrderedDict, deque
+
+
+@contextmanager
+def paused_gc():
+    """Pauses the garbage collector, creating lots of rows at once
+    would otherwise trigger it over and over.
+    """
+    enabled = gc.isenabled();
+    gc.disable();
+    try:
+        yield;
+    finally:
+        if enabled:
+            gc.enable();
+
+def read_table(path, table_type=None):
+    """Reads a table from a file.
+
+    Args:
+        path (str): The path to the file.
+        table_type (class, optional): The class of the table, Table if None.
+            Defaults to None.
+
+    Returns:
+        Table: The table.
+    """
+    with paused_gc(), open(path, "rb") as file:
+        return (table_type or Table)(pickle.load(file));
+
+def apply_changes(val, changes):
+    """Makes the changes given to `Table.touch` to a value, e.g. when the
+    journal is replayed. Each change is a tuple of what to do, the field and
+    an argument, the field is None for the value itself:
+    ("set", field, new value) sets a field,
+    ("add", field, item) appends an item to a list if it isn't in it yet and
+    ("remove", field, item) removes an item from a list if it's in it.
+    Making the same changes twice gives the same value.
+
+    Args:
+        val (anytype): The value, it's changed in place.
+        changes (list): The changes.
+    """
+    for op, field, arg in changes:
+        if op == "set":
+            val[field] = arg;
+            continue;
+        items = val if field is None else val.get(field);
+        if op == "add":
+            if items is None:
+                val[field] = items = [];
+            if arg not in items:
+                items.append(arg);
+        elif items is not None and arg in items:
+            items.remove(arg);
+
 class CsvFile:
     """Csv file reader class.
     """
@@ -14,16 +85,188 @@ class CsvFile:
             callback (function): The callback that gets called for every entry.
         """
         with open(self.path, "r", encoding="UTF-8") as file:
-            rows = csv.DictReader(file)
+            rows = csv.DictReader(file);
             for row in rows:
                 callback(dict(row));
+    def readChunks(self, size=10000, types=None, intern=()):
+        """Read the csv file a chunk of rows at a time,
+        only one chunk is held in memory at once.
+
+        Args:
+            size (int, optional): The number of rows per chunk. Defaults to 10000.
+            types (dict, optional): Maps a column name to a function that
+                converts the text of that column, e.g. {"age": int}. Defaults to None.
+            intern (tuple, optional): The names of the columns with lots of
+                repeated values, those values are interned so they are only
+                stored once. Defaults to ().
+
+        Yields:
+            list: The rows of the chunk as dictionaries.
+        """
+        with open(self.path, "r", encoding="UTF-8", newline="") as file:
+            rows = csv.reader(file);
+            header = [sys.intern(name) for name in next(rows, [])];
+            shared = [i for i, name in enumerate(header) if name in intern];
+            convert = [(i, types[name]) for i, name in enumerate(header)
+                       if types is not None and name in types];
+            while True:
+                chunk = list(islice(rows, size));
+                if not chunk:
+                    return;
+                for row in chunk:
+                    for i in shared:
+                        row[i] = sys.intern(row[i]);
+                    for i, func in convert:
+                        row[i] = func(row[i]);
+                yield [dict(zip(header, row)) for row in chunk];
 
     
+class Index:
+    """A secondary index of a table, it maps what `key_fn` returns
+    for a value to the keys of the entries with that value.
+
+    Args:
+        key_fn (function): Gets the index key from a value,
+            values it returns None for are left out.
+        unique (bool, optional): Whether an index key may only belong
+            to one entry. Defaults to False.
+    """
+    def __init__(self, key_fn, unique=False):
+        self.key_fn, self.unique = key_fn, unique;
+        self.entries, self.keys = {}, {};
+    def check(self, key, val):
+        """Makes sure putting a value wouldn't break the uniqueness.
+
+        Args:
+            key (anytype): The key of the entry.
+            val (anytype): The new value.
+
+        Raises:
+            ValueError: If the index key already belongs to another entry.
+        """
+        if not self.unique:
+            return;
+        index_key = self.key_fn(val);
+        owner = self.entries.get(index_key, key);
+        if index_key is not None and owner != key:
+            raise ValueError(f"{index_key!r} already belongs to {owner!r}");
+    def add(self, key, val):
+        """Adds an entry to the index.
+
+        Args:
+            key (anytype): The key of the entry.
+            val (anytype): The value of the entry.
+        """
+        index_key = self.key_fn(val);
+        if index_key is None:
+            return;
+        if self.unique:
+            self.check(key, val);
+            self.entries[index_key] = key;
+        else:
+            self.entries.setdefault(index_key, {})[key] = None;
+        self.keys[key] = index_key;
+    def remove(self, key):
+        """Removes an entry from the index.
+
+        Args:
+            key (anytype): The key of the entry.
+        """
+        if key not in self.keys:
+            return;
+        index_key = self.keys.pop(key);
+        if self.unique:
+            del self.entries[index_key];
+            return;
+        bucket = self.entries[index_key];
+        del bucket[key];
+        if not bucket:
+            del self.entries[index_key];
+    def find(self, index_key):
+        """Gets the keys of the entries with an index key.
+
+        Args:
+            index_key (anytype): The index key.
+
+        Returns:
+            list: The keys in the order they were added.
+        """
+        if self.unique:
+            return [self.entries[index_key]] if index_key in self.entries else [];
+        return list(self.entries.get(index_key, ()));
+    def rebuild(self, data):
+        """Rebuilds the index from scratch.
+
+        Args:
+            data (dict): The raw dictionary of the table.
+        """
+        self.entries, self.keys = {}, {};
+        for key, val in data.items():
+            self.add(key, val);
+
 class Table:
     """The table class containg key and value pairs.
+
+    The generation counter goes up every time the table changes,
+    so it can be compared to know whether a table needs to be saved again.
+    `unnotified` is the generation of the last change the listeners weren't
+    told about, e.g. by `fromCsv` or `convert`.
     """
     def __init__(self, dat=None):
         self.__data = {} if dat is None else dat;
+        self.__listeners, self.__indexes = [], {};
+        self.__converter = None;
+        self.__writing = nullcontext();
+        self.generation, self.unnotified = 0, 0;
+    def listen(self, callback, changes=False):
+        """Registers a callback that gets called whenever an entry changes.
+
+        Args:
+            callback (function): The callback that gets called with the action
+                ("put", "delete" or "touch"), the key and the new value.
+            changes (bool, optional): Whether the callback also gets the
+                changes a touch was given, see `touch`. Defaults to False.
+        """
+        self.__listeners.append((callback, changes));
+    def hold(self, lock):
+        """Makes every write hold a lock from before it changes the table
+        until its listeners were told, e.g. the lock of a database that
+        journals the changes, so a checkpoint never sees a change that
+        isn't in the journal yet.
+
+        Args:
+            lock (threading.RLock): The lock, the listeners may take it again.
+        """
+        self.__writing = lock;
+    def writing(self):
+        """What a write holds from before it changes the table until its
+        listeners were told, see `hold`. Nothing unless a lock was given.
+
+        Returns:
+            contextmanager: The context to hold.
+        """
+        return self.__writing;
+    def indexing(self):
+        """What a write holds while it changes the entry, the indexes and
+        the generation counter, the listeners are called after it's let go.
+        Nothing in a plain table.
+
+        Returns:
+            contextmanager: The context to hold.
+        """
+        return nullcontext();
+    def __index(self, action, key, val):
+        self.generation += 1;
+        for index in self.__indexes.values():
+            index.remove(key);
+            if action != "delete":
+                index.add(key, val);
+    def __notify(self, action, key, val, changes=None):
+        for listener, with_changes in self.__listeners:
+            if with_changes:
+                listener(action, key, val, changes);
+            else:
+                listener(action, key, val);
     def getData(self):
         """Gets the raw dictionary.
 
@@ -31,6 +274,72 @@ class Table:
             dict: The raw dictionary.
         """
         return self.__data;
+    def snapshot(self):
+        """Gets a copy of the raw dictionary, the values aren't copied.
+        Meant for readers that go through every entry while it may change.
+
+        Returns:
+            dict: The copy.
+        """
+        return self.__data.copy();
+    def items(self, prefix=None):
+        """Goes through the entries without copying anything,
+        the table shouldn't change until it's done.
+
+        Args:
+            prefix (str, optional): Only the keys starting with it, every key if None.
+                Defaults to None.
+
+        Yields:
+            tuple: The key and the value of each entry.
+        """
+        for key, val in self.__data.items():
+            if prefix is None or (isinstance(key, str) and key.startswith(prefix)):
+                yield key, val;
+    def page(self, limit, after=None, prefix=None):
+        """Gets a page of entries in the order of their keys, without
+        sorting every key or keeping anything. Pass the last key of a page
+        as `after` to get the next one, or take a `listing` to go through
+        many pages.
+
+        Args:
+            limit (int): The most entries in the page.
+            after (anytype, optional): Only the keys after it, from the
+                first key if None. Defaults to None.
+            prefix (str, optional): Only the keys starting with it. Defaults to None.
+
+        Returns:
+            list: The keys and values of the entries.
+        """
+        data = self.snapshot();
+        keys = heapq.nsmallest(max(limit, 0), (
+            key for key in data if (after is None or key > after) and (
+                prefix is None or (isinstance(key, str) and key.startswith(prefix)))));
+        return [(key, data[key]) for key in keys];
+    def listing(self, prefix=None):
+        """Takes the keys in order to page through them, see `Listing`.
+
+        Args:
+            prefix (str, optional): Only the keys starting with it, every key if None.
+                Defaults to None.
+
+        Returns:
+            Listing: The listing.
+        """
+        return Listing(self, prefix);
+    def count(self, prefix=None):
+        """Counts the entries.
+
+        Args:
+            prefix (str, optional): Only the keys starting with it, every key if None.
+                Defaults to None.
+
+        Returns:
+            int: The number of entries.
+        """
+        if prefix is None:
+            return len(self.__data);
+        return sum(1 for _ in self.items(prefix));
     def get(self, key, default=None):
         """Gets the value of an entry using a key.
 
@@ -48,15 +357,45 @@ class Table:
         Args:
             key (anytype): The key.
             val (anytype): The new value.
+
+        Raises:
+            ValueError: If the value breaks a unique index.
         """
-        self.__data[key] = val;
+        if self.__converter is not None:
+            val = self.__converter(val);
+        with self.__writing:
+            with self.indexing():
+                for index in self.__indexes.values():
+                    index.check(key, val);
+                self.__data[key] = val;
+                self.__index("put", key, val);
+            self.__notify("put", key, val);
     def delete(self, key):
         """Deletes an entry using a key.
 
         Args:
             key (anytype): The key.
         """
-        del self.__data[key];
+        with self.__writing:
+            with self.indexing():
+                del self.__data[key];
+                self.__index("delete", key, None);
+            self.__notify("delete", key, None);
+    def touch(self, key, changes=None):
+        """Tells the table that the value of an entry was modified in place,
+        e.g. a list inside of it was appended to.
+
+        Args:
+            key (anytype): The key.
+            changes (list, optional): What was changed, see `apply_changes`,
+                so the journal only has to keep that instead of the whole
+                value. Defaults to None, the whole value may have changed.
+        """
+        with self.__writing:
+            val = self.__data.get(key);
+            with self.indexing():
+                self.__index("touch", key, val);
+            self.__notify("touch", key, val, changes);
     def fromCsv(self, key, csvFile):
         """Read from a Csv file using the CsvFile class
 
@@ -64,7 +403,111 @@ class Table:
             key (str): The key of the value in the csv that is used for the table key.
             csvFile (CsvFile): The CsvFile object
         """
-        csvFile.read(lambda val: self.__data.update({val[key]: val}));
+        with self.__writing:
+            csvFile.read(lambda val: self.__data.update({val[key]: val}));
+            self.__reindex();
+    def fromCsvChunks(self, key, csvFile, size=10000, types=None, intern=()):
+        """Read from a Csv file a chunk at a time and insert each chunk at once,
+        meant for big files. Like `fromCsv` this doesn't call the listeners.
+
+        Args:
+            key (str): The key of the value in the csv that is used for the table key.
+            csvFile (CsvFile): The CsvFile object
+            size (int, optional): The number of rows per chunk. Defaults to 10000.
+            types (dict, optional): See `CsvFile.readChunks`. Defaults to None.
+            intern (tuple, optional): See `CsvFile.readChunks`. Defaults to ().
+
+        Returns:
+            dict: The number of "rows" read, the "seconds" it took
+                and the "rows_per_second".
+        """
+        start, count = time.perf_counter(), 0;
+        with self.__writing, paused_gc():
+            for chunk in csvFile.readChunks(size, types, intern):
+                self.__data.update([(row[key], row) for row in chunk]);
+                count += len(chunk);
+            self.__reindex();
+        seconds = time.perf_counter() - start;
+        return {
+            "rows": count,
+            "seconds": seconds,
+            "rows_per_second": count / seconds if seconds else 0.0
+        };
+    def convert(self, converter):
+        """Converts every value with a function now and every value that is
+        put from now on, e.g. to migrate rows to a new type. The listeners
+        aren't called, if a value changed the table is written again
+        on the next checkpoint.
+
+        Args:
+            converter (function): Gets a value and returns the converted value,
+                or the same value if it doesn't need converting.
+        """
+        with self.__writing, paused_gc():
+            self.__converter, changed = converter, False;
+            for key, val in self.__data.items():
+                new_val = converter(val);
+                if new_val is not val:
+                    self.__data[key], changed = new_val, True;
+            if changed:
+                self.__reindex();
+    def __reindex(self):
+        self.generation += 1;
+        self.unnotified = self.generation;
+        for index in self.__indexes.values():
+            index.rebuild(self.__data);
+    def create_index(self, name, key_fn, unique=False):
+        """Creates a secondary index that is kept up to date on every
+        put, delete and touch. Indexes aren't saved, they are built
+        from the entries when created.
+
+        Args:
+            name (str): The name of the index.
+            key_fn (function): Gets the index key from a value,
+                values it returns None for are left out.
+            unique (bool, optional): Whether an index key may only belong
+                to one entry. Defaults to False.
+
+        Raises:
+            ValueError: If unique but an index key belongs to multiple entries.
+        """
+        index = Index(key_fn, unique);
+        index.rebuild(self.__data);
+        self.__indexes[name] = index;
+    def has_index(self, name):
+        """Whether there is an index with a name.
+
+        Args:
+            name (str): The name of the index.
+
+        Returns:
+            bool: Whether there is an index with that name.
+        """
+        return name in self.__indexes;
+    def find(self, name, index_key):
+        """Finds the values of the entries with an index key.
+
+        Args:
+            name (str): The name of the index.
+            index_key (anytype): The index key.
+
+        Returns:
+            list: The values.
+        """
+        return [self.__data[key] for key in self.__indexes[name].find(index_key)];
+    def find_one(self, name, index_key, default=None):
+        """Finds the value of the first entry with an index key.
+
+        Args:
+            name (str): The name of the index.
+            index_key (anytype): The index key.
+            default (anytype, optional): The fallback value. Defaults to None.
+
+        Returns:
+            anytype: The value or else the fallback value.
+        """
+        keys = self.__indexes[name].find(index_key);
+        return self.__data[keys[0]] if keys else default;
     def forEach(self, callback):
         """Iterate through each entry and call a callback for each entry.
 
@@ -73,41 +516,2615 @@ class Table:
         """
         for i, v in self.__data.items():
             callback(i, v);
+    def query(self, alias="row"):
+        """Starts a query of the table, see `Query`.
+
+        Args:
+            alias (str, optional): The name of the values of the table
+                in the results. Defaults to "row".
+
+        Returns:
+            Query: The query.
+        """
+        return Query(self, alias);
     def __repr__(self):
         return f"Table{self.__data}";
 
-class Database(Table):
-    def add_table(self, name):
-        """Add a table to the database
+class ConcurrentTable(Table):
+    """A table that can be used by many threads at once.
+
+    The keys are spread over a number of locks, a write holds the lock of
+    its key, so writes to different entries rarely wait for each other.
+    A lock of the whole table is only held while a write changes the entry,
+    the indexes and the generation counter, the listeners are called after
+    it's let go, so they may run at once for different entries, unless
+    the table was given a lock to `hold`, which a write holds from before
+    it takes the lock of the table until the listeners were told.
+    Values that get changed in place have to be changed inside `locked`
+    and touched before leaving it. Readers don't take any lock, `get`,
+    `snapshot` and `forEach` see an entry either before or after a write,
+    index lookups only wait for a write that is half done.
+
+    Args:
+        dat (dict, optional): The raw dictionary. Defaults to None.
+        stripes (int, optional): The number of locks. Defaults to 64.
+    """
+    def __init__(self, dat=None, stripes=64):
+        super().__init__(dat);
+        self.__stripes = [threading.RLock() for _ in range(stripes)];
+        self.__changes = threading.RLock();
+    def __stripe(self, key):
+        return self.__stripes[hash(key) % len(self.__stripes)];
+    @contextmanager
+    def locked(self, key):
+        """Locks an entry so its value can be changed in place.
+        Only lock one entry at a time, or always lock them in the same order.
 
         Args:
-            name (str): The name of the table.
+            key (anytype): The key.
+
+        Yields:
+            anytype: The value, None if there's no entry with that key.
+        """
+        with self.__stripe(key):
+            yield self.get(key);
+    @contextmanager
+    def locked_all(self):
+        """Locks every entry, for changes to the whole table.
+        """
+        for stripe in self.__stripes:
+            stripe.acquire();
+        try:
+            with self.writing(), self.__changes:
+                yield;
+        finally:
+            for stripe in reversed(self.__stripes):
+                stripe.release();
+    def indexing(self):
+        """The lock of the whole table, see `Table.indexing`.
 
         Returns:
-            Table: The newly added table.
+            threading.RLock: The lock.
         """
-        newTable = Table();
-        self.put(name, newTable)
-        return newTable
-    def load(self):
-        """Loads data from the database directory.
+        return self.__changes;
+    def put(self, key, val):
+        """Puts a new value in place of a key, see `Table.put`.
+        """
+        with self.__stripe(key):
+            super().put(key, val);
+    def delete(self, key):
+        """Deletes an entry using a key, see `Table.delete`.
+        """
+        with self.__stripe(key):
+            super().delete(key);
+    def touch(self, key, changes=None):
+        """Tells the table that the value of an entry was modified in place,
+        see `Table.touch`.
+        """
+        with self.__stripe(key):
+            super().touch(key, changes);
+    def fromCsv(self, key, csvFile):
+        """Read from a Csv file, see `Table.fromCsv`.
+        """
+        with self.locked_all():
+            super().fromCsv(key, csvFile);
+    def fromCsvChunks(self, key, csvFile, size=10000, types=None, intern=()):
+        """Read from a Csv file a chunk at a time, see `Table.fromCsvChunks`.
+        """
+        with self.locked_all():
+            return super().fromCsvChunks(key, csvFile, size, types, intern);
+    def create_index(self, name, key_fn, unique=False):
+        """Creates a secondary index, see `Table.create_index`.
+        """
+        with self.locked_all():
+            super().create_index(name, key_fn, unique);
+    def convert(self, converter):
+        """Converts every value with a function, see `Table.convert`.
+        """
+        with self.locked_all():
+            super().convert(converter);
+    def find(self, name, index_key):
+        """Finds the values of the entries with an index key, see `Table.find`.
+        The index is read while no write is half done.
+        """
+        with self.__changes:
+            return super().find(name, index_key);
+    def find_one(self, name, index_key, default=None):
+        """Finds the value of the first entry with an index key,
+        see `Table.find_one`.
+        """
+        with self.__changes:
+            return super().find_one(name, index_key, default);
+    def items(self, prefix=None):
+        """Goes through the entries of a snapshot of the table, see `Table.items`.
+        """
+        for key, val in self.snapshot().items():
+            if prefix is None or (isinstance(key, str)
+                                  and key.startswith(prefix)):
+                yield key, val;
+    def forEach(self, callback):
+        """Calls a callback for each entry of a snapshot of the table.
+
+        Args:
+            callback (function): The callback that gets called for each entry.
+        """
+        for key, val in self.snapshot().items():
+            callback(key, val);
+    def __repr__(self):
+        return f"ConcurrentTable{self.snapshot()}";
+
+class Listing:
+    """The keys of a table sorted once, so going through them a page at
+    a time only takes a binary search for each page. The keys are the ones
+    the table had when it was taken, entries deleted after that are skipped
+    and the ones put after that are left out, take another listing to see them.
+    Nothing is kept once the listing is dropped.
+
+    Args:
+        table (Table): The table.
+        prefix (str, optional): Only the keys starting with it, every key if None.
+            Defaults to None.
+    """
+    def __init__(self, table, prefix=None):
+        self.table, self.prefix = table, prefix;
+        self.keys = sorted(key for key in table.snapshot() if prefix is None or (
+            isinstance(key, str) and key.startswith(prefix)));
+    def count(self):
+        """Counts the keys.
 
         Returns:
-            bool: True if succeeded else False.
+            int: The number of keys.
         """
-        if not os.path.exists("./database"):
-            return False
-        for file_name in os.listdir("./database"):
-            file_path = os.path.join("./database", file_name)
-            if os.path.isfile(file_path):
-                with open(file_path, "rb") as file:
-                    self.put(file_name, Table(pickle.load(file)))
-        return True
-    def save(self):
-        """Saves the database to the database directory.
+        return len(self.keys);
+    def page(self, limit, after=None):
+        """Gets a page of entries.
+        Pass the last key of a page as `after` to get the next one.
+
+        Args:
+            limit (int): The most entries in the page.
+            after (anytype, optional): Only the keys after it, from the
+                first key if None. Defaults to None.
+
+        Returns:
+            list: The keys and values of the entries.
+        """
+        keys, page = self.keys, [];
+        start = 0 if after is None else bisect.bisect_right(keys, after);
+        for key in islice(keys, start, None):
+            if len(page) >= limit:
+                break;
+            val = self.table.get(key);
+            if val is not None:
+                page.append((key, val));
+        return page;
+
+class SqliteListing(Listing):
+    """A listing of a `SqliteTable`, its pages and count are read with
+    the primary key index, so no key is kept in memory.
+
+    Args:
+        table (SqliteTable): The table.
+        prefix (str, optional): Only the keys starting with it, every key if None.
+            Defaults to None.
+    """
+    def __init__(self, table, prefix=None):
+        self.table, self.prefix, self.keys = table, prefix, None;
+    def count(self):
+        """Counts the entries, see `SqliteTable.count`.
+
+        Returns:
+            int: The number of entries.
+        """
+        return self.table.count(self.prefix);
+    def page(self, limit, after=None):
+        """Gets a page of entries, see `SqliteTable.page`.
+
+        Returns:
+            list: The keys and values of the entries.
+        """
+        return self.table.page(limit, after, self.prefix);
+
+class Query:
+    """A read of a table that only runs when it is iterated, built up with
+    `keys`, `where`, `join`, `order`, `limit` and `select`.
+    Each result is a dictionary from the alias of every table in the query
+    to its value, e.g. {"project": {...}, "lead": {...}}.
+
+    The entries are found in the cheapest way available, from the given keys,
+    else from the secondary index named after a field that has to be equal to
+    a value, e.g. `where(role=1)` uses the "role" index, else from a snapshot.
+
+    Args:
+        table (Table): The table.
+        alias (str): The name of the values of the table in the results.
+    """
+    def __init__(self, table, alias):
+        self.table, self.alias = table, alias;
+        self.__keys, self.__keep_missing = None, False;
+        self.__equals, self.__filters, self.__joins = {}, [], [];
+        self.__order, self.__offset, self.__count = None, 0, None;
+        self.__select = None;
+    def keys(self, keys, keep_missing=False):
+        """Only reads the entries with these keys, in this order.
+
+        Args:
+            keys (iterable): The keys.
+            keep_missing (bool, optional): Whether keys without an entry
+                give a result with None as the value. Defaults to False.
+
+        Returns:
+            Query: This query.
+        """
+        self.__keys, self.__keep_missing = keys, keep_missing;
+        return self;
+    def where(self, predicate=None, **equals):
+        """Only keeps the entries that match.
+
+        Args:
+            predicate (function, optional): Gets the value and returns
+                whether to keep it. Defaults to None.
+            **equals: Fields that have to be equal to a value.
+
+        Returns:
+            Query: This query.
+        """
+        if predicate is not None:
+            self.__filters.append(predicate);
+        self.__equals.update(equals);
+        return self;
+    def join(self, table, alias, key_fn, source=None, index=None, outer=False):
+        """Adds the matching entries of another table to each result.
+
+        Args:
+            table (Table): The other table.
+            alias (str): The name of its values in the results.
+            key_fn (function): Gets the key in the other table from
+                the value of `source`.
+            source (str, optional): The alias it's joined on, the first
+                table if None. Defaults to None.
+            index (str, optional): The index of the other table `key_fn`
+                gives keys of, the entry keys if None. Defaults to None.
+            outer (bool, optional): Whether results without a match are kept
+                with None as the value. Defaults to False.
+
+        Returns:
+            Query: This query.
+        """
+        self.__joins.append((table, alias, key_fn, source or self.alias,
+                             index, outer));
+        return self;
+    def order(self, key_fn, reverse=False):
+        """Sorts the results, this reads every result before the first one is given.
+
+        Args:
+            key_fn (function): Gets the sort key from a result.
+            reverse (bool, optional): Whether to sort in descending order.
+                Defaults to False.
+
+        Returns:
+            Query: This query.
+        """
+        self.__order = (key_fn, reverse);
+        return self;
+    def limit(self, count, offset=0):
+        """Only gives some of the results.
+
+        Args:
+            count (int): The most results to give, all of them if None.
+            offset (int, optional): The number of results to skip. Defaults to 0.
+
+        Returns:
+            Query: This query.
+        """
+        self.__count, self.__offset = count, offset;
+        return self;
+    def select(self, func):
+        """Gives what a function returns for each result instead of the result.
+
+        Args:
+            func (function): Gets a result.
+
+        Returns:
+            Query: This query.
+        """
+        self.__select = func;
+        return self;
+    def __index(self):
+        if self.__keys is None:
+            for field in self.__equals:
+                if self.table.has_index(field):
+                    return field;
+        return None;
+    def explain(self):
+        """Describes how the query would be run.
+
+        Returns:
+            str: The description.
+        """
+        index = self.__index();
+        if self.__keys is not None:
+            plan = [f"keys of {self.alias}"];
+        elif index is not None:
+            plan = [f"index {index} of {self.alias}"];
+        else:
+            plan = [f"scan of {self.alias}"];
+        for _, alias, _, source, join_index, outer in self.__joins:
+            kind = "outer join" if outer else "join";
+            how = "keys" if join_index is None else f"index {join_index}";
+            plan.append(f"{kind} {alias} on {source} by {how}");
+        return ", ".join(plan);
+    def __values(self):
+        index = self.__index();
+        if self.__keys is not None:
+            for key in self.__keys:
+                val = self.table.get(key);
+                if val is not None or self.__keep_missing:
+                    yield val;
+        elif index is not None:
+            yield from self.table.find(index, self.__equals[index]);
+        else:
+            yield from self.table.snapshot().values();
+    def __matches(self, val):
+        if val is None:
+            return not self.__equals and not self.__filters;
+        if self.__equals and not hasattr(val, "get"):
+            return False;
+        for field, expected in self.__equals.items():
+            if val.get(field) != expected:
+                return False;
+        return all(predicate(val) for predicate in self.__filters);
+    def __join(self, rows, join):
+        table, alias, key_fn, source, index, outer = join;
+        for row in rows:
+            matches = [];
+            if row[source] is not None:
+                key = key_fn(row[source]);
+                if index is not None:
+                    matches = table.find(index, key);
+                else:
+                    match = table.get(key);
+                    matches = [] if match is None else [match];
+            if not matches and outer:
+                matches = [None];
+            for match in matches:
+                yield {**row, alias: match};
+    def __iter__(self):
+        rows = ({
+            self.alias: val
+        } for val in self.__values() if self.__matches(val));
+        for join in self.__joins:
+            rows = self.__join(rows, join);
+        if self.__order is not None:
+            rows = iter(sorted(rows, key=self.__order[0],
+                               reverse=self.__order[1]));
+        stop = None if self.__count is None else self.__offset + self.__count;
+        rows = islice(rows, self.__offset, stop);
+        if self.__select is not None:
+            rows = map(self.__select, rows);
+        return rows;
+    def first(self, default=None):
+        """Gets the first result.
+
+        Args:
+            default (anytype, optional): The fallback value. Defaults to None.
+
+        Returns:
+            anytype: The first result or else the fallback value.
+        """
+        return next(iter(self), default);
+    def count(self):
+        """Counts the results, reading all of them.
+
+        Returns:
+            int: The number of results.
+        """
+        return sum(1 for _ in self);
+
+class Relation:
+    """A many to many relationship between two sets of keys, e.g. users and
+    projects, that can be looked up from both sides. Every link has a kind.
+    """
+    def __init__(self):
+        self.__lefts, self.__rights = {}, {};
+    def link(self, left, right, kind):
+        """Links two keys.
+
+        Args:
+            left (anytype): The key on the left side.
+            right (anytype): The key on the right side.
+            kind (anytype): The kind of link.
+        """
+        self.__lefts.setdefault(left, {}).setdefault(right, set()).add(kind);
+        self.__rights.setdefault(right, {}).setdefault(left, set()).add(kind);
+    def unlink(self, left, right, kind):
+        """Removes a link between two keys if there is one.
+
+        Args:
+            left (anytype): The key on the left side.
+            right (anytype): The key on the right side.
+            kind (anytype): The kind of link.
+        """
+        for side, one, other in ((self.__lefts, left, right),
+                                 (self.__rights, right, left)):
+            links = side.get(one);
+            if links is None or kind not in links.get(other, ()):
+                return;
+            links[other].discard(kind);
+            if not links[other]:
+                del links[other];
+            if not links:
+                del side[one];
+    def left_links(self, left):
+        """Goes through the links of a key on the left side without copying
+        them, so nothing can be linked or unlinked until it's done.
+
+        Args:
+            left (anytype): The key on the left side.
+
+        Yields:
+            tuple: The right side key and the kind of each link.
+        """
+        for right, kinds in self.__lefts.get(left, {}).items():
+            for kind in kinds:
+                yield right, kind;
+    def right_links(self, right):
+        """Goes through the links of a key on the right side without copying
+        them, so nothing can be linked or unlinked until it's done.
+
+        Args:
+            right (anytype): The key on the right side.
+
+        Yields:
+            tuple: The left side key and the kind of each link.
+        """
+        for left, kinds in self.__rights.get(right, {}).items():
+            for kind in kinds:
+                yield left, kind;
+    def get_rights(self, left, kind=None):
+        """Gets the keys on the right side linked to a key on the left side.
+
+        Args:
+            left (anytype): The key on the left side.
+            kind (anytype, optional): Only follow this kind of link,
+                every kind if None. Defaults to None.
+
+        Returns:
+            list: The keys on the right side.
+        """
+        return [right for right, kinds in self.__lefts.get(left, {}).items()
+                if kind is None or kind in kinds];
+    def get_lefts(self, right, kind=None):
+        """Gets the keys on the left side linked to a key on the right side.
+
+        Args:
+            right (anytype): The key on the right side.
+            kind (anytype, optional): Only follow this kind of link,
+                every kind if None. Defaults to None.
+
+        Returns:
+            list: The keys on the left side.
+        """
+        return [left for left, kinds in self.__rights.get(right, {}).items()
+                if kind is None or kind in kinds];
+
+class LruCache:
+    """A bounded cache, the least recently used entry is thrown out
+    when it gets full.
+
+    Args:
+        size (int, optional): The maximum number of entries. Defaults to 4096.
+    """
+    def __init__(self, size=4096):
+        self.size, self.hits, self.misses = size, 0, 0;
+        self.__data = OrderedDict();
+    def get(self, key, compute):
+        """Gets a cached value, computing and caching it on a miss.
+
+        Args:
+            key (anytype): The key.
+            compute (function): Gets called with the key on a miss.
+
+        Returns:
+            anytype: The value.
+        """
+        data = self.__data;
+        if key in data:
+            self.hits += 1;
+            data.move_to_end(key);
+            return data[key];
+        self.misses += 1;
+        val = data[key] = compute(key);
+        if len(data) > self.size:
+            data.popitem(last=False);
+        return val;
+    def invalidate(self, key):
+        """Throws out an entry if it's cached.
+
+        Args:
+            key (anytype): The key.
+
+        Returns:
+            anytype: The value that was cached, None if it wasn't.
+        """
+        return self.__data.pop(key, None);
+    def clear(self):
+        """Throws out every entry.
+        """
+        self.__data.clear();
+    def stats(self):
+        """Gets the counters of the cache.
+
+        Returns:
+            dict: The number of "hits", "misses" and cached "entries".
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self.__data)};
+    def __len__(self):
+        return len(self.__data);
+
+class PagedStore:
+    """Lists of entries, one per owner, kept in fixed size pages.
+    Only the most recently used pages are kept in memory, the others are
+    spilled to files in a directory and read back when they're needed.
+    An entry gets an id that says which page it's on, so appending and
+    deleting never have to look through the whole list.
+
+    Args:
+        path (str): The directory of the pages.
+        page_size (int, optional): The number of entries in a page. Defaults to 64.
+        cache_pages (int, optional): The number of pages kept in memory.
+            Defaults to 256.
+        read_only (bool, optional): Whether to leave the files as they are,
+            every page that's read stays in memory and `flush` doesn't
+            write anything. Defaults to False.
+    """
+    def __init__(self, path, page_size=64, cache_pages=256, read_only=False):
+        self.path, self.page_size, self.cache_pages = path, page_size, cache_pages;
+        self.read_only = read_only;
+        self.__lock = threading.RLock();
+        self.__pages, self.__dirty, self.__index = OrderedDict(), set(), None;
+        self.__changed, self.__listeners = False, [];
+    def listen(self, callback):
+        """Registers a callback that gets called whenever a list changes,
+        e.g. to write the change to a journal, see `Database.attach`.
+
+        Args:
+            callback (function): The callback that gets called with the action
+                ("append", "delete" or "clear"), the owner and the entry id
+                and the entry for an append, the entry id for a delete or None.
+        """
+        self.__listeners.append(callback);
+    def __notify(self, action, owner, val):
+        for listener in self.__listeners:
+            listener(action, owner, val);
+    def __get_index(self):
+        if self.__index is None:
+            file_path = os.path.join(self.path, "index");
+            if os.path.isfile(file_path):
+                with open(file_path, "rb") as file:
+                    self.__index = pickle.load(file);
+            else:
+                self.__index = {"next_page": 0, "next_id": 0, "owners": {}};
+        return self.__index;
+    def __write(self, name, data, sync=False):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path);
+        file_path = os.path.join(self.path, name);
+        with open(f"{file_path}.tmp", "wb") as file:
+            pickle.dump(data, file, pickle.HIGHEST_PROTOCOL);
+            if sync:
+                file.flush();
+                os.fsync(file.fileno());
+        os.replace(f"{file_path}.tmp", file_path);
+    def __get_page(self, page_no):
+        pages = self.__pages;
+        if page_no in pages:
+            pages.move_to_end(page_no);
+            return pages[page_no];
+        file_path = os.path.join(self.path, str(page_no));
+        page = {};
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as file:
+                page = pickle.load(file);
+        pages[page_no] = page;
+        while not self.read_only and len(pages) > self.cache_pages:
+            old_no, old_page = pages.popitem(last=False);
+            if old_no in self.__dirty:
+                self.__write(str(old_no), old_page);
+                self.__dirty.discard(old_no);
+        return page;
+    def __drop_page(self, page_no):
+        self.__pages.pop(page_no, None);
+        self.__dirty.discard(page_no);
+        file_path = os.path.join(self.path, str(page_no));
+        if not self.read_only and os.path.isfile(file_path):
+            os.remove(file_path);
+    def append(self, owner, entry):
+        """Appends an entry to the end of an owner's list.
+
+        Args:
+            owner (str): The owner.
+            entry (anytype): The entry.
+
+        Returns:
+            str: The id of the entry.
+        """
+        with self.__lock:
+            index = self.__get_index();
+            owned = index["owners"].setdefault(owner, {});
+            page_no = next(reversed(owned), None);
+            if page_no is None or len(self.__get_page(page_no)) >= self.page_size:
+                page_no = index["next_page"];
+                index["next_page"] += 1;
+                owned[page_no] = None;
+            entry_id = f"{page_no}:{index['next_id']}";
+            index["next_id"] += 1;
+            self.__changed = True;
+            self.__get_page(page_no)[entry_id] = entry;
+            self.__dirty.add(page_no);
+            self.__notify("append", owner, (entry_id, entry));
+            return entry_id;
+    def delete(self, owner, entry_id):
+        """Deletes an entry of an owner by its id.
+
+        Args:
+            owner (str): The owner.
+            entry_id (str): The id of the entry.
+
+        Returns:
+            bool: True if it was deleted else False.
+        """
+        with self.__lock:
+            owned = self.__get_index()["owners"].get(owner, {});
+            try:
+                page_no = int(entry_id.split(':', 1)[0]);
+            except ValueError:
+                return False;
+            if page_no not in owned:
+                return False;
+            page = self.__get_page(page_no);
+            if page.pop(entry_id, None) is None:
+                return False;
+            self.__dirty.add(page_no);
+            if not page:
+                self.__changed = True;
+                del owned[page_no];
+                self.__drop_page(page_no);
+                if not owned:
+                    del self.__get_index()["owners"][owner];
+            self.__notify("delete", owner, entry_id);
+            return True;
+    def clear(self, owner):
+        """Deletes every entry of an owner.
+
+        Args:
+            owner (str): The owner.
+        """
+        with self.__lock:
+            for page_no in self.__get_index()["owners"].pop(owner, {}):
+                self.__changed = True;
+                self.__drop_page(page_no);
+            self.__notify("clear", owner, None);
+    def restore(self, action, owner, val):
+        """Makes a change a listener was told about again, e.g. when a
+        journal is replayed. An entry is appended with the id it had and
+        only if it isn't there yet, so the pages that were written after
+        the change was made don't get it twice.
+
+        Args:
+            action (str): The action, see `listen`.
+            owner (str): The owner.
+            val (anytype): What the listener got with the action.
+        """
+        if action == "delete":
+            self.delete(owner, val);
+            return;
+        if action == "clear":
+            self.clear(owner);
+            return;
+        entry_id, entry = val;
+        page_no, number = (int(part) for part in entry_id.split(':', 1));
+        with self.__lock:
+            index = self.__get_index();
+            index["next_page"] = max(index["next_page"], page_no + 1);
+            index["next_id"] = max(index["next_id"], number + 1);
+            index["owners"].setdefault(owner, {})[page_no] = None;
+            self.__changed = True;
+            page = self.__get_page(page_no);
+            if entry_id not in page:
+                page[entry_id] = entry;
+                self.__dirty.add(page_no);
+    def pages(self, owner):
+        """Gets the pages of an owner, oldest first.
+
+        Args:
+            owner (str): The owner.
+
+        Returns:
+            list: The page numbers, empty if the owner has no entries.
+        """
+        with self.__lock:
+            return list(self.__get_index()["owners"].get(owner, ()));
+    def read(self, page_no):
+        """Reads the entries on a page.
+
+        Args:
+            page_no (int): The page number.
+
+        Returns:
+            list: The pairs of entry id and entry, oldest first.
+        """
+        with self.__lock:
+            return list(self.__get_page(page_no).items());
+    def entries(self, owner):
+        """Goes through the entries of an owner, reading a page at a time.
+
+        Args:
+            owner (str): The owner.
+
+        Yields:
+            tuple: The entry id and the entry, oldest first.
+        """
+        for page_no in self.pages(owner):
+            yield from self.read(page_no);
+    def flush(self):
+        """Writes the pages that changed and the index to the directory
+        and makes sure they're on the disk.
+        """
+        if self.read_only:
+            return;
+        with self.__lock:
+            for page_no in self.__dirty:
+                self.__write(str(page_no), self.__pages[page_no], sync=True);
+            self.__dirty.clear();
+            if self.__changed:
+                self.__write("index", self.__index, sync=True);
+                self.__changed = False;
+
+class LazyTable:
+    """A stand-in for a table stored in a file, the file is only read
+    the first time the table is used.
+
+    Args:
+        path (str): The path to the file.
+        table_type (class, optional): The class of the table, Table if None.
+            Defaults to None.
+        read (function, optional): Reads the entries of the table, e.g. from
+            a `Snapshot`, the file is read with `read_table` if None.
+            Defaults to None.
+    """
+    def __init__(self, path, table_type=None, read=None):
+        self.path, self.table_type, self.__table = path, table_type, None;
+        self.__read = read;
+        self.__listeners, self.__indexes, self.__converter = [], [], None;
+        self.__writing = None;
+        self.__lock = threading.Lock();
+    @property
+    def loaded(self):
+        """Whether the file has been read.
+
+        Returns:
+            bool: Whether the file has been read.
+        """
+        return self.__table is not None;
+    @property
+    def generation(self):
+        """The generation counter of the table, 0 while it's not loaded.
+
+        Returns:
+            int: The generation counter.
+        """
+        return 0 if self.__table is None else self.__table.generation;
+    @property
+    def unnotified(self):
+        """The generation of the last change the listeners weren't told
+        about, see `Table`, 0 while it's not loaded.
+
+        Returns:
+            int: The generation.
+        """
+        return 0 if self.__table is None else self.__table.unnotified;
+    def listen(self, callback, changes=False):
+        """Registers a callback that gets called whenever an entry changes,
+        without reading the file.
+
+        Args:
+            callback (function): The callback, see `Table.listen`.
+            changes (bool, optional): See `Table.listen`. Defaults to False.
+        """
+        if self.__table is None:
+            self.__listeners.append((callback, changes));
+        else:
+            self.__table.listen(callback, changes);
+    def hold(self, lock):
+        """Makes every write hold a lock, see `Table.hold`, without reading
+        the file.
+
+        Args:
+            lock (threading.RLock): The lock.
+        """
+        if self.__table is None:
+            self.__writing = lock;
+        else:
+            self.__table.hold(lock);
+    def create_index(self, name, key_fn, unique=False):
+        """Creates a secondary index, it gets built when the file is read.
+
+        Args:
+            name (str): The name of the index.
+            key_fn (function): See `Table.create_index`.
+            unique (bool, optional): See `Table.create_index`. Defaults to False.
+        """
+        if self.__table is None:
+            self.__indexes.append((name, key_fn, unique));
+        else:
+            self.__table.create_index(name, key_fn, unique);
+    def convert(self, converter):
+        """Converts every value with a function, see `Table.convert`.
+        The values are converted when the file is read.
+
+        Args:
+            converter (function): Gets a value and returns the converted value.
+        """
+        if self.__table is None:
+            self.__converter = converter;
+        else:
+            self.__table.convert(converter);
+    def materialize(self):
+        """Reads the file if it hasn't been read yet.
+
+        Returns:
+            Table: The table.
+        """
+        if self.__table is None:
+            with self.__lock:
+                if self.__table is None:
+                    if self.__read is None:
+                        table = read_table(self.path, self.table_type);
+                    else:
+                        table = (self.table_type or Table)(self.__read());
+                    if self.__converter is not None:
+                        table.convert(self.__converter);
+                    if self.__writing is not None:
+                        table.hold(self.__writing);
+                    for listener in self.__listeners:
+                        table.listen(*listener);
+                    for index in self.__indexes:
+                        table.create_index(*index);
+                    self.__listeners, self.__indexes = None, None;
+                    self.__table = table;
+        return self.__table;
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name);
+        return getattr(self.materialize(), name);
+    def __repr__(self):
+        if self.__table is None:
+            return f"LazyTable({self.path})";
+        return repr(self.__table);
+
+class Journal:
+    """Append-only write-ahead log of the changes made to a database.
+    While a checkpoint is written the records before it are rotated out to
+    a second file, they're only dropped once the checkpoint is on the disk.
+
+    Each record is pickled after a `HEADER` of its length, the CRC-32 of
+    the pickle and the CRC-32 of the first two. Only the last record can be
+    cut off by a crash, a record that is damaged anywhere else is an error.
+    """
+    HEADER = struct.Struct("<III");
+    def __init__(self, path):
+        self.path, self.size, self.__file = path, 0, None;
+        self.rotated_path = f"{path}.1";
+    @classmethod
+    def records(cls, path):
+        """Reads the records of a journal file without changing it,
+        up to a torn record at the end.
+
+        Raises:
+            ValueError: If a record before the end is damaged.
+
+        Args:
+            path (str): The path to the file, e.g. `rotated_path`.
+
+        Yields:
+            tuple: The records in the order they were appended.
+        """
+        if not os.path.isfile(path):
+            return;
+        with open(path, "rb") as file:
+            for record, _ in cls.__read(file):
+                yield record;
+    @classmethod
+    def __read(cls, file):
+        size, good = os.fstat(file.fileno()).st_size, 0;
+        while good < size:
+            header = file.read(cls.HEADER.size);
+            if len(header) < cls.HEADER.size:
+                return;
+            length, checksum, header_checksum = cls.HEADER.unpack(header);
+            if zlib.crc32(header[:8]) != header_checksum:
+                # A crash can leave zeros after the end, not a broken header.
+                if header.strip(b"\0") or file.read().strip(b"\0"):
+                    raise ValueError(
+                        f"{file.name} has a damaged record at byte {good}");
+                return;
+            payload = file.read(length);
+            if len(payload) < length:
+                return;
+            if zlib.crc32(payload) != checksum:
+                if file.tell() < size:
+                    raise ValueError(
+                        f"{file.name} has a damaged record at byte {good}");
+                return;
+            good = file.tell();
+            yield pickle.loads(payload), good;
+    def append(self, record):
+        """Appends a record to the end of the journal.
+
+        Args:
+            record (tuple): The record, (table name, action, key, value).
+        """
+        if self.__file is None:
+            self.__file = open(self.path, "ab");
+            self.size = self.__file.tell();
+        payload = pickle.dumps(record, pickle.HIGHEST_PROTOCOL);
+        header = struct.pack("<II", len(payload), zlib.crc32(payload));
+        self.__file.write(header + struct.pack("<I", zlib.crc32(header)) +
+                          payload);
+        self.__file.flush();
+        self.size = self.__file.tell();
+    def replay(self):
+        """Reads every record in the journal, the rotated ones first,
+        a torn record at the end left by a crash is cut off.
+
+        Raises:
+            ValueError: If a record before the end is damaged.
+
+        Yields:
+            tuple: The records in the order they were appended.
+        """
+        for path in (self.rotated_path, self.path):
+            if not os.path.isfile(path):
+                continue;
+            with open(path, "r+b") as file:
+                good = 0;
+                for record, good in self.__read(file):
+                    yield record;
+                file.truncate(good);
+            if path == self.path:
+                self.size = good;
+    def rotate(self):
+        """Moves the records so far out of the way of new ones, they're
+        added after the ones that were rotated and not dropped yet.
+        """
+        self.close();
+        if not os.path.isfile(self.path):
+            return;
+        if os.path.isfile(self.rotated_path):
+            with open(self.rotated_path, "ab") as rotated, \
+                    open(self.path, "rb") as file:
+                shutil.copyfileobj(file, rotated);
+            os.remove(self.path);
+        else:
+            os.replace(self.path, self.rotated_path);
+        self.size = 0;
+    def drop_rotated(self):
+        """Removes the rotated records, once a checkpoint holds them.
+        """
+        if os.path.isfile(self.rotated_path):
+            os.remove(self.rotated_path);
+    def sync(self):
+        """Forces the appended records onto the disk.
+        """
+        if self.__file is not None:
+            self.__file.flush();
+            os.fsync(self.__file.fileno());
+    def truncate(self):
+        """Removes every record from the journal.
+        """
+        self.close();
+        with open(self.path, "wb"):
+            pass;
+        self.drop_rotated();
+        self.size = 0;
+    def close(self):
+        """Closes the journal file.
+        """
+        if self.__file is not None:
+            self.__file.close();
+            self.__file = None;
+
+def decode_text(buffer):
+    """Turns a buffer written by `SnapshotPickler` back into text.
+
+    Args:
+        buffer (bytes-like): The UTF-8 bytes of the text.
+
+    Returns:
+        str: The text.
+    """
+    return str(buffer, "utf-8", "surrogatepass");
+
+class OutOfBandText:
+    """Text that gets pickled as a buffer, so with protocol 5 its bytes
+    are written next to the pickle instead of inside it.
+
+    Args:
+        text (str): The text.
+    """
+    __slots__ = ("data", );
+    def __init__(self, text):
+        self.data = text.encode("utf-8", "surrogatepass");
+    def __reduce_ex__(self, protocol):
+        return (decode_text, (pickle.PickleBuffer(self.data), ));
+
+class SnapshotPickler(pickle.Pickler):
+    """A protocol 5 pickler that moves long text out of band, e.g. reports.
+    Only the text given to the constructor of an object is moved, like the
+    fields of a record, the keys and values of dictionaries are left alone.
+
+    Args:
+        file (file): Where to write the pickle.
+        buffer_callback (function): Gets each out of band buffer.
+        threshold (int, optional): The length from which text is moved.
+            Defaults to 512.
+    """
+    def __init__(self, file, buffer_callback, threshold=512):
+        super().__init__(file, 5, buffer_callback=buffer_callback);
+        self.threshold = threshold;
+    def reducer_override(self, obj):
+        try:
+            reduced = obj.__reduce_ex__(5);
+        except TypeError:  # classes and functions are pickled by name
+            return NotImplemented;
+        if reduced.__class__ is not tuple:
+            return NotImplemented;
+        threshold = self.threshold;
+        for arg in reduced[1]:
+            if arg.__class__ is str and len(arg) >= threshold:
+                args = tuple(
+                    OutOfBandText(arg) if arg.__class__ is str
+                    and len(arg) >= threshold else arg for arg in reduced[1]);
+                return (reduced[0], args) + reduced[2:];
+        return reduced;
+
+class Snapshot:
+    """Every table of a database in one file, so loading it is one
+    sequential read instead of one file per table.
+
+    The file starts with a header, `MAGIC` and the length of the table of
+    contents, followed by the table of contents, a pickle of the offset and
+    the length of each table and of its out of band buffers. The tables are
+    pickled with protocol 5 by `SnapshotPickler`.
+
+    Args:
+        path (str): The path to the file.
+        use_mmap (bool, optional): Whether to map the file into memory, so
+            only the tables that are read get paged in, else the whole file
+            is read at once. Defaults to True.
+    """
+    MAGIC = b"PMSNAP1\n";
+    HEADER = struct.Struct("<8sQ");
+    def __init__(self, path, use_mmap=True):
+        self.path, self.use_mmap = path, use_mmap;
+        self.__data, self.__toc, self.__base = None, None, 0;
+    @staticmethod
+    def dump(data, threshold=512):
+        """Pickles the entries of a table like `write` does, so they can be
+        written later or by another process while the table keeps changing.
+
+        Args:
+            data (dict): The entries of the table.
+            threshold (int, optional): See `SnapshotPickler`. Defaults to 512.
+
+        Returns:
+            tuple: The pickle and the list of out of band buffers, see `raw`.
+        """
+        stream, buffers = io.BytesIO(), [];
+        SnapshotPickler(stream, buffers.append, threshold).dump(data);
+        return stream.getvalue(), [bytes(buffer.raw()) for buffer in buffers];
+    @classmethod
+    def write(cls, path, tables, threshold=512):
+        """Writes tables to a snapshot file, a temporary file is written
+        first so a crash never leaves a half written snapshot behind.
+
+        Args:
+            path (str): The path to the file.
+            tables (dict): The entries of each table by name, or the raw
+                pickle and buffers from `raw` or `dump` to write a table
+                that's already pickled.
+            threshold (int, optional): See `SnapshotPickler`. Defaults to 512.
+
+        Returns:
+            dict: The size of each table in bytes.
+        """
+        toc, segments, offset = {}, [], 0;
+        for name, data in tables.items():
+            if isinstance(data, tuple):
+                payload, buffers = data;
+            else:
+                stream, buffers = io.BytesIO(), [];
+                SnapshotPickler(stream, buffers.append, threshold).dump(data);
+                payload = stream.getbuffer();
+                buffers = [buffer.raw() for buffer in buffers];
+            places = [];
+            for segment in [payload, *buffers]:
+                segment = memoryview(segment);
+                segments.append(segment);
+                places.append((offset, segment.nbytes));
+                offset += segment.nbytes;
+            toc[name] = (places[0], places[1:]);
+        dumped_toc = pickle.dumps(toc, pickle.HIGHEST_PROTOCOL);
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, len(dumped_toc)));
+            file.write(dumped_toc);
+            for segment in segments:
+                file.write(segment);
+            file.flush();
+            os.fsync(file.fileno());
+        os.replace(f"{path}.tmp", path);
+        return {
+            name: payload[1] + sum(size for _, size in places)
+            for name, (payload, places) in toc.items()
+        };
+    def open(self):
+        """Reads the header and the table of contents.
+
+        Raises:
+            ValueError: If the file isn't a snapshot.
+
+        Returns:
+            bool: True if succeeded, False if there is no such file.
+        """
+        if not os.path.isfile(self.path):
+            return False;
+        with open(self.path, "rb") as file:
+            if self.use_mmap and os.path.getsize(self.path):
+                self.__data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ);
+            else:
+                self.__data = file.read();
+        if len(self.__data) < self.HEADER.size:
+            raise ValueError(f"{self.path} is not a snapshot");
+        magic, toc_size = self.HEADER.unpack_from(self.__data);
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.path} is not a snapshot");
+        start = self.HEADER.size;
+        with memoryview(self.__data) as view:
+            self.__toc = pickle.loads(view[start:start + toc_size]);
+        self.__base = start + toc_size;
+        return True;
+    def names(self):
+        """The names of the tables in the snapshot.
+
+        Returns:
+            list: The names.
+        """
+        return list(self.__toc);
+    def size(self, name):
+        """The size of a table in the snapshot.
+
+        Args:
+            name (str): The name of the table.
+
+        Returns:
+            int: The number of bytes.
+        """
+        payload, places = self.__toc[name];
+        return payload[1] + sum(size for _, size in places);
+    def raw(self, name):
+        """Gets a table as it is in the file, without unpickling it.
+
+        Args:
+            name (str): The name of the table.
+
+        Returns:
+            tuple: The pickle and the list of out of band buffers, as
+                memoryviews of the file.
+        """
+        (offset, size), places = self.__toc[name];
+        view, base = memoryview(self.__data), self.__base;
+        return (view[base + offset:base + offset + size], [
+            view[base + offset:base + offset + size] for offset, size in places
+        ]);
+    def read(self, name):
+        """Unpickles a table.
+
+        Args:
+            name (str): The name of the table.
+
+        Returns:
+            dict: The entries of the table.
+        """
+        payload, buffers = self.raw(name);
+        with paused_gc():
+            return pickle.loads(payload, buffers=buffers);
+    def close(self):
+        """Unmaps the file, the tables that were read stay usable.
+        """
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close();
+        self.__data = None;
+
+class Database(Table):
+    """The database, a table of tables that are stored in the database directory.
+
+    Args:
+        path (str, optional): The database directory. Defaults to "./database".
+        lazy (bool, optional): Whether to only read the file of a table
+            the first time the table is used. Defaults to False.
+        journal (bool, optional): Whether to write every change to a
+            write-ahead log next to the directory. Defaults to False.
+        checkpoint_size (int, optional): The journal size in bytes after
+            which the tables get rewritten and the journal truncated,
+            the size of the last checkpoint is used if it is bigger.
+            Defaults to 1 MiB.
+        table_type (class, optional): The class of the tables, e.g.
+            ConcurrentTable when they are used by many threads.
+            Defaults to Table.
+        single_file (bool, optional): Whether to keep every table in one
+            `Snapshot` file next to the directory instead of one file per
+            table. A database directory that is already there is copied
+            into the snapshot when it's loaded and left as it is. With lazy loading
+            the snapshot is mapped into memory, else it's read at once.
+            Defaults to False.
+        read_only (bool, optional): Whether to leave the files as they are.
+            The journal is still replayed when loading, but the changes are
+            only kept in memory, nothing is journaled and `save` and
+            `checkpoint` don't write anything. Defaults to False.
+    """
+    def __init__(self, path="./database", lazy=False, journal=False,
+                 checkpoint_size=1 << 20, table_type=Table, single_file=False,
+                 read_only=False):
+        super().__init__();
+        self.path, self.lazy, self.checkpoint_size = path, lazy, checkpoint_size;
+        self.read_only = read_only;
+        self.table_type = table_type;
+        self.journal = Journal(f"{path}.wal") if journal else None;
+        self.snapshot_path = f"{path}.snap" if single_file else None;
+        self.__journaling, self.__sizes, self.__saved = False, {}, {};
+        self.__sources, self.__stores, self.checkpointer = {}, {}, None;
+        # The generation of each table since which every change it was
+        # told about is in the journal.
+        self.__logged = {};
+        self.__lock, self.__checkpointing = threading.RLock(), threading.Lock();
+        self.listen(self.__on_change);
+    def __on_change(self, action, name, table):
+        if action == "put":
+            if not isinstance(table, (Table, LazyTable)):
+                return;
+            # A write holds the lock until it's journaled, so a checkpoint
+            # sees either both the change and its record or neither.
+            table.hold(self.__lock);
+            table.listen(lambda action, key, val, changes: self.__record(
+                name, action, key, val, changes),
+                         changes=True);
+            if self.__journaling:
+                self.__record(None, action, name, table.getData());
+                self.__logged[name] = table.generation;
+        elif action == "delete":
+            self.__record(None, action, name, None);
+            self.__logged.pop(name, None);
+    def __record(self, name, action, key, val, changes=None):
+        if not self.__journaling:
+            return;
+        if action == "touch" and changes is None:
+            action = "put";
+        elif action == "touch":
+            action, val = "change", changes;
+        with self.__lock:
+            self.journal.append((name, action, key, val));
+            full = self.journal.size > max(self.checkpoint_size,
+                                           sum(self.__sizes.values()));
+        if full and self.checkpointer is not None:
+            self.checkpointer.wake();
+        elif full:
+            self.checkpoint();
+    def __replay(self):
+        put = set();
+        for name, action, key, val in self.journal.replay():
+            if name in self.__stores:
+                self.__stores[name].restore(action, key, val);
+                continue;
+            table = self if name is None else self.get(name);
+            if table is None:
+                continue;
+            if action == "put" and name is None:
+                table.put(key, self.table_type(val));
+                put.add(key);
+            elif action == "put":
+                table.put(key, val);
+            elif action == "change":
+                row = table.get(key);
+                if row is not None:
+                    apply_changes(row, val);
+                    table.touch(key, val);
+            elif key in table.getData():
+                table.delete(key);
+        return put;
+    def attach(self, name, store):
+        """Keeps a store that isn't a table, e.g. a `PagedStore`, in step
+        with the tables. Its changes go to the journal and are made again
+        when the journal is replayed, and it's flushed at every checkpoint
+        before the journal that has its changes is dropped.
+        Attach it before loading, under a name no table has.
+
+        Args:
+            name (str): The name of the store in the journal.
+            store (PagedStore): The store, it needs `listen`, `restore`
+                and `flush`.
+        """
+        self.__stores[name] = store;
+        store.listen(
+            lambda action, key, val: self.__record(name, action, key, val));
+    def open_store(self, name, page_size=64, cache_pages=256):
+        """Opens a `PagedStore` in a directory next to the database directory
+        and attaches it, see `attach`. Open it before loading.
+
+        Args:
+            name (str): The name of the store, the directory is the database
+                directory with a dot and the name added.
+            page_size (int, optional): The number of entries in a page. Defaults to 64.
+            cache_pages (int, optional): The number of pages kept in memory.
+                Defaults to 256.
+
+        Returns:
+            PagedStore: The store.
+        """
+        store = PagedStore(f"{self.path}.{name}", page_size, cache_pages,
+                           read_only=self.read_only);
+        self.attach(name, store);
+        return store;
+    @contextmanager
+    def transaction(self):
+        """Groups changes the way `SqliteDatabase.transaction` does, so the
+        same code runs on both. Every change is journaled as it's made,
+        so there's nothing to commit or roll back here.
+
+        Yields:
+            Database: The database.
+        """
+        yield self;
+    def add_table(self, name):
+        """Add a table to the database
+
+        Args:
+            name (str): The name of the table.
+
+        Returns:
+            Table: The newly added table.
+        """
+        newTable = self.table_type();
+        self.put(name, newTable);
+        return newTable;
+    def load(self):
+        """Loads data from the database directory.
+
+        Returns:
+            bool: True if succeeded else False.
+        """
+        if self.snapshot_path is not None and os.path.isfile(self.snapshot_path):
+            self.__load_snapshot();
+        elif os.path.exists(self.path):
+            self.__load_directory();
+        else:
+            return False;
+        if self.journal is not None:
+            put = self.__replay();
+            self.__journaling = not self.read_only;
+            self.__logged = {
+                name: table.generation
+                for name, table in self.snapshot().items()
+                if name in self.__saved or name in put
+            };
+        if self.snapshot_path is not None and not os.path.isfile(
+                self.snapshot_path):
+            self.checkpoint();
+        return True;
+    def __load_directory(self):
+        for file_name in os.listdir(self.path):
+            file_path = os.path.join(self.path, file_name);
+            if os.path.isfile(file_path) and not file_name.endswith(".tmp"):
+                if self.lazy:
+                    table = LazyTable(file_path, self.table_type);
+                else:
+                    table = read_table(file_path, self.table_type);
+                self.put(file_name, table);
+                self.__sizes[file_name] = os.path.getsize(file_path);
+                self.__saved[file_name] = (table, table.generation);
+    def __load_snapshot(self):
+        snapshot = Snapshot(self.snapshot_path, use_mmap=self.lazy);
+        snapshot.open();
+        for name in snapshot.names():
+            if self.lazy:
+                table = LazyTable(self.snapshot_path, self.table_type,
+                                  lambda name=name: snapshot.read(name));
+                self.__sources[name] = snapshot;
+            else:
+                table = self.table_type(snapshot.read(name));
+            self.put(name, table);
+            self.__sizes[name] = snapshot.size(name);
+            self.__saved[name] = (table, table.generation);
+        if not self.lazy:
+            snapshot.close();
+    def save(self):
+        """Saves the database to the database directory.
+        In journal mode this only makes sure the journal is on the disk.
+        """
+        if self.__journaling:
+            self.journal.sync();
+            return;
+        self.checkpoint();
+    def checkpoint(self):
+        """Writes the tables that changed since they were last written
+        to the database directory and empties the journal.
+        Each table is written to a temporary file first, so a crash
+        never leaves a half written table behind.
+        A table is pickled into memory before it's written, other threads
+        can't run in the middle of that, so they can keep using the tables.
+        With a single file every table is written to the snapshot when
+        one of them changed, the ones that were never read are copied
+        from the old snapshot without unpickling them.
+
+        Returns:
+            list: The names of the tables that were written.
+        """
+        if self.read_only:
+            return [];
+        with self.__checkpointing:
+            with self.__lock:
+                job = self.begin_checkpoint();
+                sizes = job.write();
+            self.finish_checkpoint(job, sizes);
+            return list(job.saved);
+    def begin_checkpoint(self, background=False):
+        """Takes the tables a checkpoint has to write and rotates the
+        journal, the changes made after this go to the new journal.
+        Only one checkpoint can be between its beginning and its end.
+
+        A job for the background can be written while the tables keep
+        changing, even by another process. A table whose every change since
+        it was last written is in the journal is read back from the last
+        checkpoint and brought up to date with the rotated journal when the
+        job is written. The others, e.g. the ones changed by `convert` or
+        before the first checkpoint, are pickled right away.
+        Any other job holds the tables themselves, so it has to be written
+        before they change again, like `checkpoint` does.
+        The writes to the tables hold the lock of the database until they
+        are journaled, see `Table.hold`, so the tables are taken and pickled
+        between two writes.
+
+        Args:
+            background (bool, optional): Whether the job is written while
+                the tables keep changing. Defaults to False.
+
+        Raises:
+            ValueError: If the database is read only.
+
+        Returns:
+            CheckpointJob: The job, see `finish_checkpoint`.
+        """
+        if self.read_only:
+            raise ValueError("The database is read only.");
+        with self.__lock:
+            current = {
+                name: (data, data.generation)
+                for name, data in self.snapshot().items()
+            };
+            deleted = [name for name in self.__saved if name not in current];
+            if self.snapshot_path is None:
+                changed = [
+                    name for name, saved in current.items()
+                    if self.__saved.get(name) != saved
+                ];
+            elif os.path.isfile(self.snapshot_path) and not deleted and all(
+                    self.__saved.get(name) == saved
+                    for name, saved in current.items()):
+                changed = [];
+            else:
+                changed = list(current);
+            tables = None if self.snapshot_path and not changed else {};
+            replayable = background and self.__journaling and (
+                self.snapshot_path is None
+                or os.path.isfile(self.snapshot_path));
+            rebuilt = [];
+            for name in changed:
+                (data, generation), source = current[name], self.__sources.get(name);
+                logged = self.__logged.get(name);
+                if replayable and (self.__saved.get(name) == current[name] or (
+                        logged is not None and data.unnotified <= logged)):
+                    rebuilt.append(name);
+                elif isinstance(data, LazyTable) and not data.loaded \
+                        and source is not None:
+                    payload, buffers = source.raw(name);
+                    tables[name] = (bytes(payload), [
+                        bytes(buffer) for buffer in buffers
+                    ]) if background else (payload, buffers);
+                elif background and self.snapshot_path is not None:
+                    tables[name] = Snapshot.dump(data.getData());
+                elif background:
+                    tables[name] = pickle.dumps(data.getData());
+                else:
+                    tables[name] = data.getData();
+                self.__logged[name] = generation;
+            job = CheckpointJob(self.path, tables, deleted, self.snapshot_path,
+                                rebuilt,
+                                self.journal.rotated_path if rebuilt else None);
+            job.saved = {name: current[name] for name in changed};
+            if self.journal is not None:
+                self.journal.rotate();
+            return job;
+    def finish_checkpoint(self, job, sizes):
+        """Flushes the attached stores, marks the tables of a job that was
+        written as saved and drops the journal it rotated.
+
+        Args:
+            job (CheckpointJob): The job, see `begin_checkpoint`.
+            sizes (dict): The bytes written for each table, see `CheckpointJob.write`.
+        """
+        # The stores take their own lock and then the database's to
+        # journal, so they're flushed without holding the database's.
+        for store in self.__stores.values():
+            store.flush();
+        with self.__lock:
+            self.__saved.update(job.saved);
+            self.__sizes.update(sizes);
+            for name in job.deleted:
+                self.__saved.pop(name, None);
+                self.__sizes.pop(name, None);
+            if self.journal is not None:
+                self.journal.drop_rotated();
+                self.__journaling = True;
+    def abort_checkpoint(self, job):
+        """Gives up on a job that couldn't be written, its rotated journal
+        is kept and its tables are pickled by the next job.
+
+        Args:
+            job (CheckpointJob): The job, see `begin_checkpoint`.
+        """
+        with self.__lock:
+            for name in job.saved:
+                self.__logged.pop(name, None);
+    @contextmanager
+    def checkpointing(self):
+        """Keeps any other checkpoint from running while it's held, take
+        it before `begin_checkpoint` and let go of it after `finish_checkpoint`.
+        """
+        with self.__checkpointing:
+            yield self;
+
+
+class CheckpointJob:
+    """The tables a checkpoint writes, taken from the database in one go
+    by `Database.begin_checkpoint` so they can be written while the
+    database keeps changing.
+
+    Args:
+        path (str): The database directory.
+        tables (dict): The entries of the tables to write by name, or the
+            tables already pickled, see `Snapshot.write`. None when
+            the snapshot doesn't have to be written.
+        deleted (list): The names of the tables whose files are removed.
+        snapshot_path (str, optional): The snapshot every table is written
+            to, the directory is used if None. Defaults to None.
+        rebuilt (list, optional): The names of the tables that are read
+            from the last checkpoint and brought up to date with the
+            journal at `journal_path` when they're written. Defaults to ().
+        journal_path (str, optional): The rotated journal. Defaults to None.
+    """
+    def __init__(self, path, tables, deleted, snapshot_path=None, rebuilt=(),
+                 journal_path=None):
+        self.path, self.tables, self.deleted = path, tables, deleted;
+        self.snapshot_path, self.saved = snapshot_path, {};
+        self.rebuilt, self.journal_path = rebuilt, journal_path;
+    def __getstate__(self):
+        # Only what's written goes to another process, not the live tables.
+        return {**self.__dict__, "saved": {}};
+    def __rebuild(self):
+        fresh, records = {}, {name: [] for name in self.rebuilt};
+        for name, action, key, val in Journal.records(self.journal_path):
+            if name is None and key in records:
+                fresh[key], records[key] = val, [];
+            elif name in records:
+                records[name].append((action, key, val));
+        snapshot, tables = None, {};
+        if self.snapshot_path is not None:
+            snapshot = Snapshot(self.snapshot_path);
+            snapshot.open();
+        for name, changes in records.items():
+            if name in fresh:
+                entries = fresh[name] or {};
+            elif snapshot is not None and not changes:
+                tables[name] = snapshot.raw(name);
+                continue;
+            elif snapshot is not None:
+                entries = snapshot.read(name);
+            elif os.path.isfile(os.path.join(self.path, name)):
+                with paused_gc(), open(os.path.join(self.path, name),
+                                       "rb") as file:
+                    entries = pickle.load(file);
+            else:
+                entries = {};
+            for action, key, val in changes:
+                if action == "put":
+                    entries[key] = val;
+                elif action == "delete":
+                    entries.pop(key, None);
+                elif entries.get(key) is not None:
+                    apply_changes(entries[key], val);
+            tables[name] = entries;
+        return tables;
+    def write(self):
+        """Writes the tables, each one to a temporary file that replaces
+        the old one once it's on the disk, and removes the deleted ones.
+
+        Returns:
+            dict: The bytes written for each table.
+        """
+        if self.tables is None:
+            return {};
+        tables = self.tables;
+        if self.rebuilt:
+            tables = {**tables, **self.__rebuild()};
+        if self.snapshot_path is not None:
+            return Snapshot.write(self.snapshot_path, tables);
+        if not os.path.exists(self.path):
+            os.makedirs(self.path);
+        sizes = {};
+        for name, entries in tables.items():
+            file_path = os.path.join(self.path, name);
+            dump = entries if isinstance(entries, bytes) else pickle.dumps(
+                entries);
+            with open(f"{file_path}.tmp", "wb") as file:
+                file.write(dump);
+                file.flush();
+                os.fsync(file.fileno());
+            sizes[name] = len(dump);
+        for name in tables:
+            file_path = os.path.join(self.path, name);
+            os.replace(f"{file_path}.tmp", file_path);
+        for name in self.deleted:
+            file_path = os.path.join(self.path, name);
+            if os.path.isfile(file_path):
+                os.remove(file_path);
+        return sizes;
+
+def json_default(obj):
+    """Turns what JSON can't hold into what it can, records into
+    dictionaries and other iterables like request queues into lists.
+
+    Args:
+        obj (anytype): The object.
+
+    Raises:
+        TypeError: If it can't be turned into JSON.
+
+    Returns:
+        anytype: What gets written instead.
+    """
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict();
+    if hasattr(obj, "__iter__"):
+        return list(obj);
+    raise TypeError(f"{type(obj).__name__} can't be written as JSON");
+
+def to_json(val):
+    """Encodes a value as compact JSON, see `json_default`.
+
+    Args:
+        val (anytype): The value.
+
+    Returns:
+        str: The JSON.
+    """
+    return json.dumps(val, default=json_default, separators=(",", ":"));
+
+def quote_name(name):
+    """Quotes the name of a SQLite table, column or index.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        str: The quoted name.
+    """
+    return '"' + name.replace('"', '""') + '"';
+
+class SqliteTable(Table):
+    """A table kept in a SQLite file instead of in memory, see `SqliteDatabase`.
+
+    Each entry is a row of its key and its value as JSON, the key column
+    is the primary key. Values are decoded when they are read and go through
+    the converter like in `Table.convert`. The values that were read or
+    written recently are kept in a row cache, so a value changed in place
+    and touched gets written like in `Table`. Touch it right after changing
+    it, a value that fell out of the cache before it was touched is read
+    again and only gets the changes given to `touch`.
+    The values given by `items`, `forEach`, `snapshot` and `getData` aren't
+    cached, `get` the value to change it.
+
+    Writes are held back until `batch_size` of them pile up, then they are
+    written in one transaction, `flush` writes them right away. Values with
+    writes held back stay in the cache until they are written. With a
+    `batch_size` of 1 every write is on the disk once it returns. Reads that
+    go through SQLite flush first, so they always see every write.
+    A secondary index is a column of the SQLite table with an SQLite index
+    on it, it's filled when it's created and kept up to date by the writes.
+
+    Args:
+        database (SqliteDatabase): The database it's in.
+        name (str): The name of the table.
+        batch_size (int, optional): The number of writes per transaction.
+            Defaults to 1000.
+        cache_rows (int, optional): The number of values in the row cache.
+            Defaults to 100000.
+    """
+    def __init__(self, database, name, batch_size=1000, cache_rows=100000):
+        super().__init__();
+        self.database, self.name = database, name;
+        self.batch_size, self.cache_rows = batch_size, cache_rows;
+        self.__table = quote_name(name);
+        self.__listeners, self.__indexes, self.__converter = [], {}, None;
+        self.__cache, self.__pending, self.__pending_owners = OrderedDict(), {}, {};
+        self.__lock = threading.RLock();
+    def create(self):
+        """Creates the SQLite table if it's not there yet.
+        """
+        self.database.connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {self.__table} "
+            "(key TEXT PRIMARY KEY NOT NULL, value TEXT NOT NULL)");
+    def listen(self, callback, changes=False):
+        """Registers a callback that gets called whenever an entry changes,
+        see `Table.listen`.
+        """
+        self.__listeners.append((callback, changes));
+    def __notify(self, action, key, val, changes=None):
+        self.generation += 1;
+        for listener, with_changes in self.__listeners:
+            if with_changes:
+                listener(action, key, val, changes);
+            else:
+                listener(action, key, val);
+    def __decode(self, text):
+        val = json.loads(text);
+        return val if self.__converter is None else self.__converter(val);
+    def __column(self, name):
+        return quote_name(f"index {name}");
+    def __index_keys(self, val):
+        keys = [];
+        for key_fn, _ in self.__indexes.values():
+            index_key = key_fn(val);
+            keys.append(None if index_key is None else to_json(index_key));
+        return tuple(keys);
+    def __remember(self, key, val):
+        cache = self.__cache;
+        cache[key] = val;
+        cache.move_to_end(key);
+        while len(cache) > self.cache_rows:
+            if next(iter(cache)) in self.__pending:
+                self.flush();
+            cache.popitem(last=False);
+    def __write(self, key, val):
+        index_keys = self.__index_keys(val);
+        self.__pending[key] = (to_json(val), index_keys);
+        for (name, (_, unique)), index_key in zip(self.__indexes.items(),
+                                                 index_keys):
+            if unique and index_key is not None:
+                self.__pending_owners.setdefault(name, {})[index_key] = key;
+        self.__remember(key, val);
+        if len(self.__pending) >= self.batch_size:
+            self.flush();
+    def flush(self):
+        """Writes the writes that were held back in one transaction.
+
+        Raises:
+            ValueError: If a value breaks a unique index.
+
+        Returns:
+            int: The number of rows written.
+        """
+        with self.__lock:
+            pending = self.__pending;
+            if not pending:
+                return 0;
+            columns = [self.__column(name) for name in self.__indexes];
+            names = ", ".join(["key", "value", *columns]);
+            updates = ", ".join(f"{column} = excluded.{column}"
+                                for column in ["value", *columns]);
+            puts = [(key, write[0], *write[1])
+                    for key, write in pending.items() if write is not None];
+            deletes = [(key, ) for key, write in pending.items() if write is None];
+            try:
+                with self.database.transaction() as connection:
+                    connection.executemany(
+                        f"DELETE FROM {self.__table} WHERE key = ?", deletes);
+                    connection.executemany(
+                        f"INSERT INTO {self.__table} ({names}) "
+                        f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+                        f"ON CONFLICT(key) DO UPDATE SET {updates}", puts);
+            except sqlite3.IntegrityError as err:
+                raise ValueError(str(err)) from err;
+            pending.clear();
+            self.__pending_owners.clear();
+            return len(puts) + len(deletes);
+    def getData(self):
+        """Reads every entry into a dictionary, changing the dictionary
+        doesn't change the table.
+
+        Returns:
+            dict: The entries.
+        """
+        return dict(self.items());
+    def snapshot(self):
+        """Reads every entry into a dictionary, see `Table.snapshot`.
+
+        Returns:
+            dict: The entries.
+        """
+        return dict(self.items());
+    def __prefix_range(self, prefix):
+        if prefix is None:
+            return "1", ();
+        return "key >= ? AND key < ?", (prefix, prefix + "\U0010ffff");
+    def items(self, prefix=None):
+        """Goes through the entries in the order they were added,
+        the table shouldn't change until it's done.
+
+        Args:
+            prefix (str, optional): Only the keys starting with it, every key if None.
+                Defaults to None.
+
+        Yields:
+            tuple: The key and the value of each entry.
+        """
+        self.flush();
+        where, params = self.__prefix_range(prefix);
+        rows = self.database.connection().execute(
+            f"SELECT key, value FROM {self.__table} WHERE {where} ORDER BY rowid",
+            params);
+        cache = self.__cache;
+        for key, text in rows:
+            val = cache.get(key);
+            yield key, self.__decode(text) if val is None else val;
+    def page(self, limit, after=None, prefix=None):
+        """Gets a page of entries in the order of their keys, see `Table.page`.
+        The page is read with the primary key index.
+
+        Returns:
+            list: The keys and values of the entries.
+        """
+        self.flush();
+        where, params = self.__prefix_range(prefix);
+        if after is not None:
+            where, params = f"{where} AND key > ?", (*params, after);
+        rows = self.database.connection().execute(
+            f"SELECT key, value FROM {self.__table} WHERE {where} "
+            "ORDER BY key LIMIT ?", (*params, limit));
+        return [(key, self.__decode(text)) for key, text in rows];
+    def listing(self, prefix=None):
+        """Pages through the entries with the primary key index, see `SqliteListing`.
+
+        Returns:
+            SqliteListing: The listing.
+        """
+        return SqliteListing(self, prefix);
+    def count(self, prefix=None):
+        """Counts the entries, see `Table.count`.
+
+        Returns:
+            int: The number of entries.
+        """
+        self.flush();
+        where, params = self.__prefix_range(prefix);
+        return self.database.connection().execute(
+            f"SELECT COUNT(*) FROM {self.__table} WHERE {where}",
+            params).fetchone()[0];
+    def get(self, key, default=None):
+        """Gets the value of an entry using a key, see `Table.get`.
+        """
+        with self.__lock:
+            cache = self.__cache;
+            if key in cache:
+                cache.move_to_end(key);
+                return cache[key];
+            write = self.__pending.get(key, False);
+            if write is None:
+                return default;
+            if write is False:
+                row = self.database.connection().execute(
+                    f"SELECT value FROM {self.__table} WHERE key = ?",
+                    (key, )).fetchone();
+                if row is None:
+                    return default;
+                text = row[0];
+            else:
+                text = write[0];
+            val = self.__decode(text);
+            self.__remember(key, val);
+            return val;
+    def __check(self, key, val):
+        for (name, (_, unique)), index_key in zip(self.__indexes.items(),
+                                                 self.__index_keys(val)):
+            if not unique or index_key is None:
+                continue;
+            owner = self.__pending_owners.get(name, {}).get(index_key);
+            if owner is not None and owner != key and self.__pending.get(
+                    owner) is not None and index_key in self.__pending[owner][1]:
+                raise ValueError(f"{json.loads(index_key)!r} already belongs to {owner!r}");
+            for (owner, ) in self.database.connection().execute(
+                    f"SELECT key FROM {self.__table} "
+                    f"WHERE {self.__column(name)} = ? AND key != ?",
+                (index_key, key)):
+                if owner not in self.__pending:
+                    raise ValueError(
+                        f"{json.loads(index_key)!r} already belongs to {owner!r}");
+    def put(self, key, val):
+        """Puts a new value in place of a key, see `Table.put`.
+
+        Raises:
+            ValueError: If the value breaks a unique index.
+        """
+        if self.__converter is not None:
+            val = self.__converter(val);
+        with self.writing():
+            with self.__lock:
+                self.__check(key, val);
+                self.__write(key, val);
+            self.__notify("put", key, val);
+    def delete(self, key):
+        """Deletes an entry using a key, see `Table.delete`.
+
+        Raises:
+            KeyError: If there is no entry with that key.
+        """
+        with self.writing():
+            with self.__lock:
+                if self.get(key) is None:
+                    raise KeyError(key);
+                self.__cache.pop(key, None);
+                self.__pending[key] = None;
+                if len(self.__pending) >= self.batch_size:
+                    self.flush();
+            self.__notify("delete", key, None);
+    def touch(self, key, changes=None):
+        """Writes a value that was changed in place, see `Table.touch`.
+        """
+        with self.writing():
+            with self.__lock:
+                cached = key in self.__cache;
+                val = self.get(key);
+                if val is not None and not cached and changes:
+                    apply_changes(val, changes);
+                if val is not None:
+                    self.__write(key, val);
+            self.__notify("touch", key, val, changes);
+    def __insert(self, rows):
+        columns = [self.__column(name) for name in self.__indexes];
+        names = ", ".join(["key", "value", *columns]);
+        updates = ", ".join(f"{column} = excluded.{column}"
+                            for column in ["value", *columns]);
+        self.database.connection().executemany(
+            f"INSERT INTO {self.__table} ({names}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+            f"ON CONFLICT(key) DO UPDATE SET {updates}",
+            ((key, to_json(val), *self.__index_keys(val)) for key, val in rows));
+    def fromCsv(self, key, csvFile):
+        """Read from a Csv file in one transaction, see `Table.fromCsv`.
+        """
+        rows = [];
+        csvFile.read(rows.append);
+        with self.__lock:
+            self.flush();
+            self.__cache.clear();
+            with self.database.transaction():
+                self.__insert((row[key], row) for row in rows);
+            self.generation += 1;
+    def fromCsvChunks(self, key, csvFile, size=10000, types=None, intern=()):
+        """Read from a Csv file a chunk at a time, one transaction per chunk,
+        see `Table.fromCsvChunks`.
+
+        Returns:
+            dict: The number of "rows" read, the "seconds" it took
+                and the "rows_per_second".
+        """
+        start, count = time.perf_counter(), 0;
+        with self.__lock:
+            self.flush();
+            self.__cache.clear();
+            for chunk in csvFile.readChunks(size, types, intern):
+                with self.database.transaction():
+                    self.__insert((row[key], row) for row in chunk);
+                count += len(chunk);
+            self.generation += 1;
+        seconds = time.perf_counter() - start;
+        return {
+            "rows": count,
+            "seconds": seconds,
+            "rows_per_second": count / seconds if seconds else 0.0
+        };
+    def convert(self, converter):
+        """Converts every value with a function, see `Table.convert`.
+        Values are stored as JSON, so they are converted when they are read
+        and nothing has to be written.
+
+        Args:
+            converter (function): Gets a value and returns the converted value.
+        """
+        with self.__lock:
+            self.__converter = converter;
+            self.__cache.clear();
+    def create_index(self, name, key_fn, unique=False):
+        """Creates a secondary index, see `Table.create_index`.
+        The column is only filled when it's added, so keep `key_fn` the same
+        between runs or drop the column when it changes.
+
+        Raises:
+            ValueError: If unique but an index key belongs to multiple entries.
+        """
+        with self.__lock:
+            self.flush();
+            column = self.__column(name);
+            connection = self.database.connection();
+            columns = {
+                row[1]
+                for row in connection.execute(
+                    f"PRAGMA table_info({self.__table})")
+            };
+            try:
+                with self.database.transaction():
+                    if f"index {name}" not in columns:
+                        connection.execute(
+                            f"ALTER TABLE {self.__table} ADD COLUMN {column} TEXT");
+                        keys = [];
+                        for key, text in connection.execute(
+                                f"SELECT key, value FROM {self.__table}"):
+                            index_key = key_fn(self.__decode(text));
+                            if index_key is not None:
+                                keys.append((to_json(index_key), key));
+                        connection.executemany(
+                            f"UPDATE {self.__table} SET {column} = ? WHERE key = ?",
+                            keys);
+                    connection.execute(
+                        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+                        f"{quote_name(f'{self.name} {name}')} "
+                        f"ON {self.__table} ({column})");
+            except sqlite3.IntegrityError as err:
+                raise ValueError(str(err)) from err;
+            self.__indexes[name] = (key_fn, unique);
+    def has_index(self, name):
+        """Whether there is an index with a name.
+
+        Args:
+            name (str): The name of the index.
+
+        Returns:
+            bool: Whether there is an index with that name.
+        """
+        return name in self.__indexes;
+    def find(self, name, index_key, limit=-1):
+        """Finds the values of the entries with an index key, see `Table.find`.
+
+        Args:
+            name (str): The name of the index.
+            index_key (anytype): The index key.
+            limit (int, optional): The most values to find, all if -1.
+                Defaults to -1.
+
+        Returns:
+            list: The values.
+        """
+        if name not in self.__indexes:
+            raise KeyError(name);
+        self.flush();
+        rows = self.database.connection().execute(
+            f"SELECT key, value FROM {self.__table} "
+            f"WHERE {self.__column(name)} = ? ORDER BY rowid LIMIT ?",
+            (to_json(index_key), limit)).fetchall();
+        found = [];
+        with self.__lock:
+            for key, text in rows:
+                val = self.__cache.get(key);
+                if val is None:
+                    val = self.__decode(text);
+                    self.__remember(key, val);
+                found.append(val);
+        return found;
+    def find_one(self, name, index_key, default=None):
+        """Finds the value of the first entry with an index key,
+        see `Table.find_one`.
+        """
+        found = self.find(name, index_key, 1);
+        return found[0] if found else default;
+    def forEach(self, callback):
+        """Calls a callback for each entry, see `Table.forEach`.
+
+        Args:
+            callback (function): The callback that gets called for each entry.
+        """
+        for key, val in self.items():
+            callback(key, val);
+    def __repr__(self):
+        return f"SqliteTable({self.name})";
+
+class SqliteStore:
+    """Lists of entries, one per owner, kept in a table of a `SqliteDatabase`
+    and used like a `PagedStore`. Every change is written in a transaction
+    of the database, so changes made in an outer `SqliteDatabase.transaction`
+    are committed or rolled back with the tables.
+    A page is numbered after the id of its first entry.
+
+    Args:
+        database (SqliteDatabase): The database.
+        name (str): The name of the store, its table is "store:" and the name.
+        page_size (int, optional): The number of entries in a page. Defaults to 64.
+    """
+    def __init__(self, database, name, page_size=64):
+        self.database, self.name, self.page_size = database, name, page_size;
+        self.__table = quote_name(f"store:{name}");
+        self.__lock, self.__listeners = threading.RLock(), [];
+        with database.transaction() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.__table} (id INTEGER "
+                "PRIMARY KEY AUTOINCREMENT, owner TEXT NOT NULL, page INTEGER, "
+                "entry BLOB NOT NULL)");
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS "
+                f"{quote_name(f'store:{name}:owner')} "
+                f"ON {self.__table} (owner, page)");
+    def listen(self, callback):
+        """Registers a callback that gets called whenever a list changes,
+        see `PagedStore.listen`.
+
+        Args:
+            callback (function): The callback.
+        """
+        self.__listeners.append(callback);
+    def __notify(self, action, owner, val):
+        for listener in self.__listeners:
+            listener(action, owner, val);
+    def append(self, owner, entry):
+        """Appends an entry to the end of an owner's list.
+
+        Args:
+            owner (str): The owner.
+            entry (anytype): The entry.
+
+        Returns:
+            str: The id of the entry.
+        """
+        blob = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL);
+        with self.__lock, self.database.transaction() as connection:
+            page_no = connection.execute(
+                f"SELECT MAX(page) FROM {self.__table} WHERE owner = ?",
+                (owner, )).fetchone()[0];
+            if page_no is not None and connection.execute(
+                    f"SELECT COUNT(*) FROM {self.__table} "
+                    "WHERE owner = ? AND page = ?",
+                (owner, page_no)).fetchone()[0] >= self.page_size:
+                page_no = None;
+            number = connection.execute(
+                f"INSERT INTO {self.__table} (owner, page, entry) "
+                "VALUES (?, ?, ?)", (owner, page_no, blob)).lastrowid;
+            if page_no is None:
+                page_no = number;
+                connection.execute(
+                    f"UPDATE {self.__table} SET page = ? WHERE id = ?",
+                    (page_no, number));
+            entry_id = f"{page_no}:{number}";
+            self.__notify("append", owner, (entry_id, entry));
+        return entry_id;
+    def delete(self, owner, entry_id):
+        """Deletes an entry of an owner by its id.
+
+        Args:
+            owner (str): The owner.
+            entry_id (str): The id of the entry.
+
+        Returns:
+            bool: True if it was deleted else False.
+        """
+        try:
+            page_no, number = (int(part) for part in entry_id.split(':', 1));
+        except ValueError:
+            return False;
+        with self.__lock, self.database.transaction() as connection:
+            deleted = connection.execute(
+                f"DELETE FROM {self.__table} "
+                "WHERE id = ? AND owner = ? AND page = ?",
+                (number, owner, page_no)).rowcount > 0;
+            if deleted:
+                self.__notify("delete", owner, entry_id);
+        return deleted;
+    def clear(self, owner):
+        """Deletes every entry of an owner.
+
+        Args:
+            owner (str): The owner.
+        """
+        with self.__lock, self.database.transaction() as connection:
+            connection.execute(f"DELETE FROM {self.__table} WHERE owner = ?",
+                               (owner, ));
+            self.__notify("clear", owner, None);
+    def pages(self, owner):
+        """Gets the pages of an owner, oldest first.
+
+        Args:
+            owner (str): The owner.
+
+        Returns:
+            list: The page numbers, empty if the owner has no entries.
+        """
+        return [
+            page_no for (page_no, ) in self.database.connection().execute(
+                f"SELECT DISTINCT page FROM {self.__table} WHERE owner = ? "
+                "ORDER BY page", (owner, ))
+        ];
+    def read(self, page_no):
+        """Reads the entries on a page.
+
+        Args:
+            page_no (int): The page number.
+
+        Returns:
+            list: The pairs of entry id and entry, oldest first.
+        """
+        return [(f"{page_no}:{number}", pickle.loads(blob))
+                for number, blob in self.database.connection().execute(
+                    f"SELECT id, entry FROM {self.__table} WHERE page = ? "
+                    "ORDER BY id", (page_no, ))];
+    def entries(self, owner):
+        """Goes through the entries of an owner, reading a page at a time.
+
+        Args:
+            owner (str): The owner.
+
+        Yields:
+            tuple: The entry id and the entry, oldest first.
+        """
+        for page_no in self.pages(owner):
+            yield from self.read(page_no);
+    def flush(self):
+        """Does nothing, every change is written when it's made.
+        """
+
+class SqliteDatabase(Table):
+    """The database kept in one SQLite file next to the database directory,
+    a table of `SqliteTable`s that is used like `Database`. Nothing has to
+    be held in memory besides the row caches, and every batch of writes is
+    on the disk once its transaction is done.
+    Every thread gets its own connection, the file is in WAL mode so
+    readers don't wait for a writer.
+
+    Args:
+        path (str, optional): The database directory, the file is this
+            path with `.sqlite` added. Defaults to "./database".
+        batch_size (int, optional): See `SqliteTable`. Defaults to 1000.
+        cache_rows (int, optional): See `SqliteTable`. Defaults to 100000.
+        cache_kib (int, optional): The size of the SQLite page cache of each
+            connection in KiB. Defaults to 65536.
+    """
+    def __init__(self, path="./database", batch_size=1000, cache_rows=100000,
+                 cache_kib=1 << 16):
+        super().__init__();
+        self.path, self.file_path = path, f"{path}.sqlite";
+        self.batch_size, self.cache_rows = batch_size, cache_rows;
+        self.cache_kib = cache_kib;
+        self.__local, self.__connections = threading.local(), [];
+        self.__lock, self.__stores = threading.Lock(), [];
+    def connection(self):
+        """Gets the connection of this thread, it's opened on first use.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        connection = getattr(self.__local, "connection", None);
+        if connection is None:
+            # Only this thread uses it, other threads only close it.
+            connection = sqlite3.connect(self.file_path,
+                                         isolation_level=None,
+                                         check_same_thread=False);
+            connection.execute("PRAGMA journal_mode = WAL");
+            connection.execute("PRAGMA synchronous = NORMAL");
+            connection.execute(f"PRAGMA cache_size = {-self.cache_kib}");
+            self.__local.connection = connection;
+            with self.__lock:
+                self.__connections.append(connection);
+        return connection;
+    @contextmanager
+    def transaction(self):
+        """Runs what's inside in one transaction of this thread's
+        connection, it's rolled back if an exception is raised.
+
+        Yields:
+            sqlite3.Connection: The connection.
+        """
+        connection = self.connection();
+        if connection.in_transaction:
+            yield connection;
+            return;
+        connection.execute("BEGIN IMMEDIATE");
+        try:
+            yield connection;
+        except BaseException:
+            connection.execute("ROLLBACK");
+            raise;
+        connection.execute("COMMIT");
+    def __table(self, name):
+        table = SqliteTable(self, name, self.batch_size, self.cache_rows);
+        table.create();
+        return table;
+    def add_table(self, name):
+        """Add a table to the database
+
+        Args:
+            name (str): The name of the table.
+
+        Returns:
+            SqliteTable: The newly added table.
+        """
+        table = self.__table(name);
+        super().put(name, table);
+        return table;
+    def attach(self, name, store):
+        """Keeps a store that isn't a table in step with the tables, see
+        `Database.attach`. There's no journal, so the store is flushed
+        whenever it changes if every write is its own transaction,
+        else at every checkpoint.
+
+        Args:
+            name (str): The name of the store.
+            store (PagedStore): The store.
+        """
+        self.__stores.append(store);
+        if self.batch_size <= 1:
+            store.listen(lambda action, key, val: store.flush());
+    def open_store(self, name, page_size=64, cache_pages=256):
+        """Opens a store of lists of entries in the SQLite file, see `SqliteStore`.
+        Its changes are written with the tables, in the same transactions.
+
+        Args:
+            name (str): The name of the store.
+            page_size (int, optional): The number of entries in a page. Defaults to 64.
+            cache_pages (int, optional): Not used, SQLite caches the pages
+                itself, see `cache_kib`. Defaults to 256.
+
+        Returns:
+            SqliteStore: The store.
+        """
+        return SqliteStore(self, name, page_size);
+    def put(self, name, table):
+        """Puts a table in the database, a table that isn't in this
+        database is copied into a new one.
+
+        Args:
+            name (str): The name of the table.
+            table (Table): The table.
+        """
+        if not isinstance(table, SqliteTable) or table.database is not self:
+            entries = table.items() if isinstance(table, Table) else ();
+            if self.get(name) is not None:
+                self.delete(name);
+            table = self.__table(name);
+            with self.transaction():
+                for key, val in entries:
+                    table.put(key, val);
+                table.flush();
+        super().put(name, table);
+    def delete(self, name):
+        """Deletes a table and its SQLite table.
+
+        Args:
+            name (str): The name of the table.
+        """
+        super().delete(name);
+        self.connection().execute(f"DROP TABLE IF EXISTS {quote_name(name)}");
+    def load(self):
+        """Opens the tables in the SQLite file.
+
+        Returns:
+            bool: True if succeeded, False if there is no file yet
+                or it has no tables.
+        """
+        if not os.path.isfile(self.file_path):
+            return False;
+        names = self.connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'store:%'"
+        ).fetchall();
+        for (name, ) in names:
+            super().put(name, SqliteTable(self, name, self.batch_size,
+                                          self.cache_rows));
+        return bool(names);
+    def save(self):
+        """Writes the writes that were held back, see `checkpoint`.
+        """
+        self.checkpoint();
+    def checkpoint(self):
+        """Writes the writes that were held back in every table
+        and flushes the attached stores.
+
+        Returns:
+            list: The names of the tables that had writes.
+        """
+        written = [
+            name for name, table in self.snapshot().items() if table.flush()
+        ];
+        for store in self.__stores:
+            store.flush();
+        return written;
+    def close(self):
+        """Writes what was held back and closes every connection.
+        """
+        self.checkpoint();
+        with self.__lock:
+            for connection in self.__connections:
+                connection.close();
+            self.__connections.clear();
+        self.__local = threading.local();
+
+
+def write_job(job, pipe):
+    """Writes a checkpoint job in the process `Checkpointer` starts for it
+    and sends back the sizes written or the error.
+
+    Args:
+        job (CheckpointJob): The job.
+        pipe (multiprocessing.connection.Connection): Where to send it.
+    """
+    try:
+        reply = (True, job.write());
+    except Exception as err:
+        reply = (False, f"{type(err).__name__}: {err}");
+    with pipe:
+        try:
+            pipe.send(reply);
+        except OSError:
+            pass;  # The app is gone, the next run replays its journal.
+
+
+class Checkpointer:
+    """Checkpoints a database in the background every interval seconds,
+    or sooner once its journal gets too big, while other threads keep
+    changing the tables.
+
+    The tables are only held still while `Database.begin_checkpoint`
+    takes them for the background. The tables that changed are then read
+    back from the last checkpoint and brought up to date with the rotated
+    journal, so the live tables are never read while they change. That
+    is done by the thread, or by a separate process started with spawn
+    so it doesn't hold the GIL of the app, the process is never forked
+    from this thread. A database without `begin_checkpoint`, e.g.
+    `SqliteDatabase`, is checkpointed by the thread.
+
+    Args:
+        database (Database): The database.
+        interval (float, optional): Seconds between checkpoints. Defaults to 60.
+        process (bool, optional): Whether to write in a separate process.
+            Defaults to False.
+        history (int, optional): The number of checkpoints kept in `metrics`.
+            Defaults to 100.
+    """
+    def __init__(self, database, interval=60, process=False, history=100):
+        self.database, self.interval, self.process = database, interval, process;
+        self.metrics = deque(maxlen=history);
+        self.__wake, self.__stop = threading.Event(), threading.Event();
+        self.__thread = None;
+    def start(self):
+        """Starts checkpointing, the database wakes the checkpointer up
+        instead of checkpointing itself when its journal gets too big.
+        """
+        if self.__thread is not None:
+            return;
+        self.__stop.clear();
+        self.database.checkpointer = self;
+        self.__thread = threading.Thread(target=self.__run,
+                                         name="checkpointer",
+                                         daemon=True);
+        self.__thread.start();
+    def wake(self):
+        """Asks for a checkpoint now instead of at the end of the interval.
+        """
+        self.__wake.set();
+    def stop(self):
+        """Stops checkpointing once the checkpoint being written is done.
+        """
+        if self.__thread is None:
+            return;
+        self.__stop.set();
+        self.__wake.set();
+        self.__thread.join();
+        self.__thread = None;
+        if self.database.checkpointer is self:
+            self.database.checkpointer = None;
+    def __run(self):
+        while True:
+            self.__wake.wait(self.interval);
+            self.__wake.clear();
+            if self.__stop.is_set():
+                break;
+            self.run_once();
+    def run_once(self):
+        """Writes one checkpoint, an error is kept in its metrics and the
+        rotated journal is kept until a later checkpoint succeeds.
+
+        Returns:
+            dict: Its metrics, when it started, the milliseconds the tables
+                were held still and that it took, the bytes and names of
+                the tables written and the error if it failed.
+        """
+        metric = {
+            "started": time.time(),
+            "pause_ms": 0.0,
+            "duration_ms": 0.0,
+            "bytes": 0,
+            "tables": [],
+            "error": None
+        };
+        start = time.perf_counter();
+        try:
+            if not hasattr(self.database, "begin_checkpoint"):
+                metric["tables"] = self.database.checkpoint();
+                metric["pause_ms"] = (time.perf_counter() - start) * 1000;
+            else:
+                with self.database.checkpointing():
+                    job = self.database.begin_checkpoint(background=True);
+                    metric["pause_ms"] = (time.perf_counter() - start) * 1000;
+                    try:
+                        if not (job.tables or job.deleted or job.rebuilt):
+                            sizes = {};
+                        elif self.process:
+                            sizes = self.__write_in_process(job);
+                        else:
+                            sizes = job.write();
+                    except BaseException:
+                        self.database.abort_checkpoint(job);
+                        raise;
+                    self.database.finish_checkpoint(job, sizes);
+                metric["tables"], metric["bytes"] = list(job.saved), sum(sizes.values());
+        except Exception as err:  # the thread has to keep going
+            metric["error"] = f"{type(err).__name__}: {err}";
+        metric["duration_ms"] = (time.perf_counter() - start) * 1000;
+        self.metrics.append(metric);
+        return metric;
+    @staticmethod
+    def __write_in_process(job):
+        context = multiprocessing.get_context("spawn");
+        reader, writer = context.Pipe(duplex=False);
+        # A new process each time, so none is left behind if the app dies.
+        child = context.Process(target=write_job,
+                                args=(job, writer),
+                                name="checkpoint",
+                                daemon=True);
+        child.start();
+        writer.close();
+        try:
+            done, result = reader.recv();
+        except EOFError:
+            done, result = False, "the checkpoint process died";
+        finally:
+            reader.close();
+            child.join();
+        if not done:
+            raise OSError(result);
+        return result;
+    def stats(self):
+        """Sums up the checkpoints in `metrics`.
+
+        Returns:
+            dict: The number of checkpoints and of errors, the last one, and
+                the mean and longest pause and duration in milliseconds.
         """
-        if not os.path.exists("./database"):
-            os.makedirs("./database")
-        for name, data in self.getData().items():
-            with open(f"./database/{name}", "wb") as file:
-                pickle.dump(data.getData(), file)
+        metrics = list(self.metrics);
+        pauses = [metric["pause_ms"] for metric in metrics] or [0.0];
+        durations = [metric["duration_ms"] for metric in metrics] or [0.0];
+        return {
+            "interval": self.interval,
+            "process": self.process,
+            "checkpoints": len(metrics),
+            "errors": sum(metric["error"] is not None for metric in metrics),
+            "last": metrics[-1] if metrics else None,
+            "mean_pause_ms": sum(pauses) / len(pauses),
+            "max_pause_ms": max(pauses),
+            "mean_duration_ms": sum(durations) / len(durations),
+            "max_duration_ms": max(durations)
+        };
@@ -2,9 +2,16 @@
 The project management module.
 """
 from hashlib import sha256
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import heapq
 import secrets
+import shlex
+import sys
 import json
-from database import Database, CsvFile
+from itertools import islice
+from database import Database, SqliteDatabase, Checkpointer, CsvFile, Relation, LruCache, Table, LazyTable
+from records import Person, Login, Project, Message, RequestQueue
 
 
 class Role:
@@ -17,40 +24,666 @@ class Role:
     Admin = 4
 
 
+class Link:
+    """The kinds of links between users and projects
+    """
+    Lead = "lead"
+    Member = "member"
+    Advisor = "advisor"
+    Joined = "joined"
+    Invited = "invited"
+    AdvisorRequest = "advisor request"
+    ApprovalRequest = "approval request"
+    Evaluator = "evaluator"
+
+
+# The lists in the people table that hold project ids and the links they make.
+USER_LINKS = {
+    "projs": Link.Joined,
+    "invs": Link.Invited,
+    "adv_reqs": Link.AdvisorRequest,
+    "apr_reqs": Link.ApprovalRequest,
+    "eval_projs": Link.Evaluator
+}
+PROJECT_LINKS = {Link.Lead, Link.Member, Link.Advisor}
+
+
+class ActionError(Exception):
+    """Raised when an operation of the manage app can't be done,
+    the message is meant to be shown to the user.
+    """
+
+
+def describe(obj):
+    """Describes what can't be written as JSON, e.g. a table.
+
+    Args:
+        obj (any): The object.
+
+    Returns:
+        any: The fields of a record, the items of a request queue,
+            else the name of its type in angle brackets, a table that
+            isn't loaded yet stays unloaded.
+    """
+    if isinstance(obj, (Table, LazyTable)):
+        return f"<{type(obj).__name__}>"
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, RequestQueue):
+        return list(obj)
+    return f"<{type(obj).__name__}>"
+
+
+JSON_ENCODER = json.JSONEncoder(default=describe)
+
+
+def write_json(value, file=None):
+    """Writes a value as JSON a piece at a time, so a big value is never
+    held in memory as one string.
+
+    Args:
+        value (any): The value.
+        file (file, optional): Where to write it, stdout if None. Defaults to None.
+    """
+    file = sys.stdout if file is None else file
+    for chunk in JSON_ENCODER.iterencode(value):
+        file.write(chunk)
+
+
+def format_name(user_data):
+    """Formats the full name of a user.
+
+    Args:
+        user_data (dict): The user data, None if the user isn't found.
+
+    Returns:
+        str: First name followed by last name or `Unknown`.
+    """
+    if user_data is None:
+        return "Unknown"
+    return f"{user_data.first} {user_data.last}"
+
+
+def format_summary(project):
+    """Formats the one line summary of a project.
+
+    Args:
+        project (dict): The project, None if the project isn't found.
+
+    Returns:
+        str: The project name followed by its id or `[DELETED PROJECT]`.
+    """
+    if project is None:
+        return "[DELETED PROJECT]"
+    return f"{project.name} ({project.id})"
+
+
+SELECT_HINT = "Pick many with `1-3`, `0,2`, `all` or `/text` for the lines with it."
+
+
+def select_indexes(text, labels):
+    """Turns what the user typed into the indexes of the lines it selects.
+    That's `all`, an index, a range like `1-3`, indexes and ranges separated
+    by commas like `0,2-4` or `/text` for the lines containing the text,
+    ignoring case.
+
+    Args:
+        text (str): What the user typed.
+        labels (list): The lines shown to the user.
+
+    Raises:
+        ValueError: If the text isn't a selection.
+        IndexError: If an index is out of bounds.
+
+    Returns:
+        list: The selected indexes in order, without repeats.
+    """
+    text = text.strip()
+    if text == "all":
+        return list(range(len(labels)))
+    if text.startswith('/'):
+        needle = text[1:].lower()
+        return [
+            idx for idx, label in enumerate(labels) if needle in label.lower()
+        ]
+    indexes = {}
+    for part in text.split(','):
+        start, sep, end = part.partition('-')
+        start = int(start)
+        end = int(end) if sep else start
+        if start > end:
+            raise ValueError(f"{part} is an empty range")
+        if end >= len(labels):
+            raise IndexError(end)
+        indexes.update(dict.fromkeys(range(start, end + 1)))
+    return list(indexes)
+
+
+def hash_password(password, salt=None):
+    """Hashes a password with a salt.
+
+    Args:
+        password (str): The password.
+        salt (str, optional): The 4 character salt, a random one is made if None.
+            Defaults to None.
+
+    Returns:
+        str: The salt followed by the hex digest.
+    """
+    if salt is None:
+        salt = ''.join(chr(0x20 + secrets.randbelow(95)) for _ in range(4))
+    return salt + sha256((password + salt).encode()).hexdigest()
+
+
+def make_login_entries(rows):
+    """Turns rows of login.csv into login entries with hashed passwords.
+
+    Args:
+        rows (list): The rows of login.csv.
+
+    Returns:
+        list: The pairs of username and login entry.
+    """
+    return [(row['username'],
+             Login(
+                 row['ID'], row['username'], hash_password(row['password']), {
+                     "student": Role.Member,
+                     "faculty": Role.Faculty,
+                     "admin": Role.Admin,
+                 }[row["role"]])) for row in rows]
+
+
+def hash_logins(login_table, workers=1, batch_size=10000):
+    """Replaces the rows of login.csv in the login table with login entries,
+    hashing is done in batches across a pool of processes.
+
+    Args:
+        login_table (Table): The login table filled with the rows of login.csv.
+        workers (int, optional): The number of processes, hashing is done
+            in this process if it is 1. Defaults to 1.
+        batch_size (int, optional): The number of rows sent to a process
+            at once. Defaults to 10000.
+    """
+    rows = list(login_table.getData().values())
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    if workers <= 1:
+        for entries in map(make_login_entries, batches):
+            for key, entry in entries:
+                login_table.put(key, entry)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        for entries in pool.map(make_login_entries, batches):
+            for key, entry in entries:
+                login_table.put(key, entry)
+
+
+class EvaluatorScheduler:
+    """Keeps the faculty in a heap keyed by the number of projects they're
+    evaluating, so the least busy ones are found in O(log F).
+    Entries that are out of date are left in the heap and skipped when
+    they come up, the heap is rebuilt once too many of them pile up.
+    """
+    def __init__(self):
+        self.__heap, self.__loads = [], {}
+
+    def __contains__(self, faculty_id):
+        return faculty_id in self.__loads
+
+    def __len__(self):
+        return len(self.__loads)
+
+    def update(self, faculty_id, load):
+        """Sets the number of projects a faculty is evaluating.
+
+        Args:
+            faculty_id (str): The faculty id.
+            load (int): The number of projects, None to stop scheduling them.
+        """
+        if load is None:
+            self.__loads.pop(faculty_id, None)
+            return
+        if self.__loads.get(faculty_id) == load:
+            return
+        self.__loads[faculty_id] = load
+        heapq.heappush(self.__heap, (load, faculty_id))
+        if len(self.__heap) > 2 * len(self.__loads) + 64:
+            self.__heap = [(load, faculty_id)
+                           for faculty_id, load in self.__loads.items()]
+            heapq.heapify(self.__heap)
+
+    def load(self, faculty_id):
+        """Gets the number of projects a faculty is evaluating.
+
+        Args:
+            faculty_id (str): The faculty id.
+
+        Returns:
+            int: The number of projects, None if they aren't scheduled.
+        """
+        return self.__loads.get(faculty_id)
+
+    def pick(self, count, exclude=(), valid=None):
+        """Picks the least busy faculty, the heap is left as it was.
+
+        Args:
+            count (int): The number of faculty to pick.
+            exclude (set, optional): The faculty ids to skip. Defaults to ().
+            valid (function, optional): Called with a faculty id, the ones it
+                returns False for are no longer scheduled. Defaults to None.
+
+        Returns:
+            list: The faculty ids, fewer than count if there aren't enough.
+        """
+        heap, loads = self.__heap, self.__loads
+        picked, popped, seen = [], [], set()
+        while len(picked) < count and heap:
+            load, faculty_id = heapq.heappop(heap)
+            if loads.get(faculty_id) != load or faculty_id in seen:
+                continue
+            seen.add(faculty_id)
+            if valid is not None and not valid(faculty_id):
+                del loads[faculty_id]
+                continue
+            popped.append((load, faculty_id))
+            if faculty_id not in exclude:
+                picked.append(faculty_id)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return picked
+
+
+class Compactor:
+    """Removes the ids of deleted projects and repeated ids from the lists
+    in the people table and from the evaluation list. It goes through the
+    people a chunk at a time, so it can run in between other operations,
+    and only touches the rows it changed.
+
+    Args:
+        app (ManageApp): The manage app.
+        chunk_size (int, optional): The number of people per step.
+            Defaults to 1000.
+    """
+    def __init__(self, app, chunk_size=1000):
+        self.app, self.chunk_size = app, chunk_size
+        self.report = {"rows": 0, "dangling": 0, "duplicates": 0}
+        self.__user_ids = iter(app.people_table.snapshot())
+
+    def __compact(self, ids):
+        projects_table, report = self.app.projects_table, self.report
+        kept, seen = [], set()
+        for project_id in ids:
+            if project_id in seen:
+                report["duplicates"] += 1
+            elif projects_table.get(project_id) is None:
+                report["dangling"] += 1
+            else:
+                kept.append(project_id)
+            seen.add(project_id)
+        if len(kept) == len(ids):
+            return False
+        ids.clear()
+        ids.extend(kept)
+        return True
+
+    def step(self):
+        """Compacts the next chunk of people, the evaluation list is
+        compacted after the last one.
+
+        Returns:
+            bool: True if there are people left else False.
+        """
+        people_table, count = self.app.people_table, 0
+        for user_id in islice(self.__user_ids, self.chunk_size):
+            count += 1
+            user_data = people_table.get(user_id)
+            if user_data is None:
+                continue
+            changed = False
+            for field in USER_LINKS:
+                ids = user_data.get(field)
+                if ids and self.__compact(ids):
+                    changed = True
+            if changed:
+                self.report["rows"] += 1
+                people_table.touch(user_id)
+        if count == self.chunk_size:
+            return True
+        evaluation_list = self.app.evaluation_list
+        if evaluation_list and self.__compact(evaluation_list):
+            self.report["rows"] += 1
+            self.app.documents_table.touch("evaluation list")
+        return False
+
+    def run(self):
+        """Compacts everything at once.
+
+        Returns:
+            dict: The number of rows changed and of "dangling" and
+                "duplicates" ids removed.
+        """
+        while self.step():
+            pass
+        return self.report
+
+
 class ManageApp:
     """The manage app.
+
+    Args:
+        hash_workers (int, optional): The number of processes used to hash
+            the passwords on the first run. Defaults to 1.
+        single_file (bool, optional): Whether to keep the database in one
+            snapshot file, see `Database`. Defaults to False.
+        sqlite (bool, optional): Whether to keep the database in a SQLite
+            file instead, see `SqliteDatabase`. Every write is committed
+            on its own, so it's on the disk once it returns. Defaults to False.
+        read_only (bool, optional): Whether to leave the database as it is,
+            the changes are only kept in memory, see `Database`. It can't be
+            used with SQLite. Defaults to False.
+
+    Raises:
+        ValueError: If read only with SQLite.
     """
-    def __init__(self):
-        self.main_database = Database()
-        if self.main_database.load():
-            self.people_table = self.main_database.get("people")
-            self.login_table = self.main_database.get("login")
-            self.projects_table = self.main_database.get("projects")
-            self.documents_table = self.main_database.get("documents")
+    def __init__(self,
+                 hash_workers=1,
+                 single_file=False,
+                 sqlite=False,
+                 read_only=False):
+        if sqlite and read_only:
+            raise ValueError("A SQLite database can't be read only.")
+        if sqlite:
+            self.main_database = SqliteDatabase(batch_size=1)
+        else:
+            self.main_database = Database(lazy=True,
+                                          journal=True,
+                                          single_file=single_file,
+                                          read_only=read_only)
+        self.inbox = self.main_database.open_store("inbox")
+        if not self.main_database.load():
+            self.bootstrap(hash_workers)
+        self.people_table = self.main_database.get("people")
+        self.login_table = self.main_database.get("login")
+        self.projects_table = self.main_database.get("projects")
+        self.documents_table = self.main_database.get("documents")
+        self.people_table.convert(Person.migrate)
+        self.login_table.convert(Login.migrate)
+        self.projects_table.convert(Project.migrate)
+        self.login_table.create_index("id",
+                                      lambda entry: entry.get("id"),
+                                      unique=True)
+        self.login_table.create_index("role", lambda entry: entry.get("role"))
+        self.__relations, self.__scheduler = None, None
+        self.people_table.listen(
+            lambda action, key, val, changes: self.__on_change(
+                self.__link_user, action, key, val, changes),
+            changes=True)
+        self.projects_table.listen(
+            lambda action, key, val, changes: self.__on_change(
+                self.__link_project, action, key, val, changes),
+            changes=True)
+        self.name_cache, self.summary_cache = LruCache(), LruCache()
+        self.info_cache = LruCache()
+        self.people_table.listen(self.__on_person_change)
+        self.projects_table.listen(self.__on_project_change)
+        self.login_table.listen(self.__on_login_change)
+        self.checkpointer = None
+
+    def bootstrap(self, hash_workers=1):
+        """Creates the tables from persons.csv and login.csv and saves them.
+        It's all one transaction of the database, so in SQLite a crash
+        leaves nothing behind.
+
+        Args:
+            hash_workers (int, optional): The number of processes used to hash
+                the passwords. Defaults to 1.
+        """
+        with self.main_database.transaction():
+            self.__bootstrap(hash_workers)
+
+    def __bootstrap(self, hash_workers):
+        people_table = self.main_database.add_table("people")
+        people_table.fromCsvChunks("ID",
+                                   CsvFile("./persons.csv"),
+                                   intern=("type", ))
+        login_table = self.main_database.add_table("login")
+        login_table.fromCsvChunks("username",
+                                  CsvFile("./login.csv"),
+                                  intern=("role", ))
+        hash_logins(login_table, hash_workers)
+        self.main_database.add_table("projects")
+        self.main_database.add_table("documents")
+        self.main_database.checkpoint()
+
+    @property
+    def relations(self):
+        """The links between users and projects, built on first use
+        and then kept up to date whenever a person or project changes.
+
+        Returns:
+            Relation: The relation with user ids on the left
+                and project ids on the right.
+        """
+        if self.__relations is None:
+            self.__relations = Relation()
+            self.people_table.forEach(self.__link_user)
+            self.projects_table.forEach(self.__link_project)
+        return self.__relations
+
+    def __on_change(self, link, action, key, val, changes=None):
+        if self.__relations is not None:
+            link(key, None if action == "delete" else val, changes)
+
+    def __on_person_change(self, action, user_id, user_data):
+        if self.__scheduler is not None and user_id in self.__scheduler:
+            self.__scheduler.update(
+                user_id, None if user_data is None else
+                len(user_data.get("eval_projs") or ()))
+        name = self.name_cache.invalidate(user_id)
+        if not self.info_cache or (action != "delete"
+                                   and name == format_name(user_data)):
             return
-        self.people_table = self.main_database.add_table("people")
-        self.people_table.fromCsv("ID", CsvFile("./persons.csv"))
-        self.login_table = self.main_database.add_table("login")
-        self.login_table.fromCsv("username", CsvFile("./login.csv"))
-        for key, val in self.login_table.getData().items():
-            salt = ''.join(chr(0x20 + secrets.randbelow(95)) for _ in range(4))
-            self.login_table.put(
-                key, {
-                    "id":
-                    val['ID'],
-                    "username":
-                    val['username'],
-                    "password":
-                    salt + sha256(
-                        (val['password'] + salt).encode()).hexdigest(),
-                    "role": {
-                        "student": Role.Member,
-                        "faculty": Role.Faculty,
-                        "admin": Role.Admin,
-                    }[val["role"]]
-                })
-        self.projects_table = self.main_database.add_table("projects")
-        self.documents_table = self.main_database.add_table("documents")
+        for project_id in self.get_user_project_ids(user_id):
+            self.info_cache.invalidate(project_id)
+
+    def __on_login_change(self, action, username, login_data):
+        if self.__scheduler is None or login_data is None:
+            return
+        user_data = self.people_table.get(login_data.id)
+        if user_data is None or login_data.role not in {
+                Role.Faculty, Role.Advisor
+        }:
+            self.__scheduler.update(login_data.id, None)
+        else:
+            self.__scheduler.update(login_data.id,
+                                    len(user_data.get("eval_projs") or ()))
+
+    def __on_project_change(self, action, project_id, project):
+        self.summary_cache.invalidate(project_id)
+        self.info_cache.invalidate(project_id)
+
+    @property
+    def scheduler(self):
+        """The faculty that can evaluate projects keyed by how many
+        they're evaluating, built on first use and then kept up to date
+        whenever a person or login changes.
+
+        Returns:
+            EvaluatorScheduler: The scheduler.
+        """
+        if self.__scheduler is None:
+            scheduler = EvaluatorScheduler()
+            for role in (Role.Faculty, Role.Advisor):
+                for login_data in self.get_logins_with_role(role):
+                    user_data = self.people_table.get(login_data.id)
+                    if user_data is not None:
+                        scheduler.update(
+                            login_data.id,
+                            len(user_data.get("eval_projs") or ()))
+            self.__scheduler = scheduler
+        return self.__scheduler
+
+    def __can_evaluate(self, faculty_id):
+        login_data = self.get_login_from_data(
+            self.people_table.get(faculty_id))
+        return login_data is not None and login_data.role in {
+            Role.Faculty, Role.Advisor
+        }
+
+    def __link_user(self, user_id, user_data, changes=None):
+        relations = self.__relations
+        if changes is not None and user_data is not None:
+            for op, field, arg in changes:
+                kind = USER_LINKS.get(field)
+                if kind is None:
+                    continue
+                if op == "add":
+                    relations.link(user_id, arg, kind)
+                elif op == "remove":
+                    if arg not in (user_data.get(field) or ()):
+                        relations.unlink(user_id, arg, kind)
+                else:
+                    for project_id in relations.get_rights(user_id, kind):
+                        relations.unlink(user_id, project_id, kind)
+                    for project_id in arg or ():
+                        relations.link(user_id, project_id, kind)
+            return
+        wanted = set() if user_data is None else {
+            (project_id, kind)
+            for field, kind in USER_LINKS.items()
+            for project_id in user_data.get(field) or ()
+        }
+        linked = {
+            link
+            for link in relations.left_links(user_id)
+            if link[1] not in PROJECT_LINKS
+        }
+        for project_id, kind in linked - wanted:
+            relations.unlink(user_id, project_id, kind)
+        for project_id, kind in wanted - linked:
+            relations.link(user_id, project_id, kind)
+
+    def __link_project(self, project_id, project, changes=None):
+        kinds = PROJECT_LINKS
+        if changes is not None and project is not None:
+            fields = {field for _, field, _ in changes}
+            kinds = ({Link.Lead, Link.Member} if "members" in fields else
+                     set()) | ({Link.Advisor} if "advisor" in fields else set())
+            if not kinds:
+                return
+        relations = self.__relations
+        for user_id, kind in [
+                link for link in relations.right_links(project_id)
+                if link[1] in kinds
+        ]:
+            relations.unlink(user_id, project_id, kind)
+        if project is None:
+            return
+        if Link.Lead in kinds:
+            for idx, user_id in enumerate(project.get("members") or ()):
+                relations.link(user_id, project_id,
+                               Link.Lead if idx == 0 else Link.Member)
+        advisor = project.get("advisor")
+        if Link.Advisor in kinds and advisor not in {None, "pending"}:
+            relations.link(advisor, project_id, Link.Advisor)
+
+    def get_user_project_ids(self, user_id, kind=None):
+        """Gets the ids of the projects that reference a user.
+
+        Args:
+            user_id (str): The user id.
+            kind (str, optional): Only this kind of link, see `Link`,
+                every kind if None. Defaults to None.
+
+        Returns:
+            list: The project ids.
+        """
+        return self.relations.get_rights(user_id, kind)
+
+    def get_project_user_ids(self, project_id, kind=None):
+        """Gets the ids of the users that reference a project.
+
+        Args:
+            project_id (str): The project id.
+            kind (str, optional): Only this kind of link, see `Link`,
+                every kind if None. Defaults to None.
+
+        Returns:
+            list: The user ids.
+        """
+        return self.relations.get_lefts(project_id, kind)
+
+    def change_role(self, member_view, role):
+        """Makes a member or a lead become another role, they leave the
+        projects they have joined and their invitations are dropped.
+        Only the rows of those projects are touched.
+
+        Args:
+            member_view (MemberView): The member or lead.
+            role (int): The new role.
+        """
+        for project_id in self.get_user_project_ids(member_view.id,
+                                                    Link.Member):
+            project = self.projects_table.get(project_id)
+            if project is not None:
+                ProjectView(project, self.projects_table).remove_member(
+                    member_view.id)
+        member_view.become(role)
+        self.people_table.touch(member_view.id, [("set", "projs", None),
+                                                 ("set", "invs", None)])
+        self.login_table.touch(member_view.username, [("set", "role", role)])
+
+    def __move_messages(self, user_id):
+        user_data = self.people_table.get(user_id)
+        if user_data is None or not user_data.msgs:
+            return
+        with self.main_database.transaction():
+            for msg in user_data.msgs:
+                self.inbox.append(user_id, msg)
+            user_data.msgs = None
+            self.people_table.touch(user_id, [("set", "msgs", None)])
+
+    def get_message_pages(self, user_id):
+        """Gets the pages of a lead's inbox, messages still kept in
+        their people row by older versions are moved into the inbox first.
+
+        Args:
+            user_id (str): The lead id.
+
+        Returns:
+            list: The page numbers, oldest first.
+        """
+        self.__move_messages(user_id)
+        return self.inbox.pages(user_id)
+
+    def read_messages(self, page_no):
+        """Reads a page of an inbox.
+
+        Args:
+            page_no (int): The page number.
+
+        Returns:
+            list: The pairs of message id and message.
+        """
+        return self.inbox.read(page_no)
+
+    def delete_message(self, user_id, message_id):
+        """Deletes a message from a lead's inbox.
+
+        Args:
+            user_id (str): The lead id.
+            message_id (str): The message id.
+        """
+        if not self.inbox.delete(user_id, message_id):
+            raise ActionError("Message is invalid.")
+
+    def clear_messages(self, user_id):
+        """Deletes every message in a lead's inbox.
+
+        Args:
+            user_id (str): The lead id.
+        """
+        self.__move_messages(user_id)
+        self.inbox.clear(user_id)
 
     def get_unique_project_id(self):
         """Generates a unique project id.
@@ -73,10 +706,42 @@ class ManageApp:
             str: Their full name, first name followed by last name
                 or `Unknown` if the user isn't found.
         """
-        name = self.people_table.get(user_id)
-        if name is not None:
-            return f"{name['first']} {name['last']}"
-        return "Unknown"
+        return self.name_cache.get(user_id, self.__make_name)
+
+    def __make_name(self, user_id):
+        return format_name(self.people_table.get(user_id))
+
+    def get_project_summary(self, project_id):
+        """Gets the one line summary of a project.
+
+        Args:
+            project_id (str): The project id.
+
+        Returns:
+            str: The project name followed by its id
+                or `[DELETED PROJECT]` if the project isn't found.
+        """
+        return self.summary_cache.get(project_id, self.__make_summary)
+
+    def __make_summary(self, project_id):
+        return format_summary(self.projects_table.get(project_id))
+
+    def query_projects(self, project_ids, keep_missing=False):
+        """Queries projects by their ids along with their leads.
+
+        Args:
+            project_ids (iterable): The project ids.
+            keep_missing (bool, optional): Whether ids of deleted projects
+                give a result with None as the project. Defaults to False.
+
+        Returns:
+            Query: The query, the results have a `project` and a `lead`.
+        """
+        return self.projects_table.query("project").keys(
+            project_ids, keep_missing).join(self.people_table,
+                                            "lead",
+                                            lambda project: project.members[0],
+                                            outer=True)
 
     def get_login_from_data(self, data):
         """Retrieve the login data from user data.
@@ -87,7 +752,18 @@ class ManageApp:
         Returns:
             dict: The login data.
         """
-        return self.login_table.get(f"{data['first']}.{data['last'][0]}")
+        return self.login_table.find_one("id", data["ID"])
+
+    def get_logins_with_role(self, role):
+        """Gets the login data of every user with a role.
+
+        Args:
+            role (int): The role.
+
+        Returns:
+            list: The login data of the users with that role.
+        """
+        return self.login_table.find("role", role)
 
     def find_user(self, username_or_id):
         """Finds a user using a username or their id.
@@ -106,6 +782,595 @@ class ManageApp:
             return self.people_table.get(login_data["id"])
         return None
 
+    def get_project_view(self, project_id):
+        """Gets a project wrapped in a view that records its changes.
+
+        Args:
+            project_id (str): The project id.
+
+        Raises:
+            ActionError: If the project doesn't exist.
+
+        Returns:
+            ProjectView: The project view.
+        """
+        project = self.projects_table.get(project_id)
+        if project is None:
+            raise ActionError("Project is invalid.")
+        return ProjectView(project, self.projects_table)
+
+    def __get_user_view(self, username_or_id, view, invalid):
+        user_data = self.find_user(username_or_id)
+        if user_data is None:
+            raise ActionError(invalid)
+        login_data = self.get_login_from_data(user_data)
+        if login_data is None:
+            raise ActionError("Something went wrong, please contact an admin.")
+        return view(user_data, login_data)
+
+    def __send_message(self, user_id, message_type, author_id, project_id):
+        with self.main_database.transaction():
+            self.__move_messages(user_id)
+            self.inbox.append(user_id,
+                              Message(message_type, author_id, project_id))
+
+    def authenticate(self, username, password):
+        """Checks a username and a password.
+
+        Args:
+            username (str): The username.
+            password (str): The password.
+
+        Returns:
+            dict: The login data if they match, None otherwise.
+        """
+        login_entry = self.login_table.get(username)
+        if login_entry is None:
+            return None
+        password = hash_password(password, login_entry["password"][0:4])
+        if login_entry["password"] != password:
+            return None
+        return login_entry
+
+    def create_project(self, lead_id, name, desc):
+        """Creates a project led by a lead.
+
+        Args:
+            lead_id (str): The id of the lead.
+            name (str): The project name.
+            desc (str): The project description.
+
+        Returns:
+            ProjectView: The new project.
+        """
+        project_view = ProjectView(
+            Project(self.get_unique_project_id(), name, desc, [lead_id],
+                    False), self.projects_table)
+        self.projects_table.put(project_view.id, project_view.project)
+        LeadView(self.people_table.get(lead_id),
+                 None).project_ids.append(project_view.id)
+        self.people_table.touch(lead_id, [("add", "projs", project_view.id)])
+        return project_view
+
+    def delete_project(self, project_id):
+        """Deletes a project along with every reference to it, the people
+        that reference it are found through the relations, so only their
+        rows and the evaluation list are touched.
+
+        Args:
+            project_id (str): The project id.
+
+        Raises:
+            ActionError: If the project is invalid.
+
+        Returns:
+            list: The ids of the people whose rows changed.
+        """
+        self.get_project_view(project_id)
+        touched = []
+        for user_id in set(self.get_project_user_ids(project_id)):
+            user_data = self.people_table.get(user_id)
+            if user_data is None:
+                continue
+            changes = []
+            for field in USER_LINKS:
+                ids = user_data.get(field)
+                if ids and project_id in ids:
+                    changes.append(("remove", field, project_id))
+                while ids and project_id in ids:
+                    ids.remove(project_id)
+            if changes:
+                touched.append(user_id)
+                self.people_table.touch(user_id, changes)
+        evaluation_list = self.evaluation_list
+        if project_id in evaluation_list:
+            evaluation_list.remove(project_id)
+            self.documents_table.touch("evaluation list",
+                                       [("remove", None, project_id)])
+        self.projects_table.delete(project_id)
+        return touched
+
+    def update_project(self, project_id, name=None, desc=None, report=None):
+        """Changes the name, description or report of a project.
+
+        Args:
+            project_id (str): The project id.
+            name (str, optional): The new name, unchanged if None.
+                Defaults to None.
+            desc (str, optional): The new description, unchanged if None.
+                Defaults to None.
+            report (str, optional): The report, unchanged if None.
+                Defaults to None.
+
+        Returns:
+            ProjectView: The project.
+        """
+        project_view = self.get_project_view(project_id)
+        if name is not None:
+            project_view.name = name
+        if desc is not None:
+            project_view.desc = desc
+        if report is not None:
+            project_view.report = report
+        return project_view
+
+    def invite_member(self, project_id, username_or_id):
+        """Invites a member to join a project.
+
+        Args:
+            project_id (str): The project id.
+            username_or_id (str): The username or id of the member.
+
+        Raises:
+            ActionError: If the user isn't a member or is already invited.
+
+        Returns:
+            MemberView: The invited member.
+        """
+        member_view = self.__get_user_view(username_or_id, MemberView,
+                                           "Invalid member id.")
+        if member_view.role != Role.Member:
+            raise ActionError("That person is not a member.")
+        if not member_view.invitations.append(project_id):
+            raise ActionError("That member has already been invited.")
+        self.people_table.touch(member_view.id, [("add", "invs", project_id)])
+        return member_view
+
+    def respond_invitation(self, member_id, project_id, accept):
+        """Accepts or rejects an invitation to join a project.
+
+        Args:
+            member_id (str): The id of the invited member.
+            project_id (str): The project id.
+            accept (bool): Whether to join the project.
+
+        Raises:
+            ActionError: If the member wasn't invited to the project.
+        """
+        if project_id not in MemberView(self.people_table.get(member_id),
+                                        None).invitations:
+            raise ActionError("There is no such invitation.")
+        self.respond_invitations(member_id, [project_id], accept)
+
+    def respond_invitations(self, member_id, project_ids, accept):
+        """Accepts or rejects many invitations at once, the member and
+        each project are only touched once.
+
+        Args:
+            member_id (str): The id of the invited member.
+            project_ids (iterable): The project ids, the ones the member
+                wasn't invited to are skipped.
+            accept (bool): Whether to join the projects.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        member_view = MemberView(self.people_table.get(member_id), None)
+        invs, answered, changes = member_view.invitations, [], []
+        for project_id in project_ids:
+            if project_id not in invs:
+                continue
+            invs.remove(project_id)
+            answered.append(project_id)
+            changes.append(("remove", "invs", project_id))
+            project = self.projects_table.get(project_id)
+            if accept and project is not None \
+                    and project_id not in member_view.project_ids:
+                member_view.project_ids.append(project_id)
+                changes.append(("add", "projs", project_id))
+                ProjectView(project,
+                            self.projects_table).add_member(member_id)
+        if changes:
+            self.people_table.touch(member_id, changes)
+        return answered
+
+    def request_advisor(self, project_id, username_or_id):
+        """Asks a faculty to be the advisor of a project.
+
+        Args:
+            project_id (str): The project id.
+            username_or_id (str): The username or id of the faculty.
+
+        Raises:
+            ActionError: If a request is pending or the user isn't a faculty.
+
+        Returns:
+            FacultyView: The requested faculty.
+        """
+        if self.get_project_view(project_id).advisor_pending:
+            raise ActionError(
+                "Please wait for the faculty you requested to either accept" \
+                " or reject your request before sending a new request."
+            )
+        faculty_view = self.__get_user_view(username_or_id, FacultyView,
+                                            "Invalid faculty id/username.")
+        if faculty_view.role != Role.Faculty:
+            raise ActionError("That person is not a faculty.")
+        faculty_view.advisor_requests.append(project_id)
+        self.people_table.touch(faculty_view.id,
+                                [("add", "adv_reqs", project_id)])
+        return faculty_view
+
+    def respond_advisor_request(self, faculty_id, project_id, accept):
+        """Accepts or rejects a request to be the advisor of a project,
+        the lead gets a message about it.
+
+        Args:
+            faculty_id (str): The id of the faculty.
+            project_id (str): The project id.
+            accept (bool): Whether to become the advisor.
+
+        Raises:
+            ActionError: If there's no such request or the project is invalid.
+
+        Returns:
+            bool: True if the faculty has just become an advisor.
+        """
+        login_data = self.login_table.find_one("id", faculty_id)
+        if project_id not in FacultyView(self.people_table.get(faculty_id),
+                                         login_data).advisor_requests:
+            raise ActionError("There is no such request.")
+        self.get_project_view(project_id)
+        became_advisor = accept and login_data.role != Role.Advisor
+        self.respond_advisor_requests(faculty_id, [project_id], accept)
+        return became_advisor
+
+    def respond_advisor_requests(self, faculty_id, project_ids, accept):
+        """Accepts or rejects many requests to be an advisor at once,
+        the leads get a message about each. The faculty and each project
+        are only touched once, all in one transaction of the database.
+
+        Args:
+            faculty_id (str): The id of the faculty.
+            project_ids (iterable): The project ids, the ones that didn't
+                ask the faculty are skipped and deleted ones are dropped.
+            accept (bool): Whether to become the advisor.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        faculty_view = FacultyView(self.people_table.get(faculty_id),
+                                   self.login_table.find_one("id", faculty_id))
+        with self.main_database.transaction():
+            reqs, answered, changes = faculty_view.advisor_requests, [], []
+            for project_id in project_ids:
+                if project_id not in reqs:
+                    continue
+                reqs.remove(project_id)
+                changes.append(("remove", "adv_reqs", project_id))
+                project = self.projects_table.get(project_id)
+                if project is None:
+                    continue
+                answered.append(project_id)
+                project_view = ProjectView(project, self.projects_table)
+                if accept:
+                    project_view.advisor_id = faculty_id
+                    if project_id not in faculty_view.project_ids:
+                        faculty_view.project_ids.append(project_id)
+                        changes.append(("add", "projs", project_id))
+                else:
+                    project_view.advisor_id = None
+                self.__send_message(project_view.lead_id,
+                                    "adva" if accept else "advr", faculty_id,
+                                    project_id)
+            if accept and answered and faculty_view.role != Role.Advisor:
+                faculty_view.role = Role.Advisor
+                self.login_table.touch(faculty_view.username,
+                                       [("set", "role", Role.Advisor)])
+            if changes:
+                self.people_table.touch(faculty_id, changes)
+        return answered
+
+    def submit_approval(self, project_id):
+        """Sends an approval request to the advisor of a project.
+
+        Args:
+            project_id (str): The project id.
+
+        Raises:
+            ActionError: If the project has no advisor.
+        """
+        faculty_data = self.people_table.get(
+            self.get_project_view(project_id).advisor_id)
+        if faculty_data is None:
+            raise ActionError("An internal error occurred.")
+        faculty_view = FacultyView(faculty_data, None)
+        faculty_view.approval_requests.append(project_id)
+        self.people_table.touch(faculty_view.id,
+                                [("add", "apr_reqs", project_id)])
+
+    def respond_approval_request(self, faculty_id, project_id, approve):
+        """Approves or rejects a project, the lead gets a message about it.
+
+        Args:
+            faculty_id (str): The id of the advisor.
+            project_id (str): The project id.
+            approve (bool): Whether to approve the project.
+
+        Raises:
+            ActionError: If there's no such request or the project is invalid.
+        """
+        if project_id not in FacultyView(self.people_table.get(faculty_id),
+                                         None).approval_requests:
+            raise ActionError("There is no such request.")
+        self.get_project_view(project_id)
+        self.respond_approval_requests(faculty_id, [project_id], approve)
+
+    def respond_approval_requests(self, faculty_id, project_ids, approve):
+        """Approves or rejects many projects at once, the leads get
+        a message about each. The advisor is only touched once, all in one
+        transaction of the database.
+
+        Args:
+            faculty_id (str): The id of the advisor.
+            project_ids (iterable): The project ids, the ones that didn't
+                ask the advisor are skipped and deleted ones are dropped.
+            approve (bool): Whether to approve the projects.
+
+        Returns:
+            list: The ids of the projects that were answered.
+        """
+        reqs = FacultyView(self.people_table.get(faculty_id),
+                           None).approval_requests
+        with self.main_database.transaction():
+            answered, changes = [], []
+            for project_id in project_ids:
+                if project_id not in reqs:
+                    continue
+                reqs.remove(project_id)
+                changes.append(("remove", "apr_reqs", project_id))
+                project = self.projects_table.get(project_id)
+                if project is None:
+                    continue
+                answered.append(project_id)
+                project_view = ProjectView(project, self.projects_table)
+                if approve:
+                    project_view.approved = True
+                self.__send_message(project_view.lead_id,
+                                    "apra" if approve else "aprr", faculty_id,
+                                    project_id)
+            if changes:
+                self.people_table.touch(faculty_id, changes)
+        return answered
+
+    @property
+    def evaluation_list(self):
+        """The projects waiting for evaluators, a list saved by older
+        versions is turned into a request queue.
+
+        Returns:
+            RequestQueue: The project ids.
+        """
+        evaluation_list = self.documents_table.get("evaluation list")
+        if not isinstance(evaluation_list, RequestQueue):
+            evaluation_list = RequestQueue(evaluation_list or ())
+            self.documents_table.put("evaluation list", evaluation_list)
+        return evaluation_list
+
+    def submit_evaluation(self, project_id):
+        """Puts a project on the evaluation list, if it isn't on it yet.
+
+        Args:
+            project_id (str): The project id.
+        """
+        if self.evaluation_list.append(project_id):
+            self.documents_table.touch("evaluation list",
+                                       [("add", None, project_id)])
+
+    def assign_evaluator(self, project_id, username_or_id):
+        """Assigns a faculty to evaluate a project.
+
+        Args:
+            project_id (str): The project id.
+            username_or_id (str): The username or id of the faculty.
+
+        Raises:
+            ActionError: If the project is invalid, the user isn't a faculty
+                or is already evaluating it.
+
+        Returns:
+            FacultyView: The evaluator.
+        """
+        project_view = self.get_project_view(project_id)
+        evaluator = self.__get_user_view(username_or_id, FacultyView,
+                                         "Invalid evaluator: ")
+        if evaluator.role not in {Role.Advisor, Role.Faculty}:
+            raise ActionError("The evaluator must be a faculty.")
+        if not evaluator.evaluating_projects.append(project_view.id):
+            raise ActionError("That faculty is already evaluating it.")
+        self.people_table.touch(evaluator.id,
+                                [("add", "eval_projs", project_view.id)])
+        return evaluator
+
+    def assign_evaluators(self, project_id, count=1):
+        """Assigns the faculty who are evaluating the fewest projects to
+        evaluate a project, leaving out its advisor and its evaluators.
+
+        Args:
+            project_id (str): The project id.
+            count (int, optional): The number of evaluators. Defaults to 1.
+
+        Raises:
+            ActionError: If the project is invalid or there aren't enough faculty.
+
+        Returns:
+            list: The ids of the evaluators.
+        """
+        touched = {}
+        try:
+            return self.__assign_evaluators(project_id, count, touched)
+        finally:
+            for faculty_id, changes in touched.items():
+                self.people_table.touch(faculty_id, changes)
+
+    def __assign_evaluators(self, project_id, count, touched):
+        project_view = self.get_project_view(project_id)
+        exclude = set(self.get_project_user_ids(project_id, Link.Evaluator))
+        exclude.add(project_view.advisor_id)
+        picked = self.scheduler.pick(count, exclude, self.__can_evaluate)
+        if len(picked) < count:
+            raise ActionError("There aren't enough faculty to evaluate it.")
+        for faculty_id in picked:
+            reqs = FacultyView(self.people_table.get(faculty_id),
+                               None).evaluating_projects
+            reqs.append(project_id)
+            self.scheduler.update(faculty_id, len(reqs))
+            touched.setdefault(faculty_id, []).append(
+                ("add", "eval_projs", project_id))
+        return picked
+
+    def assign_evaluation_list(self, count=1):
+        """Assigns evaluators to every project on the evaluation list,
+        see `assign_evaluators`. The projects that got them and the deleted
+        ones are taken off the list. Each evaluator is only touched once
+        at the end, however many projects they got.
+
+        Args:
+            count (int, optional): The number of evaluators per project.
+                Defaults to 1.
+
+        Returns:
+            dict: The ids of the evaluators of each project that got them.
+        """
+        evaluation_list = self.evaluation_list
+        if not evaluation_list:
+            return {}
+        assigned, done, touched = {}, [], {}
+        try:
+            for project_id in evaluation_list:
+                try:
+                    assigned[project_id] = self.__assign_evaluators(
+                        project_id, count, touched)
+                except ActionError:
+                    if self.projects_table.get(project_id) is not None:
+                        continue
+                done.append(project_id)
+        finally:
+            for faculty_id, changes in touched.items():
+                self.people_table.touch(faculty_id, changes)
+        if done:
+            for project_id in done:
+                evaluation_list.remove(project_id)
+            self.documents_table.touch(
+                "evaluation list",
+                [("remove", None, project_id) for project_id in done])
+        return assigned
+
+    def evaluate(self, faculty_id, project_id, positive):
+        """Evaluates a project that has been assigned to a faculty.
+
+        Args:
+            faculty_id (str): The id of the evaluator.
+            project_id (str): The project id.
+            positive (bool): Whether the evaluation is positive.
+
+        Raises:
+            ActionError: If the project wasn't assigned to the faculty
+                or it is invalid.
+        """
+        if project_id not in FacultyView(self.people_table.get(faculty_id),
+                                         None).evaluating_projects:
+            raise ActionError("That project isn't assigned to you.")
+        self.get_project_view(project_id)
+        self.evaluate_projects(faculty_id, [project_id], positive)
+
+    def evaluate_projects(self, faculty_id, project_ids, positive):
+        """Evaluates many projects at once, the evaluator is only touched once.
+
+        Args:
+            faculty_id (str): The id of the evaluator.
+            project_ids (iterable): The project ids, the ones that weren't
+                assigned to the faculty are skipped and deleted ones are dropped.
+            positive (bool): Whether the evaluations are positive.
+
+        Returns:
+            list: The ids of the projects that were evaluated.
+        """
+        reqs = FacultyView(self.people_table.get(faculty_id),
+                           None).evaluating_projects
+        evaluated, changes = [], []
+        for project_id in project_ids:
+            if project_id not in reqs:
+                continue
+            reqs.remove(project_id)
+            changes.append(("remove", "eval_projs", project_id))
+            project = self.projects_table.get(project_id)
+            if project is None:
+                continue
+            evaluated.append(project_id)
+            if positive:
+                ProjectView(project, self.projects_table).evaluated = True
+        if changes:
+            self.people_table.touch(faculty_id, changes)
+        return evaluated
+
+    def compact(self):
+        """Removes the ids of deleted projects and repeated ids from the
+        people and the evaluation list, see `Compactor`.
+
+        Returns:
+            dict: The number of rows changed and of "dangling" and
+                "duplicates" ids removed.
+        """
+        return Compactor(self).run()
+
+    def start_checkpointer(self, interval=60, process=False):
+        """Checkpoints the database in the background every interval
+        seconds, see `Checkpointer`.
+
+        Args:
+            interval (float, optional): Seconds between checkpoints. Defaults to 60.
+            process (bool, optional): Write the checkpoints from a spawned
+                process instead of a thread. Defaults to False.
+
+        Returns:
+            Checkpointer: The checkpointer.
+        """
+        self.stop_checkpointer()
+        self.checkpointer = Checkpointer(self.main_database, interval,
+                                         process)
+        self.checkpointer.start()
+        return self.checkpointer
+
+    def stop_checkpointer(self):
+        """Stops checkpointing in the background, once the checkpoint
+        being written is done.
+        """
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+            self.checkpointer = None
+
+    def checkpoint_stats(self):
+        """The metrics of the background checkpoints.
+
+        Returns:
+            dict: The metrics, see `Checkpointer.stats`, None if the
+                database isn't checkpointed in the background.
+        """
+        if self.checkpointer is None:
+            return None
+        return self.checkpointer.stats()
+
     def login(self):
         """The login panel
 
@@ -115,14 +1380,7 @@ class ManageApp:
         """
         username = input("Please login\nUsername: ")
         password = input("Password: ")
-        login_entry = self.login_table.get(username)
-        if login_entry is None:
-            return None
-        password = sha256(
-            (password + login_entry["password"][0:4]).encode()).hexdigest()
-        if login_entry["password"][4:] != password:
-            return None
-        return login_entry
+        return self.authenticate(username, password)
 
     def login_prompt(self):
         """The login prompts that promps the user and redirect to their panel if succeded.
@@ -136,9 +1394,11 @@ class ManageApp:
                                    info).show()
 
     def save(self):
-        """Saves the database into a folder called database.
+        """Saves the database into a folder called database
+        and the inboxes into database.inbox.
         """
         self.main_database.save()
+        self.inbox.flush()
 
     def run(self):
         """Runs the manage app.
@@ -155,6 +1415,11 @@ class ManageApp:
 
 class Panel:
     """Base panel
+
+    An action is the text shown for it and its callback, False to leave
+    the panel. With a third element of True the action also takes arguments,
+    e.g. `ls --limit 5`, and the callback gets the text after the name.
+    A callback that returns False leaves the panel after it's done.
     """
     def __init__(self,
                  actions,
@@ -170,23 +1435,48 @@ class Panel:
             for action in self.__actions.values():
                 print(f"{action[0]}")
             inp = input(self.__footer)
-            action_info = self.__actions.get(inp)
+            action_info, args = self.__actions.get(inp), ""
             if action_info is None:
-                print("Invalid choice.")
-                continue
+                name, _, args = inp.partition(' ')
+                action_info = self.__actions.get(name)
+                if action_info is None or len(action_info) < 3:
+                    print("Invalid choice.")
+                    continue
             if not action_info[1]:
                 break
-            action_info[1]()
+            if len(action_info) > 2 and action_info[2]:
+                ret = action_info[1](args)
+            else:
+                ret = action_info[1]()
+            if ret is False:
+                break
 
 
 class ProjectView:
     """A wrapper class that helps deal with the data of a project.
     """
-    def __init__(self, project):
-        self.project = project
+    def __init__(self, project, table=None):
+        self.project, self.table = project, table
+
+    def __touch(self, *changes):
+        if self.table is not None:
+            self.table.touch(self.id, list(changes))
 
     def get_info_string(self, app):
-        """Get the overview information of the project
+        """Get the overview information of the project, it's cached
+        until the project or the name of someone in it changes.
+
+        Args:
+            app (ManageApp): The manage app
+
+        Returns:
+            str: The string with the overview information.
+        """
+        return app.info_cache.get(self.id,
+                                  lambda _: self.render_info_string(app))
+
+    def render_info_string(self, app):
+        """Renders the overview information of the project without the cache.
 
         Args:
             app (ManageApp): The manage app
@@ -195,25 +1485,25 @@ class ProjectView:
             str: The string with the overview information.
         """
         proj = self.project
-        advisor = proj.get('advisor')
+        advisor = proj.advisor
         if advisor is not None:
             advisor = f"{app.get_name_from_id(advisor)} ({advisor})"
         member_list = ','.join([
             f"{app.get_name_from_id(member)} ({member})"
-            for member in proj['members'][1:]
+            for member in proj.members[1:]
         ])
         if not member_list:
             member_list = "None"
         return \
-            f"Name: {proj['name']}\n" \
-            f"Description: {proj['desc']}\n" \
-            f"Id: {proj['id']}\n" \
+            f"Name: {proj.name}\n" \
+            f"Description: {proj.desc}\n" \
+            f"Id: {proj.id}\n" \
             f"Advisor: {advisor}\n" \
-            f"Leader: {app.get_name_from_id(proj['members'][0])} ({proj['members'][0]})\n" \
+            f"Leader: {app.get_name_from_id(proj.members[0])} ({proj.members[0]})\n" \
             f"Members: {member_list}\n" \
-            f"Approved: {'yes' if proj.get('approved') else 'no'}\n" \
+            f"Approved: {'yes' if proj.approved else 'no'}\n" \
             f"Evaluated: {'yes' if self.evaluated else 'no'}\n" \
-            f"Report: {proj.get('report')}"
+            f"Report: {proj.report}"
 
     @property
     def advisor_pending(self):
@@ -222,15 +1512,12 @@ class ProjectView:
         Returns:
             bool: True if the advisor is pending aka the advisor request has not been responded yet.
         """
-        return self.project.get("advisor") == "pending"
+        return self.project.advisor == "pending"
 
     @advisor_pending.setter
     def advisor_pending(self, new_status):
-        if new_status:
-            self.project["advisor"] = "pending"
-            return
-        self.project["advisor"] = None
-        return
+        self.project.advisor = "pending" if new_status else None
+        self.__touch(("set", "advisor", self.project.advisor))
 
     @property
     def advisor_id(self):
@@ -239,11 +1526,12 @@ class ProjectView:
         Returns:
             str: The advisor id, None if there's no advisor.
         """
-        return self.project.get("advisor")
+        return self.project.advisor
 
     @advisor_id.setter
     def advisor_id(self, new_advisor_id):
-        self.project["advisor"] = new_advisor_id
+        self.project.advisor = new_advisor_id
+        self.__touch(("set", "advisor", new_advisor_id))
 
     @property
     def name(self):
@@ -252,11 +1540,12 @@ class ProjectView:
         Returns:
             str: The name of the project.
         """
-        return self.project["name"]
+        return self.project.name
 
     @name.setter
     def name(self, new_name):
-        self.project["name"] = new_name
+        self.project.name = new_name
+        self.__touch(("set", "name", new_name))
 
     @property
     def desc(self):
@@ -265,11 +1554,12 @@ class ProjectView:
         Returns:
             str: The description of the project.
         """
-        return self.project["desc"]
+        return self.project.desc
 
     @desc.setter
     def desc(self, new_desc):
-        self.project["desc"] = new_desc
+        self.project.desc = new_desc
+        self.__touch(("set", "desc", new_desc))
 
     @property
     def approved(self):
@@ -278,11 +1568,12 @@ class ProjectView:
         Returns:
             bool: Whether the project has been approved or not.
         """
-        return self.project.get("approved", False)
+        return bool(self.project.approved)
 
     @approved.setter
     def approved(self, new_approved):
-        self.project["approved"] = new_approved
+        self.project.approved = new_approved
+        self.__touch(("set", "approved", new_approved))
 
     @property
     def evaluated(self):
@@ -291,11 +1582,12 @@ class ProjectView:
         Returns:
             bool: Whether the project has been evaluated or not.
         """
-        return self.project.get("evaluated", False)
+        return bool(self.project.evaluated)
 
     @evaluated.setter
     def evaluated(self, new_evaluated):
-        self.project["evaluated"] = new_evaluated
+        self.project.evaluated = new_evaluated
+        self.__touch(("set", "evaluated", new_evaluated))
 
     @property
     def lead_id(self):
@@ -304,11 +1596,12 @@ class ProjectView:
         Returns:
             str: The lead id of the project.
         """
-        return self.project["members"][0]
+        return self.project.members[0]
 
     @lead_id.setter
     def lead_id(self, new_lead_id):
-        self.project["members"][0] = new_lead_id
+        self.project.members[0] = new_lead_id
+        self.__touch(("set", "members", list(self.project.members)))
 
     @property
     def report(self):
@@ -317,11 +1610,12 @@ class ProjectView:
         Returns:
             str: The project's report, None if there's no report.
         """
-        return self.project.get("report")
+        return self.project.report
 
     @report.setter
     def report(self, new_report):
-        self.project["report"] = new_report
+        self.project.report = new_report
+        self.__touch(("set", "report", new_report))
 
     @property
     def member_ids(self):
@@ -330,15 +1624,29 @@ class ProjectView:
         Returns:
             slice: The slice of the ids of the members.
         """
-        return self.project["members"][1::]
+        return self.project.members[1::]
 
     def add_member(self, new_member):
-        """Adds a member to the member list
+        """Adds a member to the member list, if they aren't in it yet.
 
         Args:
             new_member (str): The new member id.
         """
-        self.project["members"].append(new_member)
+        if new_member in self.project.members:
+            return
+        self.project.members.append(new_member)
+        self.__touch(("add", "members", new_member))
+
+    def remove_member(self, member):
+        """Removes a member from the member list, the lead stays.
+
+        Args:
+            member (str): The member id.
+        """
+        members = self.project.members
+        if member in members[1:]:
+            del members[members.index(member, 1)]
+            self.__touch(("remove", "members", member))
 
     @property
     def id(self):
@@ -347,7 +1655,7 @@ class ProjectView:
         Returns:
             str: The id of the project.
         """
-        return self.project["id"]
+        return self.project.id
 
 
 class ProjectPanel:
@@ -396,31 +1704,34 @@ class ProjectPanel:
     def submit_approv(self):
         """Submit an approval request.
         """
-        faculty_data = self.app.people_table.get(self.project_view.advisor_id)
-        if faculty_data is None:
-            print("An internal error occurred.")
+        try:
+            self.app.submit_approval(self.project_view.id)
+        except ActionError as err:
+            print(err)
             return
-        faculty_view = FacultyView(faculty_data, None)
-        faculty_view.approval_requests.append(self.project_view.id)
         print("Succesfully sent approval request to your advisor.")
 
     def submit_eval(self):
         """Submit an evaluation request.
         """
-        evaluation_list = self.app.documents_table.get("evaluation list")
-        if evaluation_list is None:
-            evaluation_list = []
-            self.app.documents_table.put("evaluation list", evaluation_list)
-        evaluation_list.append(self.project_view.id)
+        self.app.submit_evaluation(self.project_view.id)
         print(
             "Succesfully put your project evaluation request up to be processed."
         )
 
     def proj_delete(self):
-        """Deletes the project.
+        """Deletes the project and leaves the panel.
+
+        Returns:
+            bool: False if the project was deleted, to leave the panel.
         """
-        self.project_view.delete()
+        try:
+            self.app.delete_project(self.project_view.id)
+        except ActionError as err:
+            print(err)
+            return None
         print("Project succesfully deleted.")
+        return False
 
     def request_for_advisor(self):
         """Requests for an advisor
@@ -431,39 +1742,23 @@ class ProjectPanel:
                 " or reject your request before sending a new request."
             )
             return
-        faculty_data = self.app.find_user(input("Enter faculty id/username: "))
-        if faculty_data is None:
-            print("Invalid faculty id/username.")
-            return
-        login_data = self.app.get_login_from_data(faculty_data)
-        if login_data is None:
-            print("Something went wrong, please contact an admin.")
-            return
-        faculty_view = FacultyView(faculty_data, login_data)
-        if faculty_view.role != Role.Faculty:
-            print("That person is not a faculty.")
+        try:
+            faculty_view = self.app.request_advisor(
+                self.project_view.id, input("Enter faculty id/username: "))
+        except ActionError as err:
+            print(err)
             return
-        reqs = faculty_view.advisor_requests
-        reqs.append(self.project_view.id)
         print(f"Successfully requested {faculty_view.name}")
 
     def invite_member(self):
         """Invites a member.
         """
-        member_data = self.app.find_user(input("Enter member id/username: "))
-        if member_data is None:
-            print("Invalid member id.")
-            return
-        login_data = self.app.get_login_from_data(member_data)
-        if login_data is None:
-            print("Something went wrong, please contact an admin.")
-            return
-        member_view = MemberView(member_data, login_data)
-        if member_view.role != Role.Member:
-            print("That person is not a member.")
+        try:
+            member_view = self.app.invite_member(
+                self.project_view.id, input("Enter member id/username: "))
+        except ActionError as err:
+            print(err)
             return
-        invitations = member_view.invitations
-        invitations.append(self.project_view.id)
         print(f"Successfully invited {member_view.name}")
 
     def change_name(self):
@@ -494,7 +1789,7 @@ class UserView:
         Returns:
             str: The user name.
         """
-        return f"{self.user_data['first']} {self.user_data['last']}"
+        return f"{self.user_data.first} {self.user_data.last}"
 
     @property
     def role(self):
@@ -503,13 +1798,13 @@ class UserView:
         Returns:
             int: The user's role.
         """
-        return self.login_data["role"]
+        return self.login_data.role
 
     @role.setter
     def role(self, new_role):
         if not isinstance(new_role, int):
             raise TypeError
-        self.login_data["role"] = new_role
+        self.login_data.role = new_role
 
     @property
     def id(self):
@@ -518,7 +1813,16 @@ class UserView:
         Returns:
             str: The user's id.
         """
-        return self.user_data["ID"]
+        return self.user_data.ID
+
+    @property
+    def username(self):
+        """The user's username
+
+        Returns:
+            str: The user's username.
+        """
+        return self.login_data.username
 
 
 class MessageView:
@@ -534,7 +1838,7 @@ class MessageView:
         Returns:
             str: The message type
         """
-        return self.data["type"]
+        return self.data.type
 
     @property
     def sender_id(self):
@@ -543,7 +1847,7 @@ class MessageView:
         Returns:
             str: The id of the sender.
         """
-        return self.data["author"]
+        return self.data.author
 
     def get_title(self, app: ManageApp):
         """Generates the appropriate title for the message.
@@ -554,25 +1858,19 @@ class MessageView:
         Returns:
             str: The title.
         """
-        author = app.people_table.get(self.data['author'])
-        if author is None:
-            author = "Unknown"
-        else:
-            author = f"{author['first']} {author['last']}"
-        project_id = self.data['project']
-        project = ProjectView(app.projects_table.get(project_id, {}))
+        author = app.get_name_from_id(self.data.author)
+        project = app.get_project_summary(self.data.project)
         return {
             "inva":
-            f"{author} has accepted your project {project.name} ({project_id}) invitation.",
+            f"{author} has accepted your project {project} invitation.",
             "adva":
-            f"{author} has agreed to be your project {project.name} ({project_id}) advisor.",
+            f"{author} has agreed to be your project {project} advisor.",
             "advr":
-            f"{author} has rejected to be your project {project.name} ({project_id}) advisor.",
-            "apra":
-            f"{author} has approved your project {project.name} ({project_id}).",
+            f"{author} has rejected to be your project {project} advisor.",
+            "apra": f"{author} has approved your project {project}.",
             "aprr":
-            f"{author} has rejected your project {project.name} ({project_id}) approval request."
-        }[self.data["type"]]
+            f"{author} has rejected your project {project} approval request."
+        }[self.data.type]
 
 
 class MemberView(UserView):
@@ -583,12 +1881,12 @@ class MemberView(UserView):
         """The invitations.
 
         Returns:
-            list: The list of project id of projects that invited you to join.
+            RequestQueue: The ids of the projects that invited you to join.
         """
-        reqs = self.user_data.get("invs")
+        reqs = self.user_data.invs
         if reqs is None:
-            reqs = []
-            self.user_data["invs"] = reqs
+            reqs = RequestQueue()
+            self.user_data.invs = reqs
         return reqs
 
     @property
@@ -598,10 +1896,10 @@ class MemberView(UserView):
         Returns:
             list: The list of project id of projects you have joined.
         """
-        projs = self.user_data.get("projs")
+        projs = self.user_data.projs
         if projs is None:
             projs = []
-            self.user_data["projs"] = projs
+            self.user_data.projs = projs
         return projs
 
     def become(self, role):
@@ -610,9 +1908,9 @@ class MemberView(UserView):
         Args:
             role (int): The new role to be set to.
         """
-        self.user_data["projs"] = None
-        self.user_data["invitations"] = None
-        self.login_data["role"] = role
+        self.user_data.projs = None
+        self.user_data.invs = None
+        self.login_data.role = role
 
 
 class FacultyView(UserView):
@@ -623,12 +1921,12 @@ class FacultyView(UserView):
         """Requests for you to be their advisor.
 
         Returns:
-            list: The list of project ids of projects that wanted you to be their advisor.
+            RequestQueue: The ids of the projects that wanted you to be their advisor.
         """
-        reqs = self.user_data.get("adv_reqs")
+        reqs = self.user_data.adv_reqs
         if reqs is None:
-            reqs = []
-            self.user_data["adv_reqs"] = reqs
+            reqs = RequestQueue()
+            self.user_data.adv_reqs = reqs
         return reqs
 
     @property
@@ -638,10 +1936,10 @@ class FacultyView(UserView):
         Returns:
             list: The list of project ids of projects you are advising.
         """
-        projs = self.user_data.get("projs")
+        projs = self.user_data.projs
         if projs is None:
             projs = []
-            self.user_data["projs"] = projs
+            self.user_data.projs = projs
         return projs
 
     @property
@@ -649,12 +1947,12 @@ class FacultyView(UserView):
         """Approval requests sent to you.
 
         Returns:
-            list: Approval requests sent to you.
+            RequestQueue: Approval requests sent to you.
         """
-        reqs = self.user_data.get("apr_reqs")
+        reqs = self.user_data.apr_reqs
         if reqs is None:
-            reqs = []
-            self.user_data["apr_reqs"] = reqs
+            reqs = RequestQueue()
+            self.user_data.apr_reqs = reqs
         return reqs
 
     @property
@@ -662,12 +1960,12 @@ class FacultyView(UserView):
         """The projects that have been assigned for you to evaluate.
 
         Returns:
-            list: The projects that have been assigned for you to evaluate.
+            RequestQueue: The projects that have been assigned for you to evaluate.
         """
-        projs = self.user_data.get("eval_projs")
+        projs = self.user_data.eval_projs
         if projs is None:
-            projs = []
-            self.user_data["eval_projs"] = projs
+            projs = RequestQueue()
+            self.user_data.eval_projs = projs
         return projs
 
 
@@ -707,39 +2005,32 @@ class FacultyPanel:
     def view_eval(self):
         """View projects that have been assigned to you to evaluate.
         """
-        reqs = self.faculty_view.evaluating_projects
+        reqs = list(self.faculty_view.evaluating_projects)
         if not reqs:
             print("You do not have any projects to evaluate at the moment.")
             return
-        idx = 0
-        for req in reqs:
-            proj = self.app.projects_table.get(req)
-            if proj is None:
-                print("{idx}. [DELETED PROJECT]")
-                idx += 1
-                continue
-            proj = ProjectView(proj)
-            print(f"{idx}. {proj.name} ({proj.id})")
-            idx += 1
+        labels = [
+            format_summary(row['project'])
+            for row in self.app.query_projects(reqs, True)
+        ]
+        for idx, label in enumerate(labels):
+            print(f"{idx}. {label}")
         sel = input(
-            "\nSelect a request you want to deal with or type `exit` to go back.\nSelect: "
+            f"\nSelect a request you want to deal with or type `exit` to go back.\n{SELECT_HINT}\nSelect: "
         )
         if sel == "exit":
             return
         try:
-            seli = int(sel)
-            req = reqs[seli]
+            selected = [reqs[idx] for idx in select_indexes(sel, labels)]
+            if not selected:
+                print("Nothing was selected.")
+                return
             sel = input("Do you want to evaluate positively? (y/n) ")
             if sel in {'y', 'n'}:
-                proj = self.app.projects_table.get(req)
-                if proj is None:
-                    print("Project is invalid.")
-                    return
-                proj = ProjectView(proj)
-                if sel == 'y':
-                    proj.evaluated = True
-                reqs[seli] = reqs[-1]
-                reqs.pop()
+                self.app.evaluate_projects(self.faculty_view.id, selected,
+                                           sel == 'y')
+        except ActionError as err:
+            print(err)
         except ValueError:
             print("Bad index")
         except IndexError:
@@ -748,53 +2039,37 @@ class FacultyPanel:
     def view_projs_aprv(self):
         """Allow you to view approval requests for projects.
         """
-        reqs = self.faculty_view.approval_requests
+        reqs = list(self.faculty_view.approval_requests)
         if not reqs:
             print("You do not have any requests at the moment.")
             return
-        idx = 0
-        for req in reqs:
-            proj = self.app.projects_table.get(req)
-            if proj is None:
-                print("{idx}. Unknown wanted you to approve [DELETED PROJECT]")
-                idx += 1
+        labels = []
+        for row in self.app.query_projects(reqs, True):
+            if row["project"] is None:
+                labels.append("Unknown wanted you to approve [DELETED PROJECT]")
                 continue
-            proj = ProjectView(proj)
-            author = self.app.people_table.get(proj.lead_id)
-            if author is None:
-                author = "Unknown"
-            else:
-                author = f"{author['first']} {author['last']}"
-            print(
-                f"{idx}. {author} wanted you to approve project {proj.name} ({proj.id})"
+            labels.append(
+                f"{format_name(row['lead'])}" \
+                f" wanted you to approve project {format_summary(row['project'])}"
             )
-            idx += 1
+        for idx, label in enumerate(labels):
+            print(f"{idx}. {label}")
         sel = input(
-            "\nSelect a request you want to deal with or type `exit` to go back.\nSelect: "
+            f"\nSelect a request you want to deal with or type `exit` to go back.\n{SELECT_HINT}\nSelect: "
         )
         if sel == "exit":
             return
         try:
-            seli = int(sel)
-            req = reqs[seli]
+            selected = [reqs[idx] for idx in select_indexes(sel, labels)]
+            if not selected:
+                print("Nothing was selected.")
+                return
             sel = input("Do you want to approve? (y/n) ")
             if sel in {'y', 'n'}:
-                proj = self.app.projects_table.get(req)
-                if proj is None:
-                    print("Project is invalid.")
-                    return
-                proj = ProjectView(proj)
-                if sel == 'y':
-                    proj.approved = True
-                lead_data = self.app.people_table.get(proj.lead_id)
-                lead_view = LeadView(lead_data, None)
-                lead_view.messages.append({
-                    "type": "apra" if sel == 'y' else "aprr",
-                    "author": self.faculty_view.id,
-                    "project": proj.id
-                })
-                reqs[seli] = reqs[-1]
-                reqs.pop()
+                self.app.respond_approval_requests(self.faculty_view.id,
+                                                   selected, sel == 'y')
+        except ActionError as err:
+            print(err)
         except ValueError:
             print("Bad index")
         except IndexError:
@@ -803,64 +2078,45 @@ class FacultyPanel:
     def view_requests(self):
         """Allows you to view and manage requests.
         """
-        reqs = self.faculty_view.advisor_requests
+        reqs = list(self.faculty_view.advisor_requests)
         if not reqs:
             print("You do not have any requests at the moment.")
             return
-        idx = 0
-        for req in reqs:
-            proj = self.app.projects_table.get(req)
-            if proj is None:
-                print(
-                    "{idx}. Unknown invited you to be an advisor for [DELETED PROJECT]"
-                )
-                idx += 1
+        labels = []
+        for row in self.app.query_projects(reqs, True):
+            if row["project"] is None:
+                labels.append(
+                    "Unknown invited you to be an advisor for [DELETED PROJECT]")
                 continue
-            proj = ProjectView(proj)
-            author = self.app.people_table.get(proj.lead_id)
-            if author is None:
-                author = "Unknown"
-            else:
-                author = f"{author['first']} {author['last']}"
-            print(
-                f"{idx}. {author} invited you to be an advisor for project {proj.name} ({proj.id})"
+            labels.append(
+                f"{format_name(row['lead'])}" \
+                f" invited you to be an advisor for project {format_summary(row['project'])}"
             )
-            idx += 1
+        for idx, label in enumerate(labels):
+            print(f"{idx}. {label}")
         sel = input(
-            "\nSelect a request you want to deal with or type `exit` to go back.\nSelect: "
+            f"\nSelect a request you want to deal with or type `exit` to go back.\n{SELECT_HINT}\nSelect: "
         )
         if sel == "exit":
             return
         try:
-            seli = int(sel)
-            req = reqs[seli]
-            sel = input("Do you want to accept the request? (y/n) ")
-            if sel in {'y', 'n'}:
-                proj = self.app.projects_table.get(req)
-                if proj is None:
-                    print("Project is invalid.")
-                    return
-                proj = ProjectView(proj)
-                if sel == 'y':
-                    proj.advisor_id = self.faculty_view.id
-                    self.faculty_view.project_ids.append(req)
-                    if self.faculty_view.role != Role.Advisor:
-                        print(
-                            "You've become an advisor, please logout and" \
-                            " log back in to gain access to more features."
-                        )
-                    self.faculty_view.role = Role.Advisor
-                else:
-                    proj.advisor_id = None
-                lead_data = self.app.people_table.get(proj.lead_id)
-                lead_view = LeadView(lead_data, None)
-                lead_view.messages.append({
-                    "type": "adva" if sel == 'y' else "advr",
-                    "author": self.faculty_view.id,
-                    "project": proj.id
-                })
-                reqs[seli] = reqs[-1]
-                reqs.pop()
+            selected = [reqs[idx] for idx in select_indexes(sel, labels)]
+            if not selected:
+                print("Nothing was selected.")
+                return
+            what = "the request" if len(
+                selected) == 1 else f"the {len(selected)} requests"
+            sel = input(f"Do you want to accept {what}? (y/n) ")
+            was_advisor = self.faculty_view.role == Role.Advisor
+            if sel in {'y', 'n'} and self.app.respond_advisor_requests(
+                    self.faculty_view.id, selected,
+                    sel == 'y') and sel == 'y' and not was_advisor:
+                print(
+                    "You've become an advisor, please logout and" \
+                    " log back in to gain access to more features."
+                )
+        except ActionError as err:
+            print(err)
         except ValueError:
             print("Bad index")
         except IndexError:
@@ -872,29 +2128,15 @@ class FacultyPanel:
         projs = self.faculty_view.project_ids
         if not projs:
             print("You aren't advising any projects.")
-        idx = 0
-        for proj_id in projs:
-            proj = self.app.projects_table.get(proj_id)
-            if proj is not None:
-                print(f"=====[Project {idx}]=====\n{ProjectView(proj).get_info_string(self.app)}")
-            idx += 1
+        for idx, row in enumerate(self.app.query_projects(projs, True)):
+            if row["project"] is not None:
+                print(f"=====[Project {idx}]=====\n{ProjectView(row['project']).get_info_string(self.app)}")
 
 
 class LeadView(MemberView):
     """A class that makes it easier to access the raw table data of a lead user.
+    Their messages are kept in the inbox of the app, see `ManageApp.inbox`.
     """
-    @property
-    def messages(self):
-        """The list messages.
-
-        Returns:
-            list: The list of messages.
-        """
-        msgs = self.user_data.get("msgs")
-        if msgs is None:
-            msgs = []
-            self.user_data["msgs"] = msgs
-        return msgs
 
 
 class LeadPanel:
@@ -916,44 +2158,58 @@ class LeadPanel:
     def become_member(self):
         """Make the current lead become a member.
         """
-        self.lead_view.become(Role.Member)
+        self.app.change_role(self.lead_view, Role.Member)
         print(
             "You've become a member.\nLogout and log back in to access member features."
         )
 
     def view_responses(self):
-        """View reposeses to requests, invitations, etc
+        """View reposeses to requests, invitations, etc, a page at a time.
         """
-        msgs = self.lead_view.messages
-        if not msgs:
+        pages = self.app.get_message_pages(self.lead_view.id)
+        if not pages:
             print("You do not have any responses.")
             return
-        idx = 0
-        for msg in msgs:
-            msg_view = MessageView(msg)
-            print(f"{idx}. {msg_view.get_title(self.app)}")
-            idx += 1
+        pages, shown = iter(pages), []
+
+        def show_more():
+            page_no = next(pages, None)
+            if page_no is None:
+                print("There are no more responses.")
+                return
+            for msg_id, msg in self.app.read_messages(page_no):
+                print(f"{len(shown)}. {MessageView(msg).get_title(self.app)}")
+                shown.append(msg_id)
+
+        show_more()
         try:
             Panel({
                 '1': ("1. Go back", False),
                 '2':
                 ("2. Delete a message",
-                 lambda: self.msg_delete(msgs, int(input("Enter an index: ")))
+                 lambda: self.msg_delete(shown[int(input("Enter an index: "))])
                  ),
-                '3': ("3. Clear all messages", msgs.clear),
+                '3': ("3. Clear all messages", self.msg_clear),
+                '4': ("4. Show more", show_more),
             }).show()
-        except ValueError:
+        except (ValueError, IndexError):
             print("Bad index")
 
-    def msg_delete(self, msgs, idx):
-        """Deletes a message from a list of messages in O(1)
+    def msg_delete(self, msg_id):
+        """Deletes a message by its id in O(1)
 
         Args:
-            msgs (list): The messages
-            idx (int): The index of the message to delete.
+            msg_id (str): The id of the message to delete.
         """
-        msgs[idx] = msgs[-1]
-        msgs.pop()
+        try:
+            self.app.delete_message(self.lead_view.id, msg_id)
+        except ActionError as err:
+            print(err)
+
+    def msg_clear(self):
+        """Deletes every message.
+        """
+        self.app.clear_messages(self.lead_view.id)
 
     def view_projects(self):
         """Displays the list of projects and allow you to manage it.
@@ -961,14 +2217,11 @@ class LeadPanel:
         projs = self.lead_view.project_ids
         if not projs:
             print("You didn't create any projects.")
-        idx = 0
-        for proj_id in projs:
-            proj = self.app.projects_table.get(proj_id)
-            if proj is not None:
+        for idx, row in enumerate(self.app.query_projects(projs, True)):
+            if row["project"] is not None:
                 print(
-                    f"=====[Project {idx}]=====\n{ProjectView(proj).get_info_string(self.app)}"
+                    f"=====[Project {idx}]=====\n{ProjectView(row['project']).get_info_string(self.app)}"
                 )
-            idx += 1
         cmd = input(
             "Type `exit` to go back.\nType `create` to create a project\n" \
                 "Type an index to manage project.\nType: "
@@ -976,23 +2229,15 @@ class LeadPanel:
         if cmd == "exit":
             return
         if cmd == "create":
-            proj_view = ProjectView({
-                "id":
-                self.app.get_unique_project_id(),
-                "name":
-                input("Enter project name: "),
-                "desc":
-                input("Enter project description: "),
-                "members": [self.lead_view.id],
-                "approved":
-                False
-            })
-            self.app.projects_table.put(proj_view.id, proj_view.project)
-            self.lead_view.project_ids.append(proj_view.id)
+            name = input("Enter project name: ")
+            proj_view = self.app.create_project(
+                self.lead_view.id, name, input("Enter project description: "))
             ProjectPanel(self.app, proj_view).manage(True)
             return
         try:
-            proj_view = ProjectView(self.app.projects_table.get(projs[int(cmd)]))
+            proj_view = ProjectView(
+                self.app.projects_table.get(projs[int(cmd)]),
+                self.app.projects_table)
             ProjectPanel(self.app, proj_view).manage(True)
         except (ValueError, IndexError):
             print("Bad index")
@@ -1017,7 +2262,7 @@ class MemberPanel:
     def become_lead(self):
         """Become a lead.
         """
-        self.member_view.become(Role.Lead)
+        self.app.change_role(self.member_view, Role.Lead)
         print(
             "You've become a lead.\nLogout and log back in to access more features."
         )
@@ -1029,12 +2274,9 @@ class MemberPanel:
         if not proj_ids:
             print("You didn't join any projects.")
             return
-        idx = 0
-        for proj_id in proj_ids:
-            proj_view = ProjectView(self.app.projects_table.get(proj_id))
+        for idx, row in enumerate(self.app.query_projects(proj_ids)):
             print(f"=====[Project {idx}]=====")
-            print(proj_view.get_info_string(self.app))
-            idx += 1
+            print(ProjectView(row["project"]).get_info_string(self.app))
 
     def view_invitations(self):
         """View invitations to join a project.
@@ -1045,42 +2287,42 @@ class MemberPanel:
             return
         while True:
             print("List of invitations: ")
-            idx = 0
-            for req in invs:
-                proj = self.app.projects_table.get(req)
-                if proj is None:
-                    continue
-                proj = ProjectView(proj)
-                lead = self.app.people_table.get(proj.lead_id)
-                if lead is None:
-                    lead = "Unknown"
-                else:
-                    lead = f"{lead['first']} {lead['last']}"
-                print(
-                    f"{idx}. {lead} invited you to join project {proj.name} ({proj.id})"
+            shown, labels = [], []
+            for idx, row in enumerate(self.app.query_projects(invs)):
+                shown.append(row["project"].id)
+                labels.append(
+                    f"{format_name(row['lead'])}" \
+                    f" invited you to join project {format_summary(row['project'])}"
                 )
-                idx += 1
+                print(f"{idx}. {labels[-1]}")
             cmd = input(
-                "Choose a request you want to deal with, type \"exit\" to go back.\nRequest: "
+                f"Choose a request you want to deal with, type \"exit\" to go back.\n{SELECT_HINT}\nRequest: "
             )
             if cmd == "exit":
                 break
             try:
-                idx = int(cmd)
-                if idx >= len(invs):
-                    print("Index out of bounds.")
-                    continue
-                if input("Do you want to accept? (y/n) ") == 'y':
-                    projs = self.member_view.project_ids
-                    projs.append(invs[idx])
-                    proj = self.app.projects_table.get(invs[idx])
-                    if proj is not None:
-                        proj = ProjectView(proj)
-                        proj.add_member(self.member_view.id)
-                invs[idx] = invs[-1]
-                invs.pop()
+                selected = [shown[idx] for idx in select_indexes(cmd, labels)]
             except ValueError:
-                pass
+                continue
+            except IndexError:
+                print("Index out of bounds.")
+                continue
+            if not selected:
+                print("Nothing was selected.")
+                continue
+            self.app.respond_invitations(
+                self.member_view.id, selected,
+                input("Do you want to accept? (y/n) ") == 'y')
+
+
+LS_PARSER = argparse.ArgumentParser(prog="ls", add_help=False)
+LS_PARSER.add_argument("--limit", type=int, default=20)
+LS_PARSER.add_argument("--after")
+LS_PARSER.add_argument("--prefix")
+LS_PARSER.add_argument("--count", action="store_true")
+
+SCHEDULE_PARSER = argparse.ArgumentParser(prog="schedule", add_help=False)
+SCHEDULE_PARSER.add_argument("--evaluators", type=int, default=1)
 
 
 class AdminPanel:
@@ -1089,42 +2331,48 @@ class AdminPanel:
     def __init__(self, app, data, login_data):
         self.data, self.login_data, self.cur, self.cur_str, self.app = \
             data, login_data, app.main_database, '/', app
+        # The listing `ls` pages through, taken again by an `ls` without
+        # `--after`.
+        self.listing = None
 
     def show(self):
         """Shows the admin panel
         """
         Panel({
             'exit': ("Type `exit` to exit", False),
-            'ls': ("Type `ls` to list everything under the current table.",
-                   lambda: print(self.cur.getData())),
+            'ls': ("Type `ls` to list the entries under the current table," \
+                   " `ls --limit N --after KEY --prefix PREFIX` to page" \
+                   " through them or `ls --count` to count them.",
+                   self.on_ls, True),
             'cd': ("Type `cd` to go down to a specific table.", self.cd),
             'home':
             ("Type `home` to go back to the root database.", self.home),
             'set': ("Type `set` to set an entry in the table.", self.on_set),
             'get': ("Type `get` to get an entry in the table.", self.on_get),
+            'find': ("Type `find` to find the entries with a field equal to a value.",
+                     self.on_find),
             'delete': ("Type `delete` to delete an entry in the table.",
                        lambda: self.cur.delete(input("Enter key: "))),
             'assign': ("Type `assign` to assign an evaluator for a project.",
-                       self.assign_eval)
+                       self.assign_eval),
+            'schedule':
+            ("Type `schedule` to assign the least busy faculty to every" \
+             " project on the evaluation list, `schedule --evaluators N`" \
+             " for N each.", self.on_schedule, True),
+            'compact':
+            ("Type `compact` to remove the ids of deleted projects from" \
+             " every list.", self.on_compact)
         }).show()
 
     def assign_eval(self):
         """Assign a project evaluation task to a faculty.
         """
-        evaluation_list = self.app.documents_table.get("evaluation list")
-        if evaluation_list is None:
-            evaluation_list = []
-            self.app.documents_table.put("evaluation list", evaluation_list)
-        idx = 0
-        for project_id in evaluation_list:
-            project = self.app.projects_table.get(project_id)
-            if project is None:
-                idx += 1
-                continue
-            project = ProjectView(project)
-            print(f"=====[Project {idx}]=====")
-            print(project.get_info_string(self.app))
-            idx += 1
+        evaluation_list = list(self.app.evaluation_list)
+        for idx, row in enumerate(
+                self.app.query_projects(evaluation_list, True)):
+            if row["project"] is not None:
+                print(f"=====[Project {idx}]=====")
+                print(ProjectView(row["project"]).get_info_string(self.app))
         project_idx = None
         try:
             project_idx = int(input("Please enter a project index: "))
@@ -1134,27 +2382,54 @@ class AdminPanel:
         if project_idx < 0 or project_idx >= len(evaluation_list):
             print("Invalid index")
             return
-        project = self.app.projects_table.get(evaluation_list[project_idx])
-        if project is None:
+        project_id = evaluation_list[project_idx]
+        if self.app.projects_table.get(project_id) is None:
             print("Invalid project")
-        project = ProjectView(project)
-        evaluator = self.app.find_user(
-            input("Please enter username/id of the evaluator: "))
-        if evaluator is None:
-            print("Invalid evaluator: ")
             return
-        evaluator = FacultyView(evaluator,
-                                self.app.get_login_from_data(evaluator))
-        if evaluator.role not in {Role.Advisor, Role.Faculty}:
-            print("The evaluator must be a faculty.")
+        try:
+            evaluator = self.app.assign_evaluator(
+                project_id,
+                input("Please enter username/id of the evaluator: "))
+        except ActionError as err:
+            print(err)
             return
-        evaluator.evaluating_projects.append(project.id)
         print(f"Succesfully set the evaluator to be {evaluator.name}")
 
+    def on_schedule(self, args):
+        """Assigns evaluators to every project on the evaluation list.
+
+        Args:
+            args (str): The arguments, see `SCHEDULE_PARSER`.
+        """
+        try:
+            args = SCHEDULE_PARSER.parse_args(shlex.split(args))
+        except (SystemExit, ValueError):
+            print("Bad arguments.")
+            return
+        if args.evaluators < 1:
+            print("Bad arguments.")
+            return
+        assigned = self.app.assign_evaluation_list(args.evaluators)
+        for project_id, evaluators in assigned.items():
+            names = ', '.join(
+                self.app.get_name_from_id(faculty_id)
+                for faculty_id in evaluators)
+            print(f"{self.app.get_project_summary(project_id)}: {names}")
+        waiting = self.app.evaluation_list
+        print(f"Assigned evaluators to {len(assigned)} projects, "
+              f"{len(waiting)} are still waiting.")
+
+    def on_compact(self):
+        """Removes the ids of deleted projects and repeated ids from every list.
+        """
+        report = self.app.compact()
+        print(f"Removed {report['dangling']} ids of deleted projects and "
+              f"{report['duplicates']} repeated ids from {report['rows']} rows.")
+
     def home(self):
         """Go back to root.
         """
-        self.cur = self.app.main_database
+        self.cur, self.listing = self.app.main_database, None
 
     def cd(self):
         """Goes into a sub table
@@ -1164,7 +2439,7 @@ class AdminPanel:
             print("Entry doesn't exist.")
             return
         self.cur_str += f"{to_cd_into}/"
-        self.cur = to_cd_into
+        self.cur, self.listing = to_cd_into, None
 
     def on_set(self):
         """Set a value of a key.
@@ -1172,9 +2447,53 @@ class AdminPanel:
         try:
             self.cur.put(input("Enter key: "),
                          json.loads(input("Enter value: ")))
-        except json.decoder.JSONDecodeError:
+        except ValueError:
             print("Bad value.")
 
+    def on_ls(self, args):
+        """Lists a page of the entries of the table.
+
+        Args:
+            args (str): The arguments, see `LS_PARSER`.
+        """
+        try:
+            args = LS_PARSER.parse_args(shlex.split(args))
+        except (SystemExit, ValueError):
+            print("Bad arguments.")
+            return
+        listing = self.listing
+        if listing is None or listing.table is not self.cur \
+                or listing.prefix != args.prefix \
+                or (args.after is None and not args.count):
+            listing = self.listing = self.cur.listing(args.prefix)
+        if args.count:
+            print(listing.count())
+            return
+        page = listing.page(args.limit, args.after)
+        for key, val in page:
+            write_json(key)
+            sys.stdout.write(": ")
+            write_json(val)
+            sys.stdout.write("\n")
+        if page and len(page) == args.limit:
+            print(f"Type `ls --after {shlex.quote(str(page[-1][0]))}`" \
+                  " to see the next page.")
+
+    def on_find(self):
+        """Lists the entries of the table with a field equal to a value.
+        """
+        field = input("Enter field: ")
+        try:
+            value = json.loads(input("Enter value: "))
+        except ValueError:
+            print("Bad value.")
+            return
+        query = self.cur.query().where(**{field: value})
+        for row in query:
+            write_json(row["row"])
+            print()
+        print(f"({query.explain()})")
+
     def on_get(self):
         """Get a value from a key
         """
@@ -1182,10 +2501,40 @@ class AdminPanel:
         if entry is None:
             print("Invalid key.")
             return
-        try:
-            print(json.dumps(entry))
-        except TypeError:
-            print(entry)
-
-
-ManageApp().run().save()
+        write_json(entry)
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="The project management app.")
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=1,
+        help="The number of processes used to hash passwords on the first run."
+    )
+    parser.add_argument(
+        "--single-file",
+        action="store_true",
+        help="Keep the database in one snapshot file, see `Snapshot`.")
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help="Keep the database in a SQLite file, see `SqliteDatabase`.")
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60,
+        help="Seconds between background checkpoints, 0 to never run them.")
+    parser.add_argument(
+        "--checkpoint-process",
+        action="store_true",
+        help="Write the background checkpoints from a spawned process.")
+    args = parser.parse_args()
+    app = ManageApp(args.hash_workers, args.single_file, args.sqlite)
+    if args.checkpoint_interval:
+        app.start_checkpointer(args.checkpoint_interval,
+                               args.checkpoint_process)
+    app.run()
+    app.stop_checkpointer()
+    app.save()
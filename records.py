@@ -0,0 +1,336 @@
+"""
+Compact rows for the people, login and projects tables.
+
+A record keeps its fields in slots, so the field names are stored once
+in the class instead of once in every row like the keys of a dictionary.
+Records can still be used like dictionaries, so code and data written for
+the old dictionary rows keep working, `Table.convert` migrates those rows.
+"""
+from itertools import islice
+from operator import attrgetter
+
+
+class Record:
+    """A row with a fixed set of fields kept in slots, fields that aren't
+    set are None. It can be used like a dictionary where a field set to
+    None is missing, but only the fields can be set.
+
+    Args:
+        *values: The values of the fields, in the order of `FIELDS`.
+    """
+    FIELDS = ()
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Gets every field at once, which makes pickling a lot faster.
+        cls._values = attrgetter(*cls.FIELDS)
+
+    def __init__(self, *values):
+        for field, val in zip(self.FIELDS, values):
+            setattr(self, field, val)
+        for field in self.FIELDS[len(values):]:
+            setattr(self, field, None)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Makes a record from a dictionary row.
+
+        Args:
+            data (dict): The row.
+
+        Raises:
+            ValueError: If a key of the row isn't a field.
+
+        Returns:
+            Record: The record.
+        """
+        unknown = [key for key in data if key not in cls.FIELDS]
+        if unknown:
+            raise ValueError(
+                f"{', '.join(map(str, unknown))} aren't fields of {cls.__name__}")
+        record = cls()
+        for key, val in data.items():
+            record[key] = val
+        return record
+
+    @classmethod
+    def migrate(cls, row):
+        """Turns a dictionary row into a record, records are left alone.
+
+        Args:
+            row (dict): The row.
+
+        Returns:
+            Record: The record.
+        """
+        return cls.from_dict(row) if isinstance(row, dict) else row
+
+    def to_dict(self):
+        """Turns the record into a dictionary, fields that are None are left out.
+
+        Returns:
+            dict: The dictionary.
+        """
+        return dict(self.items())
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, val):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, val)
+
+    def get(self, key, default=None):
+        """Gets the value of a field.
+
+        Args:
+            key (str): The field.
+            default (any, optional): The fallback value. Defaults to None.
+
+        Returns:
+            any: The value or else the fallback value.
+        """
+        val = getattr(self, key) if key in self.FIELDS else None
+        return default if val is None else val
+
+    def setdefault(self, key, default=None):
+        """Gets the value of a field, setting it first if it's missing.
+
+        Args:
+            key (str): The field.
+            default (any, optional): The value to set. Defaults to None.
+
+        Returns:
+            any: The value.
+        """
+        val = self.get(key)
+        if val is None:
+            self[key] = val = default
+        return val
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        """The fields that are set.
+
+        Returns:
+            list: The fields.
+        """
+        return [key for key, _ in self.items()]
+
+    def items(self):
+        """The fields that are set and their values.
+
+        Returns:
+            list: The pairs of field and value.
+        """
+        return [(field, val) for field, val in zip(self.FIELDS, self._values(self))
+                if val is not None]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, self._values(self))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+class RequestQueue:
+    """Project ids waiting on someone, in the order they came in.
+    It's used like a list, but appending an id that's already queued does
+    nothing and checking for an id or removing one doesn't depend on how
+    many are queued. Up to `SMALL` ids are kept in a list, which takes a
+    lot less memory than a dictionary and is still quick to look through,
+    more are kept in a dictionary. An empty queue holds neither.
+    Indexing goes from the nearest end, so the first and the last ids are
+    found right away.
+
+    Args:
+        ids (iterable, optional): The ids. Defaults to ().
+    """
+    SMALL = 8
+    __slots__ = ("_ids", )
+
+    def __init__(self, ids=()):
+        unique = dict.fromkeys(ids)
+        if not unique:
+            self._ids = None
+        elif len(unique) <= self.SMALL:
+            self._ids = list(unique)
+        else:
+            self._ids = unique
+
+    def append(self, item):
+        """Queues an id at the end if it isn't queued yet.
+
+        Args:
+            item (str): The id.
+
+        Returns:
+            bool: True if it was queued else False.
+        """
+        ids = self._ids
+        if ids is None:
+            self._ids = [item]
+            return True
+        if item in ids:
+            return False
+        if isinstance(ids, list) and len(ids) < self.SMALL:
+            ids.append(item)
+            return True
+        if isinstance(ids, list):
+            self._ids = ids = dict.fromkeys(ids)
+        ids[item] = None
+        return True
+
+    def extend(self, items):
+        """Queues ids at the end, the ones already queued are skipped.
+
+        Args:
+            items (iterable): The ids.
+        """
+        for item in items:
+            self.append(item)
+
+    def remove(self, item):
+        """Removes an id.
+
+        Args:
+            item (str): The id.
+
+        Raises:
+            ValueError: If it isn't queued.
+        """
+        ids = self._ids
+        if ids is None or item not in ids:
+            raise ValueError(f"{item} is not queued")
+        if isinstance(ids, list):
+            ids.remove(item)
+        else:
+            del ids[item]
+        if not ids:
+            self._ids = None
+
+    def clear(self):
+        """Removes every id.
+        """
+        self._ids = None
+
+    def __contains__(self, item):
+        return self._ids is not None and item in self._ids
+
+    def __iter__(self):
+        return iter(self._ids or ())
+
+    def __len__(self):
+        return 0 if self._ids is None else len(self._ids)
+
+    def __getitem__(self, idx):
+        ids = self._ids
+        if not isinstance(ids, dict):
+            return (ids or [])[idx]
+        if isinstance(idx, slice):
+            return list(ids)[idx]
+        if not -len(ids) <= idx < len(ids):
+            raise IndexError("queue index out of range")
+        if idx < 0:
+            return next(islice(reversed(ids), -idx - 1, None))
+        return next(islice(ids, idx, None))
+
+    def __eq__(self, other):
+        if isinstance(other, (RequestQueue, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, (list(self), ))
+
+    def __repr__(self):
+        return f"RequestQueue({list(self)})"
+
+
+class Message(Record):
+    """A message sent to a lead.
+    """
+    FIELDS = ("type", "author", "project")
+    __slots__ = FIELDS
+
+
+class Person(Record):
+    """A row of the people table.
+    """
+    FIELDS = ("ID", "first", "last", "type", "projs", "invs", "adv_reqs",
+              "apr_reqs", "eval_projs", "msgs")
+    # The fields that hold project ids waiting on the person.
+    QUEUES = ("invs", "adv_reqs", "apr_reqs", "eval_projs")
+    __slots__ = FIELDS
+
+    @classmethod
+    def migrate(cls, row):
+        """Turns a dictionary row into a person and the lists of project
+        ids waiting on them into request queues. A person whose lists are
+        turned into queues is copied, so `Table.convert` sees it changed.
+
+        Args:
+            row (dict): The row.
+
+        Returns:
+            Person: The person.
+        """
+        record = super().migrate(row)
+        for field in cls.QUEUES:
+            ids = getattr(record, field)
+            if ids is not None and not isinstance(ids, RequestQueue):
+                if record is row:
+                    record = cls(*cls._values(record))
+                setattr(record, field, RequestQueue(ids))
+        return record
+
+    @classmethod
+    def from_dict(cls, data):
+        """Makes a person from a dictionary row, their messages too.
+
+        Args:
+            data (dict): The row.
+
+        Returns:
+            Person: The person.
+        """
+        record = super().from_dict(data)
+        if record.msgs:
+            record.msgs = [Message.migrate(msg) for msg in record.msgs]
+        return record
+
+
+class Login(Record):
+    """A row of the login table.
+    """
+    FIELDS = ("id", "username", "password", "role")
+    __slots__ = FIELDS
+
+
+class Project(Record):
+    """A row of the projects table.
+    """
+    FIELDS = ("id", "name", "desc", "members", "approved", "advisor",
+              "evaluated", "report")
+    __slots__ = FIELDS
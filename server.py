@@ -0,0 +1,209 @@
+"""
+Serves the manage app to many clients at once over TCP.
+
+Clients send the same JSON commands as `batch.py`, one per line, and get one
+JSON line back for each, e.g. `{"ok": true, "result": ...}`. Every connection
+has its own session, so it logs in with the `login` command first.
+An `id` sent with a command is sent back with its reply.
+"""
+import argparse
+import asyncio
+import json
+import signal
+from project_manage import ManageApp, Compactor, describe
+from batch import Runner
+
+
+class Server:
+    """Serves one manage app to many connections.
+
+    Commands are run one at a time on the event loop so they never see
+    each other half done. A connection only gets its next command read
+    once the reply to the last one has been sent, so a client that sends
+    faster than it reads is slowed down instead of filling up memory.
+
+    Args:
+        app (ManageApp): The manage app.
+        max_sessions (int, optional): The number of connections served
+            at once, the others wait for a free slot. Defaults to 1000.
+        max_line (int, optional): The longest command in bytes. Defaults to 65536.
+    """
+    def __init__(self, app, max_sessions=1000, max_line=1 << 16):
+        self.app, self.max_sessions, self.max_line = app, max_sessions, max_line
+        self.sessions = 0
+        self.__slots = None
+
+    async def handle(self, reader, writer):
+        """Serves one connection until it is closed.
+
+        Args:
+            reader (asyncio.StreamReader): The reader of the connection.
+            writer (asyncio.StreamWriter): The writer of the connection.
+        """
+        async with self.__slots:
+            self.sessions += 1
+            runner = Runner(self.app)
+            try:
+                while True:
+                    try:
+                        line = await reader.readline()
+                    except ValueError:
+                        writer.write(b'{"ok": false, "error": "Line too long."}\n')
+                        break
+                    if not line:
+                        break
+                    writer.write(self.respond(runner, line))
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                self.sessions -= 1
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+
+    @staticmethod
+    def respond(runner, line):
+        """Runs one command line.
+
+        Args:
+            runner (Runner): The runner of the connection.
+            line (bytes): The command as a JSON line.
+
+        Returns:
+            bytes: The reply as a JSON line.
+        """
+        try:
+            command = json.loads(line)
+            if not isinstance(command, dict):
+                raise ValueError
+        except ValueError:
+            return b'{"ok": false, "error": "Bad command."}\n'
+        reply = runner.run(command)
+        if "id" in command:
+            reply["id"] = command["id"]
+        return json.dumps(reply, default=describe).encode() + b'\n'
+
+    async def compact(self, interval):
+        """Compacts the database every interval seconds, a chunk of people
+        at a time in between the commands, see `Compactor`.
+
+        Args:
+            interval (float): Seconds between compactions.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            compactor = Compactor(self.app)
+            while compactor.step():
+                await asyncio.sleep(0)
+            report = compactor.report
+            if report["rows"]:
+                print(f"Compacted {report['rows']} rows, removed "
+                      f"{report['dangling']} dangling and "
+                      f"{report['duplicates']} repeated ids",
+                      flush=True)
+
+    async def serve(self,
+                    host="127.0.0.1",
+                    port=8000,
+                    save_interval=5,
+                    compact_interval=3600):
+        """Serves until SIGINT or SIGTERM, then saves the database.
+
+        Args:
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on, 0 picks a free one.
+                Defaults to 8000.
+            save_interval (float, optional): Seconds between saves. Defaults to 5.
+            compact_interval (float, optional): Seconds between compactions,
+                0 to never compact. Defaults to 3600.
+        """
+        self.__slots = asyncio.Semaphore(self.max_sessions)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+        server = await asyncio.start_server(self.handle,
+                                            host,
+                                            port,
+                                            limit=self.max_line,
+                                            backlog=self.max_sessions)
+        address = server.sockets[0].getsockname()
+        print(f"Listening on {address[0]}:{address[1]}", flush=True)
+        compacting = None
+        if compact_interval:
+            compacting = asyncio.create_task(self.compact(compact_interval))
+        async with server:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), save_interval)
+                except asyncio.TimeoutError:
+                    self.app.save()
+        if compacting is not None:
+            compacting.cancel()
+        self.app.save()
+
+
+def main():
+    """Runs the server.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serves the manage app to many clients at once.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-sessions",
+                        type=int,
+                        default=1000,
+                        help="The number of connections served at once.")
+    parser.add_argument("--save-interval",
+                        type=float,
+                        default=5,
+                        help="Seconds between saves.")
+    parser.add_argument("--compact-interval",
+                        type=float,
+                        default=3600,
+                        help="Seconds between compactions, 0 to never compact.")
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=1,
+        help="The number of processes used to hash passwords on the first run."
+    )
+    parser.add_argument(
+        "--single-file",
+        action="store_true",
+        help="Keep the database in one snapshot file, see `Snapshot`.")
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help="Keep the database in a SQLite file, see `SqliteDatabase`.")
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60,
+        help="Seconds between background checkpoints, 0 to never run them.")
+    parser.add_argument(
+        "--checkpoint-process",
+        action="store_true",
+        help="Write the background checkpoints from a spawned process.")
+    args = parser.parse_args()
+    app = ManageApp(args.hash_workers, args.single_file, args.sqlite)
+    if args.checkpoint_interval:
+        app.start_checkpointer(args.checkpoint_interval,
+                               args.checkpoint_process)
+    server = Server(app, args.max_sessions)
+    try:
+        asyncio.run(
+            server.serve(args.host, args.port, args.save_interval,
+                         args.compact_interval))
+    finally:
+        app.stop_checkpointer()
+
+
+if __name__ == "__main__":
+    main()
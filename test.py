@@ -104,4 +104,5 @@ def fakeInput(text):
     return ret;
 setattr(builtins, 'input', fakeInput)
 
-import project_manage
\ No newline at end of file
+import project_manage
+project_manage.ManageApp().run().save()
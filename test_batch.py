@@ -0,0 +1,52 @@
+"""
+Tests of the batch runner.
+"""
+from batch import Runner, read_commands
+from project_manage import ManageApp
+
+LEAD, MEMBER = "9898118", "5662557"
+
+
+def test_commands_check_their_arguments(app_dir):
+    runner = Runner(ManageApp())
+    outcomes = [
+        runner.run(command) for command in (
+            {"op": "create_project", "name": "Robot", "desc": ""},
+            {"op": "login", "username": "Lionel.M", "password": "2977"},
+            {"op": "become", "role": "lead"},
+            {"op": "create_project", "name": "Robot", "desc": "", "as": "robot",
+             "id": 1},
+            {"op": "invite", "project": "$robot", "user": "Manuel.N"},
+            {"op": "invite", "project": "$robot"},
+            {"op": "invite", "project": "$robot", "user": "x", "extra": 1},
+            {"op": "assign_evaluation_list"},
+            {"op": "fly"},
+            ["not", "a", "command"],
+        )
+    ]
+    assert [outcome["ok"] for outcome in outcomes] == [
+        False, True, True, True, True, False, False, False, False, False
+    ]
+    assert outcomes[0]["error"] == "Please login first."
+    assert outcomes[1]["result"] == {"id": LEAD, "role": 0}
+    assert outcomes[4]["result"] == MEMBER
+    assert outcomes[5]["error"].startswith("Bad arguments")
+    assert outcomes[6]["error"].startswith("Bad arguments")
+    assert outcomes[7]["error"] == "You are not allowed to do that."
+    assert outcomes[8]["error"] == "Unknown operation fly."
+    assert outcomes[9]["error"] == "Bad command."
+    assert runner.app.people_table.get(MEMBER)["invs"] == [
+        outcomes[3]["result"]
+    ]
+    report = runner.report()
+    assert report["commands"] == 10 and report["errors"] == 6
+    assert report["operations"]["invite"] == {
+        **report["operations"]["invite"], "count": 3, "errors": 2
+    }
+
+
+def test_commands_file_skips_comments(tmp_path):
+    path = tmp_path / "commands.jsonl"
+    path.write_text('# a comment\n\n{"op": "logout"}\nnot json\n',
+                    encoding="utf-8")
+    assert list(read_commands(str(path))) == [(3, {"op": "logout"}), (4, None)]
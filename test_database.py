@@ -0,0 +1,520 @@
+"""
+Tests of the database module.
+"""
+import os
+import sys
+import threading
+import pytest
+from database import (Database, Table, ConcurrentTable, LazyTable, Journal,
+                      Relation, Snapshot, SqliteDatabase, Checkpointer,
+                      CsvFile, LruCache, read_table)
+
+
+def open_database(path, **kwargs):
+    database = Database(str(path), journal=True, **kwargs)
+    if not database.load():
+        database.add_table("people")
+        database.checkpoint()
+    return database
+
+
+def change(table, key, number):
+    """Changes a row in place and touches it with what changed."""
+    row = table.get(key)
+    row["count"] = number
+    row["projs"].append(number)
+    changes = [("set", "count", number), ("add", "projs", number)]
+    if len(row["projs"]) > 3:
+        changes.append(("remove", "projs", row["projs"].pop(0)))
+    table.touch(key, changes)
+
+
+def test_journal_replays_puts_deletes_and_changes(tmp_path):
+    database = open_database(tmp_path / "db")
+    people = database.get("people")
+    for key in "abc":
+        people.put(key, {"count": 0, "projs": []})
+    for number in range(5):
+        change(people, "a", number)
+    people.delete("b")
+    people.get("c")["count"] = 7
+    people.touch("c")
+    records = list(Journal.records(database.journal.path))
+    assert ("people", "change", "a", [("set", "count", 0),
+                                      ("add", "projs", 0)]) in records
+    assert ("people", "put", "c", {"count": 7, "projs": []}) in records
+    database.journal.close()
+
+    reopened = open_database(tmp_path / "db")
+    assert reopened.get("people").getData() == people.getData()
+    assert reopened.get("people").get("a") == {
+        "count": 4,
+        "projs": [2, 3, 4]
+    }
+
+
+def test_journal_drops_a_torn_record(tmp_path):
+    database = open_database(tmp_path / "db")
+    database.get("people").put("a", {"count": 1})
+    database.get("people").put("b", {"count": 2})
+    database.journal.close()
+    path = f"{tmp_path / 'db'}.wal"
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    reopened = open_database(tmp_path / "db")
+    assert reopened.get("people").getData() == {"a": {"count": 1}}
+    reopened.get("people").put("b", {"count": 2})
+    reopened.journal.close()
+    with open(path, "ab") as file:
+        file.write(bytes(100))
+    assert open_database(tmp_path / "db").get("people").count() == 2
+
+
+def test_journal_rejects_a_damaged_record(tmp_path, monkeypatch):
+    database = open_database(tmp_path / "db")
+    database.get("people").put("a", {"count": 1})
+    database.get("people").put("b", {"count": 2})
+    database.journal.close()
+    path = f"{tmp_path / 'db'}.wal"
+    with open(path, "r+b") as file:
+        file.seek(Journal.HEADER.size + 2)
+        file.write(b"?")
+    with pytest.raises(ValueError):
+        open_database(tmp_path / "db")
+    assert os.path.getsize(path) > 0
+
+    database = open_database(tmp_path / "other")
+    database.get("people").put("a", Relation())
+    database.journal.close()
+    monkeypatch.delattr("database.Relation")
+    with pytest.raises(AttributeError):
+        open_database(tmp_path / "other")
+
+
+def test_csv_is_read_a_typed_chunk_at_a_time(tmp_path):
+    path = tmp_path / "people.csv"
+    path.write_text("ID,age,type\n" + "".join(
+        f"{number},{20 + number},{'student' if number % 2 else 'faculty'}\n"
+        for number in range(5)), encoding="utf-8")
+    chunks = list(CsvFile(str(path)).readChunks(2, {"age": int}, ("type", )))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    rows = [row for chunk in chunks for row in chunk]
+    assert rows[1] == {"ID": "1", "age": 21, "type": "student"}
+    assert rows[1]["type"] is rows[3]["type"] is sys.intern("student")
+
+    table = Table()
+    stats = table.fromCsvChunks("ID", CsvFile(str(path)), 2)
+    assert stats["rows"] == 5 and table.count() == 5
+    assert table.get("4") == {"ID": "4", "age": "24", "type": "faculty"}
+
+
+def test_lazy_table_is_read_on_first_use(tmp_path):
+    database = open_database(tmp_path / "db")
+    database.get("people").put("a", {"id": "1"})
+    database.add_table("other")
+    database.checkpoint()
+    database.journal.close()
+
+    lazy = open_database(tmp_path / "db", lazy=True)
+    people, seen = lazy.get("people"), []
+    assert isinstance(people, LazyTable) and not people.loaded
+    people.listen(lambda action, key, val: seen.append((action, key)))
+    people.create_index("id", lambda row: row.get("id"), unique=True)
+    lazy.get("other").put("x", 1)
+    assert lazy.checkpoint() == ["other"]
+    assert not people.loaded and people.generation == 0
+
+    assert people.find_one("id", "1") == {"id": "1"}
+    assert people.loaded
+    people.put("b", {"id": "2"})
+    assert seen == [("put", "b")]
+    assert people.find("id", "2") == [{"id": "2"}]
+
+
+def test_unique_index_rejects_a_taken_key():
+    table = Table()
+    table.create_index("id", lambda row: row.get("id"), unique=True)
+    table.create_index("role", lambda row: row.get("role"))
+    table.put("a", {"id": 1, "role": "member"})
+    table.put("b", {"id": 2, "role": "member"})
+    with pytest.raises(ValueError):
+        table.put("c", {"id": 1, "role": "lead"})
+    assert table.get("c") is None and table.find("role", "lead") == []
+
+    table.get("b")["role"] = "lead"
+    table.touch("b")
+    assert table.find("role", "member") == [{"id": 1, "role": "member"}]
+    assert table.find("role", "lead") == [{"id": 2, "role": "lead"}]
+    table.delete("a")
+    table.put("c", {"id": 1, "role": "lead"})
+    assert table.find_one("id", 1) == {"id": 1, "role": "lead"}
+    assert [row["id"] for row in table.find("role", "lead")] == [2, 1]
+
+
+@pytest.mark.parametrize("table_type", [Table, ConcurrentTable])
+def test_page_follows_the_writes(table_type):
+    table = table_type({f"k{number:03}": number for number in range(0, 100, 2)})
+    assert [key for key, _ in table.page(3)] == ["k000", "k002", "k004"]
+    table.put("k001", 1)
+    table.delete("k002")
+    assert table.page(3) == [("k000", 0), ("k001", 1), ("k004", 4)]
+    assert [key for key, _ in table.page(2, after="k004")] == ["k006", "k008"]
+    assert [key for key, _ in table.page(10, prefix="k09")] == [
+        "k090", "k092", "k094", "k096", "k098"
+    ]
+    keys, after = [], None
+    while True:
+        page = table.page(7, after=after)
+        if not page:
+            break
+        keys += [key for key, _ in page]
+        after = page[-1][0]
+    assert keys == sorted(table.getData())
+
+    listing = table.listing("k0")
+    assert listing.count() == 50
+    table.delete("k004")
+    table.put("k005", 5)
+    assert listing.page(3) == [("k000", 0), ("k001", 1), ("k006", 6)]
+    assert [key for key, _ in listing.page(2, after="k094")] == ["k096", "k098"]
+    assert table.listing("k00").count() == 5
+
+
+def test_lru_cache_throws_out_the_least_recently_used():
+    cache, computed = LruCache(2), []
+
+    def compute(key):
+        computed.append(key)
+        return key.upper()
+
+    assert cache.get("a", compute) == "A" and cache.get("b", compute) == "B"
+    assert cache.get("a", compute) == "A"
+    cache.get("c", compute)
+    assert cache.get("a", compute) == "A" and computed == ["a", "b", "c"]
+    assert cache.get("b", compute) == "B" and computed[-1] == "b"
+    assert cache.invalidate("b") == "B" and cache.invalidate("b") is None
+    assert cache.stats() == {"hits": 2, "misses": 4, "entries": 1}
+
+
+def test_query_uses_keys_indexes_and_joins():
+    people = Table({
+        "u1": {"name": "Ann", "role": 1},
+        "u2": {"name": "Bob", "role": 0},
+        "u3": {"name": "Cid", "role": 1}
+    })
+    people.create_index("role", lambda row: row.get("role"))
+    projects = Table({
+        "p1": {"lead": "u1", "size": 3},
+        "p2": {"lead": "u3", "size": 1},
+        "p3": {"lead": "gone", "size": 2}
+    })
+    leads = people.query("person").where(role=1)
+    assert leads.explain() == "index role of person"
+    assert sorted(row["person"]["name"] for row in leads) == ["Ann", "Cid"]
+
+    query = projects.query("project").join(
+        people, "lead", lambda project: project["lead"],
+        outer=True).order(lambda row: row["project"]["size"]).select(
+            lambda row: (row["project"]["size"], row["lead"] and
+                         row["lead"]["name"]))
+    assert query.explain() == "scan of project, outer join lead on project by keys"
+    assert list(query) == [(1, "Cid"), (2, None), (3, "Ann")]
+    assert query.limit(1, 1).first() == (2, None) and query.count() == 1
+
+    by_keys = projects.query("project").keys(["p2", "p9", "p1"],
+                                             keep_missing=True)
+    assert [row["project"] for row in by_keys] == [
+        {"lead": "u3", "size": 1}, None, {"lead": "u1", "size": 3}
+    ]
+    projects.create_index("lead", lambda project: project["lead"])
+    led = people.query("person").join(projects, "project",
+                                      lambda _: "u1", index="lead")
+    assert led.explain() == "scan of person, join project on person by index lead"
+    assert led.count() == 3
+    assert people.query().where(lambda row: row["name"] < "C",
+                                role=1).count() == 1
+
+
+def test_relation_links_both_ways():
+    relation = Relation()
+    relation.link("u1", "p1", "lead")
+    relation.link("u1", "p1", "joined")
+    relation.link("u2", "p1", "member")
+    assert sorted(relation.get_lefts("p1")) == ["u1", "u2"]
+    assert relation.get_rights("u1", "lead") == ["p1"]
+    relation.unlink("u1", "p1", "lead")
+    assert relation.get_rights("u1", "lead") == []
+    assert relation.get_lefts("p1", "joined") == ["u1"]
+    relation.unlink("u1", "p1", "joined")
+    relation.unlink("u1", "p1", "joined")
+    assert relation.get_lefts("p1") == ["u2"]
+    assert list(relation.left_links("u1")) == []
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_snapshot_keeps_every_table(tmp_path, lazy):
+    database = open_database(tmp_path / "db", single_file=True)
+    long_text = "x" * 4096
+    database.get("people").put("a", {"bio": long_text, "projs": [1]})
+    database.add_table("other").put("b", 2)
+    database.checkpoint()
+    database.journal.close()
+    assert os.path.isfile(f"{tmp_path / 'db'}.snap")
+
+    reopened = open_database(tmp_path / "db", single_file=True, lazy=lazy)
+    assert reopened.get("people").get("a") == {"bio": long_text, "projs": [1]}
+    reopened.get("other").put("c", 3)
+    reopened.checkpoint()
+    reopened.journal.close()
+
+    snapshot = Snapshot(f"{tmp_path / 'db'}.snap")
+    snapshot.open()
+    assert sorted(snapshot.names()) == ["other", "people"]
+    assert snapshot.read("other") == {"b": 2, "c": 3}
+    assert snapshot.read("people")["a"]["bio"] == long_text
+    snapshot.close()
+
+
+def test_sqlite_keeps_rows_that_left_the_cache(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "db"), batch_size=100,
+                              cache_rows=2)
+    assert not database.load()
+    people = database.add_table("people")
+    people.create_index("role", lambda row: row.get("role"))
+    for number in range(6):
+        people.put(str(number), {"role": number % 2, "projs": []})
+    assert [people.get(str(number))["role"] for number in range(6)] == [
+        0, 1, 0, 1, 0, 1
+    ]
+    assert len(people.find("role", 1)) == 3
+    people.get("0")["projs"].append("p")
+    people.touch("0", [("add", "projs", "p")])
+    people.flush()
+    for number in range(1, 6):
+        people.get(str(number))
+    people.touch("0", [("add", "projs", "q"), ("set", "role", 2)])
+    database.close()
+
+    reopened = SqliteDatabase(str(tmp_path / "db"))
+    assert reopened.load()
+    assert reopened.get("people").get("0") == {"role": 2, "projs": ["p", "q"]}
+    assert reopened.get("people").count() == 6
+    reopened.close()
+
+
+def test_sqlite_store_is_in_the_transactions_of_the_tables(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "db"), batch_size=1)
+    assert not database.load()
+    people = database.add_table("people")
+    store = database.open_store("inbox", page_size=2)
+    ids = [store.append("a", number) for number in range(3)]
+    with pytest.raises(KeyError):
+        with database.transaction():
+            people.put("a", 1)
+            store.append("a", 3)
+            raise KeyError("a")
+    with database.transaction():
+        store.append("b", 4)
+        assert store.delete("a", ids[1]) and not store.delete("b", ids[1])
+    database.close()
+
+    reopened = SqliteDatabase(str(tmp_path / "db"))
+    assert reopened.load() and list(reopened.getData()) == ["people"]
+    store = reopened.open_store("inbox", page_size=2)
+    assert reopened.get("people").count() == 0
+    assert list(store.entries("a")) == [(ids[0], 0), (ids[2], 2)]
+    assert len(store.pages("a")) == 2 and len(store.pages("b")) == 1
+    store.clear("a")
+    assert store.pages("a") == [] and list(store.entries("b"))[0][1] == 4
+    reopened.close()
+
+
+@pytest.mark.parametrize("process", [False, True])
+def test_checkpointer_rebuilds_from_the_journal(tmp_path, process):
+    database = open_database(tmp_path / "db")
+    people = database.get("people")
+    for key in "abc":
+        people.put(key, {"count": 0, "projs": []})
+    database.checkpoint()
+    for number in range(10):
+        change(people, "abc"[number % 3], number)
+    checkpointer = Checkpointer(database, interval=60, process=process)
+    metric = checkpointer.run_once()
+    assert metric["error"] is None and metric["tables"] == ["people"]
+    assert not os.path.isfile(database.journal.rotated_path)
+    assert read_table(str(tmp_path / "db" / "people")).getData() == \
+        people.getData()
+    assert checkpointer.stats()["checkpoints"] == 1
+
+    people.convert(lambda row: {**row, "converted": True})
+    job = database.begin_checkpoint(background=True)
+    assert job.rebuilt == [] and "people" in job.tables
+    database.finish_checkpoint(job, job.write())
+    database.journal.close()
+
+    reopened = Database(str(tmp_path / "db"))
+    assert reopened.load()
+    assert reopened.get("people").getData() == people.getData()
+
+
+def test_a_checkpoint_waits_for_a_write_to_be_journaled(tmp_path):
+    """A checkpoint that begins while a write is told to the listeners
+    still writes it or keeps it in the journal."""
+    database = open_database(tmp_path / "db")
+    entered, released = threading.Event(), threading.Event()
+    people = Table()
+    people.listen(lambda action, key, val: entered.set() or released.wait(5))
+    database.put("other", people)
+    database.checkpoint()
+    writer = threading.Thread(target=people.put, args=("a", {"count": 1}))
+    writer.start()
+    assert entered.wait(5)
+    checkpointer = Checkpointer(database, interval=60)
+    background = threading.Thread(target=checkpointer.run_once)
+    background.start()
+    background.join(0.2)
+    released.set()
+    writer.join()
+    background.join()
+    assert checkpointer.run_once()["error"] is None
+    database.journal.close()
+
+    reopened = open_database(tmp_path / "db")
+    assert reopened.get("other").getData() == {"a": {"count": 1}}
+
+
+class Slow:
+    """Waits while it's pickled, it's unpickled as 7."""
+    pickling, released = threading.Event(), threading.Event()
+
+    def __reduce__(self):
+        Slow.pickling.set()
+        Slow.released.wait(0.5)
+        return int, (7, )
+
+
+def test_writes_wait_for_a_table_to_be_pickled(tmp_path):
+    database = open_database(tmp_path / "db")
+    people = database.get("people")
+    people.put("a", 1)
+    people.put("c", 3)
+    people.convert(lambda val: Slow() if val == 1 else val)
+    checkpointer = Checkpointer(database, interval=60)
+    metrics = []
+    background = threading.Thread(
+        target=lambda: metrics.append(checkpointer.run_once()))
+    background.start()
+    assert Slow.pickling.wait(5)
+    writer = threading.Thread(target=people.put, args=("b", 2))
+    writer.start()
+    writer.join(0.2)
+    Slow.released.set()
+    background.join()
+    writer.join()
+    assert metrics[0]["error"] is None
+    database.journal.close()
+
+    reopened = open_database(tmp_path / "db")
+    assert reopened.get("people").getData() == {"a": 7, "b": 2, "c": 3}
+
+
+def test_changes_survive_a_crash(tmp_path, crash_child):
+    """The deltas of the journal are replayed after a crash."""
+    expected = crash_child(f"""
+        from database import Database
+        database = Database({str(tmp_path / "db")!r}, journal=True)
+        database.load()
+        people = database.add_table("people")
+        database.checkpoint()
+        people.put("a", {{"projs": [], "count": 0}})
+        for number in range(20):
+            people.get("a")["projs"].append(number)
+            people.get("a")["count"] = number
+            people.touch("a", [("add", "projs", number),
+                               ("set", "count", number)])
+        people.get("a")["projs"].remove(3)
+        people.touch("a", [("remove", "projs", 3)])
+        crash(people.getData())
+        """)
+    assert os.path.getsize(f"{tmp_path / 'db'}.wal") > 0
+    reopened = Database(str(tmp_path / "db"), journal=True)
+    assert reopened.load()
+    assert reopened.get("people").getData() == expected
+
+
+CHECKPOINTED_WRITES = """
+    import random
+    import time
+    from database import Database, Checkpointer
+    database = Database({path!r}, lazy=True, journal=True,
+                        single_file={single_file}, checkpoint_size=1 << 13)
+    database.load()
+    people = database.add_table("people")
+    database.checkpoint()
+    checkpointer = Checkpointer(database, interval=0.01, process={process})
+    checkpointer.start()
+    rng = random.Random(0)
+    for number in range(4000):
+        key = str(rng.randrange(200))
+        row = people.get(key)
+        if row is None or rng.random() < 0.1:
+            people.put(key, {{"count": number, "projs": []}})
+        elif rng.random() < 0.05:
+            people.delete(key)
+        else:
+            row["count"] = number
+            row["projs"].append(number)
+            people.touch(key, [("set", "count", number),
+                               ("add", "projs", number)])
+        if number % 500 == 0:
+            time.sleep(0.05)
+    stats = checkpointer.stats()
+    assert stats["checkpoints"] > 0 and stats["errors"] == 0, stats
+    crash(people.getData())
+    """
+
+
+@pytest.mark.parametrize("single_file", [False, True])
+@pytest.mark.parametrize("process", [False, True])
+def test_background_checkpoints_survive_a_crash(tmp_path, crash_child,
+                                                single_file, process):
+    """Crashing while the tables are checkpointed in the background,
+    from a thread or a process, loses nothing."""
+    expected = crash_child(
+        CHECKPOINTED_WRITES.format(path=str(tmp_path / "db"),
+                                   single_file=single_file,
+                                   process=process))
+    reopened = Database(str(tmp_path / "db"), journal=True,
+                        single_file=single_file)
+    assert reopened.load()
+    assert reopened.get("people").getData() == expected
+
+
+@pytest.mark.parametrize("written", [False, True])
+def test_a_checkpoint_cut_short_by_a_crash_is_replayed(tmp_path, crash_child,
+                                                       written):
+    """A crash before a background checkpoint is finished keeps its
+    rotated journal, whether or not its tables were written."""
+    expected = crash_child(f"""
+        from database import Database
+        database = Database({str(tmp_path / "db")!r}, journal=True)
+        database.load()
+        people = database.add_table("people")
+        people.put("a", {{"projs": []}})
+        database.checkpoint()
+        for number in range(5):
+            people.get("a")["projs"].append(number)
+            people.touch("a", [("add", "projs", number)])
+        job = database.begin_checkpoint(background=True)
+        assert job.rebuilt == ["people"]
+        people.get("a")["projs"].append("after")
+        people.touch("a", [("add", "projs", "after")])
+        if {written}:
+            job.write()
+        crash(people.getData())
+        """)
+    assert os.path.isfile(f"{tmp_path / 'db'}.wal.1")
+    reopened = Database(str(tmp_path / "db"), journal=True)
+    assert reopened.load()
+    assert reopened.get("people").getData() == expected
+    assert expected["a"]["projs"] == [0, 1, 2, 3, 4, "after"]
@@ -0,0 +1,263 @@
+"""
+Tests of the manage app.
+"""
+import hashlib
+import pytest
+from database import CsvFile, Table
+from project_manage import (ManageApp, ActionError, Link, EvaluatorScheduler,
+                            Compactor, Role, hash_logins, hash_password)
+
+LEAD, MEMBER, FACULTY = "9898118", "5662557", "2567260"
+
+
+def file_hashes(directory):
+    return {
+        str(path): hashlib.md5(path.read_bytes()).hexdigest()
+        for path in directory.rglob("*") if path.is_file()
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_passwords_are_hashed_in_batches(app_dir, workers):
+    logins = Table()
+    logins.fromCsv("username", CsvFile("login.csv"))
+    passwords = {
+        username: row["password"]
+        for username, row in logins.getData().items()
+    }
+    hash_logins(logins, workers, batch_size=4)
+    assert logins.count() == len(passwords)
+    for username, password in passwords.items():
+        entry = logins.get(username)
+        assert entry.password == hash_password(password, entry.password[:4])
+    assert logins.get("Lionel.M").role == Role.Member
+    assert logins.get("Paulo.D").role == Role.Faculty
+    assert logins.get("Cristiano.R").id == "7447677"
+
+
+def test_relations_follow_the_changes(app_dir):
+    app = ManageApp()
+    project_id = app.create_project(LEAD, "Bin", "A recycle bin.").id
+    app.invite_member(project_id, "Manuel.N")
+    assert app.get_user_project_ids(MEMBER, Link.Invited) == [project_id]
+    app.respond_invitation(MEMBER, project_id, True)
+    app.request_advisor(project_id, "Paulo.D")
+    assert app.respond_advisor_request(FACULTY, project_id, True)
+    assert sorted(app.get_project_user_ids(project_id)) == sorted(
+        [LEAD, MEMBER, FACULTY])
+    assert app.get_user_project_ids(MEMBER, Link.Invited) == []
+    assert app.get_user_project_ids(FACULTY, Link.Advisor) == [project_id]
+    with pytest.raises(ActionError):
+        app.respond_invitation(MEMBER, project_id, True)
+    app.save()
+
+    rebuilt = ManageApp(read_only=True)
+    for user_id in (LEAD, MEMBER, FACULTY):
+        assert sorted(rebuilt.get_user_project_ids(user_id)) == sorted(
+            app.get_user_project_ids(user_id))
+
+    app.delete_project(project_id)
+    assert app.get_project_user_ids(project_id) == []
+    assert app.people_table.get(LEAD)["projs"] == []
+
+
+def test_read_only_leaves_the_files(app_dir):
+    app = ManageApp()
+    app.create_project(LEAD, "Bin", "A recycle bin.")
+    app.save()
+    before = file_hashes(app_dir)
+
+    read_only = ManageApp(read_only=True)
+    assert len(read_only.get_user_project_ids(LEAD)) == 1
+    read_only.create_project(LEAD, "Other", "Kept in memory.")
+    read_only.save()
+    assert read_only.main_database.checkpoint() == []
+    assert file_hashes(app_dir) == before
+    with pytest.raises(ValueError):
+        ManageApp(sqlite=True, read_only=True)
+
+
+def test_messages_survive_a_crash(app_dir, crash_child):
+    """The inbox is journaled with the tables, so a message sent right
+    before a crash is there after it, and so are the changes
+    to the people that were only journaled as deltas."""
+    project_id = crash_child(f"""
+        from project_manage import ManageApp
+        app = ManageApp()
+        project_id = app.create_project({LEAD!r}, "Bin", "A recycle bin.").id
+        app.invite_member(project_id, "Manuel.N")
+        app.request_advisor(project_id, "Paulo.D")
+        app.respond_advisor_request({FACULTY!r}, project_id, False)
+        crash(project_id)
+        """)
+    app = ManageApp()
+    pages = app.get_message_pages(LEAD)
+    assert len(pages) == 1
+    [(_, message)] = app.read_messages(pages[0])
+    assert (message.type, message.author, message.project) == ("advr", FACULTY,
+                                                               project_id)
+    assert app.people_table.get(MEMBER)["invs"] == [project_id]
+    assert app.people_table.get(LEAD)["projs"] == [project_id]
+    assert app.people_table.get(FACULTY)["adv_reqs"] == []
+
+
+def test_sqlite_writes_survive_a_crash(app_dir, crash_child):
+    """Every write of the app is committed on its own in SQLite, so
+    nothing is lost when it crashes."""
+    project_id = crash_child(f"""
+        from project_manage import ManageApp
+        app = ManageApp(sqlite=True)
+        project_id = app.create_project({LEAD!r}, "Bin", "A recycle bin.").id
+        app.invite_member(project_id, "Manuel.N")
+        app.request_advisor(project_id, "Paulo.D")
+        app.respond_advisor_request({FACULTY!r}, project_id, True)
+        crash(project_id)
+        """)
+    app = ManageApp(sqlite=True)
+    assert app.get_project_view(project_id).name == "Bin"
+    [(_, message)] = app.read_messages(app.get_message_pages(LEAD)[0])
+    assert (message.type, message.project) == ("adva", project_id)
+    assert app.get_project_view(project_id).advisor_id == FACULTY
+    assert app.people_table.get(LEAD)["projs"] == [project_id]
+    assert app.people_table.get(MEMBER)["invs"] == [project_id]
+    assert app.authenticate("Lionel.M", "2977") is not None
+    app.main_database.close()
+
+
+def test_scheduler_picks_the_least_busy():
+    scheduler = EvaluatorScheduler()
+    for faculty_id, load in (("a", 2), ("b", 0), ("c", 1), ("d", 0)):
+        scheduler.update(faculty_id, load)
+    assert scheduler.pick(2) == ["b", "d"]
+    assert scheduler.pick(2, exclude={"b"}) == ["d", "c"]
+    scheduler.update("b", 3)
+    scheduler.update("d", None)
+    assert scheduler.pick(2, valid=lambda faculty_id: faculty_id != "c") == [
+        "a", "b"
+    ]
+    assert "c" not in scheduler and "d" not in scheduler
+    assert scheduler.pick(5) == ["a", "b"] and scheduler.load("b") == 3
+
+
+def test_evaluation_list_is_spread_over_the_faculty(app_dir):
+    app = ManageApp()
+    project_ids = [
+        app.create_project(LEAD, f"Project {number}", "").id
+        for number in range(3)
+    ]
+    for project_id in project_ids:
+        app.submit_evaluation(project_id)
+    documents = app.documents_table
+    generation = documents.generation
+    assert app.assign_evaluation_list(7) == {}
+    assert documents.generation == generation
+    assert list(app.evaluation_list) == project_ids
+
+    assigned = app.assign_evaluation_list(2)
+    assert list(assigned) == project_ids and not app.evaluation_list
+    evaluators = [faculty_id for ids in assigned.values() for faculty_id in ids]
+    assert len(set(evaluators)) == 6
+    assert app.assign_evaluation_list() == {}
+
+
+def test_names_are_cached_until_the_person_changes(app_dir):
+    app = ManageApp()
+    assert app.get_name_from_id(LEAD) == "Lionel Messi"
+    app.get_name_from_id(LEAD)
+    assert app.name_cache.stats()["hits"] == 1
+    app.people_table.get(LEAD)["first"] = "Leo"
+    app.people_table.touch(LEAD, [("set", "first", "Leo")])
+    assert app.get_name_from_id(LEAD) == "Leo Messi"
+    project_id = app.create_project(LEAD, "Bin", "A recycle bin.").id
+    assert app.get_project_summary(project_id).startswith("Bin")
+    app.delete_project(project_id)
+    assert app.get_project_summary(project_id) == "[DELETED PROJECT]"
+
+
+def test_info_is_rendered_again_when_it_changes(app_dir):
+    app = ManageApp()
+    project_id = app.create_project(LEAD, "Bin", "A recycle bin.").id
+    app.invite_member(project_id, "Manuel.N")
+    app.respond_invitation(MEMBER, project_id, True)
+    info = app.get_project_view(project_id).get_info_string(app)
+    assert "Name: Bin" in info and "Manuel" in info
+    assert app.get_project_view(project_id).get_info_string(app) is info
+
+    app.update_project(project_id, desc="A bigger bin.")
+    info = app.get_project_view(project_id).get_info_string(app)
+    assert "Description: A bigger bin." in info
+    app.people_table.get(MEMBER)["first"] = "Manu"
+    app.people_table.touch(MEMBER, [("set", "first", "Manu")])
+    info = app.get_project_view(project_id).get_info_string(app)
+    assert "Manu " in info and "Manuel" not in info
+    app.people_table.touch(MEMBER, [("set", "invs", None)])
+    assert app.get_project_view(project_id).get_info_string(app) is info
+    assert info == app.get_project_view(project_id).render_info_string(app)
+
+
+def test_compactor_drops_deleted_and_repeated_ids(app_dir):
+    app = ManageApp()
+    project_id = app.create_project(LEAD, "Bin", "A recycle bin.").id
+    app.people_table.get(LEAD)["projs"] += [project_id, "gone"]
+    app.people_table.touch(LEAD)
+    app.people_table.get(MEMBER)["invs"] = ["gone"]
+    app.people_table.touch(MEMBER)
+    app.submit_evaluation("gone")
+    app.submit_evaluation(project_id)
+    untouched = app.people_table.get(FACULTY)
+    generation = app.people_table.generation
+
+    compactor = Compactor(app, chunk_size=4)
+    steps = 1
+    while compactor.step():
+        steps += 1
+    assert steps == app.people_table.count() // 4 + 1
+    assert compactor.report == {"rows": 3, "dangling": 3, "duplicates": 1}
+    assert app.people_table.generation == generation + 2
+    assert app.people_table.get(LEAD)["projs"] == [project_id]
+    assert app.people_table.get(MEMBER)["invs"] == []
+    assert app.people_table.get(FACULTY) is untouched
+    assert list(app.evaluation_list) == [project_id]
+    assert app.compact() == {"rows": 0, "dangling": 0, "duplicates": 0}
+
+
+def test_bulk_responses_touch_each_row_once(app_dir):
+    app = ManageApp()
+    project_ids = [
+        app.create_project(LEAD, f"Project {number}", "").id
+        for number in range(3)
+    ]
+    for project_id in project_ids:
+        app.invite_member(project_id, "Manuel.N")
+        app.request_advisor(project_id, "Paulo.D")
+    touched = []
+    app.people_table.listen(lambda action, key, val: touched.append(key))
+    assert app.respond_invitations(MEMBER, project_ids[:2] + ["gone"],
+                                   True) == project_ids[:2]
+    assert touched == [MEMBER]
+    assert app.people_table.get(MEMBER)["projs"] == project_ids[:2]
+    assert app.people_table.get(MEMBER)["invs"] == project_ids[2:]
+    assert MEMBER in app.get_project_view(project_ids[0]).project.members
+
+    generation = app.people_table.generation
+    assert app.respond_invitations(MEMBER, ["gone"], False) == []
+    assert app.respond_advisor_requests(FACULTY, ["gone"], True) == []
+    assert app.people_table.generation == generation
+
+    app.delete_project(project_ids[1])
+    touched.clear()
+    assert app.respond_advisor_requests(FACULTY, project_ids,
+                                        True) == [project_ids[0], project_ids[2]]
+    assert touched.count(FACULTY) == 1
+    assert app.people_table.get(FACULTY)["adv_reqs"] == []
+    assert app.login_table.find_one("id", FACULTY).role == Role.Advisor
+    assert app.get_project_view(project_ids[2]).advisor_id == FACULTY
+    [page] = app.get_message_pages(LEAD)
+    assert [message.type for _, message in app.read_messages(page)] == [
+        "adva", "adva"
+    ]
+
+    app.submit_approval(project_ids[0])
+    assert app.respond_approval_requests(FACULTY, project_ids,
+                                         True) == [project_ids[0]]
+    assert app.get_project_view(project_ids[0]).project.approved
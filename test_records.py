@@ -0,0 +1,44 @@
+"""
+Tests of the records module.
+"""
+import pickle
+import pytest
+from database import Table
+from records import Person, RequestQueue
+
+
+@pytest.mark.parametrize("size", [3, 20])
+def test_request_queue_keeps_the_order_without_repeats(size):
+    ids = [f"p{number}" for number in range(size)]
+    queue = RequestQueue(ids + ids[:2])
+    assert list(queue) == ids and len(queue) == size
+    assert not queue.append("p0") and queue.append("new")
+    queue.remove("p1")
+    with pytest.raises(ValueError):
+        queue.remove("p1")
+    expected = [ids[0], *ids[2:], "new"]
+    assert queue == expected and "p1" not in queue and "new" in queue
+    assert [queue[idx] for idx in range(-len(queue), len(queue))] == \
+        expected + expected
+    assert queue[1:3] == expected[1:3]
+    with pytest.raises(IndexError):
+        queue[len(queue)]
+    with pytest.raises(IndexError):
+        queue[-len(queue) - 1]
+    assert pickle.loads(pickle.dumps(queue)) == expected
+    queue.clear()
+    assert len(queue) == 0 and list(queue) == []
+    with pytest.raises(IndexError):
+        queue[0]
+
+
+def test_migrating_a_person_with_lists_changes_the_table():
+    table = Table({"a": Person.from_dict({"ID": "a", "invs": ["p1", "p1"]})})
+    table.put("b", Person.from_dict({"ID": "b", "invs": RequestQueue()}))
+    unchanged = table.get("b")
+    generation = table.generation
+    table.convert(Person.migrate)
+    assert table.generation > generation and table.get("b") is unchanged
+    assert isinstance(table.get("a").invs, RequestQueue)
+    assert table.get("a").invs == ["p1"]
+    assert Person.migrate({"ID": "c", "projs": []}) == {"ID": "c", "projs": []}